@@ -24,6 +24,9 @@ setup(
         'streamsx>=1.12.10',
         'streamsx.toolkits'
         ],
+    extras_require={
+        'numpy': ['numpy']
+        },
     
     test_suite='nose.collector',
     tests_require=['nose']
@@ -57,8 +57,43 @@ The schema of the stream defines how messages are handled.
 * :py:const:`~schema.Schema.StringMessageMeta` - structured schema with message, key, and message meta data
 * :py:const:`~schema.Schema.BinaryMessageMeta` - structured schema with message, key, and message meta data
 
+:py:func:`subscribe` also accepts other structured schemas with a message attribute, see its `attributes` parameter.
+:py:func:`publish` also accepts ``CommonSchema.Python``, where each tuple is an object supporting the buffer protocol.
 No other formats are supported.
 
+Binary messages
++++++++++++++++
+
+The ``blob`` message of :py:const:`~schema.Schema.BinaryMessage` and :py:const:`~schema.Schema.BinaryMessageMeta`
+is passed to Python callables as a read-only ``memoryview`` referencing the data of the tuple, so that
+large messages are not copied. The ``memoryview`` is released when the callable returns. A callable that
+keeps the message beyond the call, for example in its state, must copy it with ``memoryview.tobytes()``.
+
+In the other direction, a callable can set the message to any ``memoryview``, for example ``memoryview(array)``
+of a NumPy array, without creating an intermediate ``bytes`` object::
+
+    to_publish = images.map(lambda img: {'message': memoryview(img.pixels), 'key': img.camera}, schema=Schema.BinaryMessage)
+    eventstreams.publish(to_publish, 'IMAGES')
+
+Messages containing JSON objects can be decoded into the attributes of a structured
+schema with :py:func:`decode_json`.
+
+Kafka properties
+++++++++++++++++
+
+The Kafka clients can be tuned by passing Kafka properties to :py:func:`publish`
+and :py:func:`subscribe`. The functions :py:func:`producer_properties` and
+:py:func:`consumer_properties` create the properties from typed arguments or
+from a named preset, ``'throughput'`` or ``'low-latency'``::
+
+    props = eventstreams.producer_properties('throughput', acks='all')
+    eventstreams.publish(stream, topic='MY_TOPIC', properties=props)
+
+    props = eventstreams.consumer_properties('throughput')
+    received = eventstreams.subscribe(topology, 'MY_TOPIC', CommonSchema.String, properties=props)
+
+The properties are written to a properties file that is bundled with the topology.
+
 Sample
 ++++++
 
@@ -101,6 +136,10 @@ __all__ = [
     'download_toolkit',
     'configure_connection',
     'subscribe',
-    'publish'
+    'publish',
+    'producer_properties',
+    'consumer_properties',
+    'decode_json',
+    'shedding_policy'
     ]
-from streamsx.eventstreams._eventstreams import subscribe, publish, configure_connection, download_toolkit
+from streamsx.eventstreams._eventstreams import subscribe, publish, configure_connection, download_toolkit, producer_properties, consumer_properties, decode_json, shedding_policy
@@ -3,16 +3,33 @@
 # Copyright IBM Corp. 2017,2018
 
 from tempfile import gettempdir
+import datetime
 import json
 import streamsx.spl.op
 import streamsx.spl.types
+import streamsx.ec
 import string
 import random
+import re
+import hashlib
 import os
-from streamsx.topology.schema import CommonSchema
+import struct
+import time
+import collections
+import bisect
+from streamsx.topology.schema import CommonSchema, StreamSchema, is_common
+from streamsx.topology.topology import Routing
+from streamsx.topology.state import ConsistentRegionConfig
 from streamsx.eventstreams.schema import Schema
+from streamsx.eventstreams.hashing import kafka_partition, murmur2
+from streamsx.eventstreams.emulator import Broker
 from streamsx.toolkits import download_toolkit
 
+try:
+    import orjson as _json_backend
+except ImportError:
+    _json_backend = None
+
 _TOOLKIT_NAME = 'com.ibm.streamsx.messagehub'
 
 
@@ -47,6 +64,408 @@ def _add_credentials_file(topology, credentials):
     return fName
 
 
+def _write_properties_file(topology, properties, file_name):
+    tmpdirname = gettempdir()
+    tmpfile = os.path.join(tmpdirname, file_name)
+    with open(tmpfile, "w") as properties_file:
+        for key in sorted(properties):
+            properties_file.write(key + '=' + str(properties[key]) + '\n')
+
+    topology.add_file_dependency(tmpfile, 'etc')
+    fName = 'etc/'+ file_name
+    print("Adding file dependency " + fName + " to the topology " + topology.name)
+    return fName
+
+
+def _add_properties_file(topology, properties, file_prefix):
+    """
+    Adds a file dependency to the topology.
+    The file contains the Kafka client properties in Java properties format.
+    The filename in the bundle is ``etc/<file_prefix>-12-random-digits.properties``.
+    """
+    if properties is None:
+        raise TypeError(properties)
+    file_name = file_prefix + '-' + _generate_random_digits(12) + '.properties'
+    return _write_properties_file(topology, properties, file_name)
+
+
+def _add_channel_properties_files(topology, properties, file_prefix, width, instance_prefix):
+    """
+    Adds a file dependency for each parallel channel to the topology.
+    The file of channel ``c`` contains the Kafka client properties and the
+    consumer property ``group.instance.id`` with value ``<instance_prefix>-12-random-digits-c``.
+    The filenames in the bundle are ``etc/<file_prefix>-12-random-digits-c.properties``.
+    Returns an SPL expression that selects the file of the channel.
+    """
+    if properties is None:
+        raise TypeError(properties)
+    digits = _generate_random_digits(12)
+    for channel in range(width):
+        channel_properties = dict(properties)
+        channel_properties['group.instance.id'] = instance_prefix + '-' + digits + '-' + str(channel)
+        _write_properties_file(topology, channel_properties, file_prefix + '-' + digits + '-' + str(channel) + '.properties')
+    return streamsx.spl.op.Expression.expression('"etc/' + file_prefix + '-' + digits + '-" + (rstring)max(getChannel(), 0) + ".properties"')
+
+
+_PRODUCER_PRESETS = {
+    'throughput': {
+        'batch.size': 262144,
+        'linger.ms': 50,
+        'compression.type': 'lz4',
+        'buffer.memory': 67108864,
+        'max.in.flight.requests.per.connection': 5
+    },
+    'low-latency': {
+        'batch.size': 16384,
+        'linger.ms': 0,
+        'compression.type': 'none',
+        'max.in.flight.requests.per.connection': 1
+    }
+}
+
+_CONSUMER_PRESETS = {
+    'throughput': {
+        'fetch.min.bytes': 1048576,
+        'fetch.max.wait.ms': 500,
+        'max.partition.fetch.bytes': 4194304,
+        'max.poll.records': 2000,
+        'receive.buffer.bytes': 1048576
+    },
+    'low-latency': {
+        'fetch.min.bytes': 1,
+        'fetch.max.wait.ms': 10,
+        'max.poll.records': 100
+    }
+}
+
+_COOPERATIVE_STICKY_ASSIGNOR = 'org.apache.kafka.clients.consumer.CooperativeStickyAssignor'
+
+_COMPRESSION_TYPES = ['none', 'gzip', 'snappy', 'lz4', 'zstd']
+_ACKS = ['0', '1', 'all', '-1']
+
+
+def _check_int_property(name, value, min_value):
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise TypeError(name + ' must be an int: ' + str(value))
+    if value < min_value:
+        raise ValueError(name + ' must be at least ' + str(min_value) + ': ' + str(value))
+    return value
+
+
+def _preset_properties(presets, preset):
+    if preset is None:
+        return dict()
+    if preset not in presets:
+        raise ValueError('Unknown preset ' + str(preset) + ', valid presets are ' + ', '.join(sorted(presets)))
+    return dict(presets[preset])
+
+
+def producer_properties(preset=None, batch_size=None, linger_ms=None, compression_type=None, buffer_memory=None, acks=None, max_in_flight_requests=None):
+    """Creates Kafka producer properties for tuning :py:func:`publish`.
+
+    Starting from an optional preset, each argument that is not ``None``
+    overrides the corresponding Kafka producer property. The values are validated
+    when the function is called, i.e. while the topology is built.
+
+    Available presets:
+
+    * ``'throughput'`` - large batches, 50 ms linger time, ``lz4`` compression, and 64 MB buffer memory
+    * ``'low-latency'`` - small batches, no linger time, no compression, and one in-flight request per connection
+
+    Example for publishing with the throughput preset and ``acks=all``::
+
+        import streamsx.eventstreams as eventstreams
+
+        props = eventstreams.producer_properties('throughput', acks='all')
+        eventstreams.publish(stream, topic='MY_TOPIC', properties=props)
+
+    Args:
+        preset(str): Name of a preset, ``'throughput'`` or ``'low-latency'``.
+        batch_size(int): Kafka property ``batch.size``, the maximum size of a batch per partition in bytes.
+        linger_ms(int): Kafka property ``linger.ms``, the time in milliseconds the producer waits for more messages to fill a batch.
+        compression_type(str): Kafka property ``compression.type``, one of ``'none'``, ``'gzip'``, ``'snappy'``, ``'lz4'``, or ``'zstd'``.
+        buffer_memory(int): Kafka property ``buffer.memory``, the total memory in bytes the producer can use to buffer messages.
+        acks(str|int): Kafka property ``acks``, one of ``'0'``, ``'1'``, ``'all'``, or ``'-1'``.
+        max_in_flight_requests(int): Kafka property ``max.in.flight.requests.per.connection``.
+
+    Returns:
+        dict: Kafka producer properties that can be passed as `properties` to :py:func:`publish`.
+
+    .. versionadded:: 2.1
+    """
+    properties = _preset_properties(_PRODUCER_PRESETS, preset)
+    if batch_size is not None:
+        properties['batch.size'] = _check_int_property('batch_size', batch_size, 0)
+    if linger_ms is not None:
+        properties['linger.ms'] = _check_int_property('linger_ms', linger_ms, 0)
+    if compression_type is not None:
+        if compression_type not in _COMPRESSION_TYPES:
+            raise ValueError('compression_type must be one of ' + ', '.join(_COMPRESSION_TYPES) + ': ' + str(compression_type))
+        properties['compression.type'] = compression_type
+    if buffer_memory is not None:
+        properties['buffer.memory'] = _check_int_property('buffer_memory', buffer_memory, 1)
+    if acks is not None:
+        if str(acks) not in _ACKS:
+            raise ValueError('acks must be one of ' + ', '.join(_ACKS) + ': ' + str(acks))
+        properties['acks'] = str(acks)
+    if max_in_flight_requests is not None:
+        properties['max.in.flight.requests.per.connection'] = _check_int_property('max_in_flight_requests', max_in_flight_requests, 1)
+    return properties
+
+
+def consumer_properties(preset=None, fetch_min_bytes=None, fetch_max_wait_ms=None, max_partition_fetch_bytes=None, max_poll_records=None, receive_buffer_bytes=None, session_timeout_ms=None):
+    """Creates Kafka consumer properties for tuning :py:func:`subscribe`.
+
+    Starting from an optional preset, each argument that is not ``None``
+    overrides the corresponding Kafka consumer property. The values are validated
+    when the function is called, i.e. while the topology is built.
+
+    Available presets:
+
+    * ``'throughput'`` - fetches of at least 1 MB waiting up to 500 ms, 4 MB per partition, up to 2000 records per poll, and a 1 MB socket receive buffer
+    * ``'low-latency'`` - fetches return as soon as data is available, waiting at most 10 ms, up to 100 records per poll
+
+    Example for subscribing with the throughput preset and a larger poll size::
+
+        import streamsx.eventstreams as eventstreams
+
+        props = eventstreams.consumer_properties('throughput', max_poll_records=5000)
+        stream = eventstreams.subscribe(topology, 'MY_TOPIC', CommonSchema.String, properties=props)
+
+    Args:
+        preset(str): Name of a preset, ``'throughput'`` or ``'low-latency'``.
+        fetch_min_bytes(int): Kafka property ``fetch.min.bytes``, the minimum amount of data in bytes the server returns for a fetch request.
+        fetch_max_wait_ms(int): Kafka property ``fetch.max.wait.ms``, the maximum time in milliseconds the server blocks a fetch request when there is less data than `fetch_min_bytes`.
+        max_partition_fetch_bytes(int): Kafka property ``max.partition.fetch.bytes``, the maximum amount of data in bytes per partition the server returns.
+        max_poll_records(int): Kafka property ``max.poll.records``, the maximum number of records returned in a single poll.
+        receive_buffer_bytes(int): Kafka property ``receive.buffer.bytes``, the size of the TCP receive buffer. -1 uses the operating system default.
+        session_timeout_ms(int): Kafka property ``session.timeout.ms``, the time in milliseconds after which a consumer that does not send heartbeats is removed from the group. With static group membership, this is the time a restarting consumer has to rejoin without a rebalance.
+
+    Returns:
+        dict: Kafka consumer properties that can be passed as `properties` to :py:func:`subscribe`.
+
+    .. versionadded:: 2.1
+    """
+    properties = _preset_properties(_CONSUMER_PRESETS, preset)
+    if fetch_min_bytes is not None:
+        properties['fetch.min.bytes'] = _check_int_property('fetch_min_bytes', fetch_min_bytes, 0)
+    if fetch_max_wait_ms is not None:
+        properties['fetch.max.wait.ms'] = _check_int_property('fetch_max_wait_ms', fetch_max_wait_ms, 0)
+    if max_partition_fetch_bytes is not None:
+        properties['max.partition.fetch.bytes'] = _check_int_property('max_partition_fetch_bytes', max_partition_fetch_bytes, 1)
+    if max_poll_records is not None:
+        properties['max.poll.records'] = _check_int_property('max_poll_records', max_poll_records, 1)
+    if receive_buffer_bytes is not None:
+        properties['receive.buffer.bytes'] = _check_int_property('receive_buffer_bytes', receive_buffer_bytes, -1)
+    if session_timeout_ms is not None:
+        properties['session.timeout.ms'] = _check_int_property('session_timeout_ms', session_timeout_ms, 1)
+    return properties
+
+
+def shedding_policy(sample=None, max_rate=None, lag=None):
+    """Creates a load shedding policy for :py:func:`subscribe`.
+
+    When the application cannot keep up with the rate of the messages, shedding drops
+    messages right after the consumer, so that the lag of the consumer does not grow without limit.
+    Messages are shed by
+
+    * sampling - a deterministic sample of the keys is passed, all messages with the same key are either passed or shed. Messages without key are sampled evenly.
+    * rate cap - at most `max_rate` messages per second are passed, the messages exceeding the rate are shed.
+
+    With `lag`, shedding is only active while the messages are older than `lag` seconds when
+    they are received, i.e. when the consumer falls behind. This requires the ``messageTimestamp``
+    attribute of :py:const:`~schema.Schema.StringMessageMeta` or :py:const:`~schema.Schema.BinaryMessageMeta`,
+    or a mapped ``'timestamp'`` attribute. Without `lag`, shedding is always active.
+
+    The shedding operator has the custom metrics
+
+    * ``nTuplesShed`` - number of shed messages
+    * ``sheddingActive`` - 1 while shedding is active, 0 otherwise
+
+    Example for passing a quarter of the keys while the consumer is more than 30 seconds behind::
+
+        policy = eventstreams.shedding_policy(sample=0.25, lag=30.0)
+        received = eventstreams.subscribe(topology, 'SENSORS', Schema.StringMessageMeta, shedding=policy)
+
+    Args:
+        sample(float): Fraction of the keys, or of the messages without key, that are passed, between 0 and 1.
+        max_rate(float): Maximum number of messages per second that are passed. In a parallel region, the rate is divided by the number of channels.
+        lag(float): Age of the messages in seconds, above which shedding is active.
+
+    Returns:
+        dict: Shedding policy that can be passed as `shedding` to :py:func:`subscribe`.
+
+    .. versionadded:: 2.1
+    """
+    if sample is None and max_rate is None:
+        raise ValueError('sample or max_rate must be specified')
+    policy = dict()
+    if sample is not None:
+        _check_positive_number('sample', sample)
+        if sample > 1:
+            raise ValueError('sample must not be greater than 1')
+        policy['sample'] = sample
+    if max_rate is not None:
+        policy['max_rate'] = _check_positive_number('max_rate', max_rate)
+    if lag is not None:
+        policy['lag'] = _check_positive_number('lag', lag)
+    return policy
+
+
+def _check_positive_number(name, value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise TypeError(name + ' must be a number: ' + str(value))
+    if value <= 0:
+        raise ValueError(name + ' must be positive: ' + str(value))
+    return value
+
+
+def _topic_token(topic=None, pattern=None):
+    """
+    Returns the token used for the default consumer group and the operator name.
+    A single topic is used as is. For a list of topics or a pattern, the readable
+    part is followed by a digest, so that different subscriptions do not share a group.
+    """
+    if pattern is None and not isinstance(topic, list):
+        return str(topic)
+    source = 'pattern:' + pattern if pattern is not None else 'topics:' + '\n'.join(topic)
+    digest = hashlib.sha1(source.encode('utf-8')).hexdigest()[:8]
+    readable = pattern if pattern is not None else '_'.join(topic)
+    return re.sub('[^A-Za-z0-9_]', '_', readable) + '_' + digest
+
+
+def _check_topic(topic, pattern):
+    if pattern is not None:
+        if topic is not None:
+            raise ValueError('topic and pattern cannot be used together')
+        if not isinstance(pattern, str):
+            raise TypeError(pattern)
+        try:
+            re.compile(pattern)
+        except re.error as e:
+            raise ValueError('Invalid pattern ' + pattern + ': ' + str(e))
+        return
+    if topic is None:
+        raise TypeError(topic)
+    if isinstance(topic, list):
+        if not topic:
+            raise ValueError('topic must not be an empty list')
+        for t in topic:
+            if not isinstance(t, str):
+                raise TypeError(t)
+    elif not isinstance(topic, str):
+        raise TypeError(topic)
+
+
+def _schema_attributes(schema):
+    """
+    Returns a dict with the attribute names and SPL types of a structured schema,
+    or ``None`` when the attributes are not known, for example for common schemas.
+    """
+    if not isinstance(schema, StreamSchema) or is_common(schema) or schema._spl_type:
+        return None
+    return dict((attr_name, attr_type) for attr_type, attr_name in schema._types)
+
+
+def _attribute_key(schema, attr_name):
+    """
+    Returns the key to get the attribute `attr_name` from the Python tuples of `schema`,
+    its name for dict tuples and its position for tuples and named tuples.
+    """
+    if schema.style is dict:
+        return attr_name
+    return [name for attr_type, name in schema._types].index(attr_name)
+
+
+def _check_attribute(attributes, attr_name, attr_types):
+    if attr_name not in attributes:
+        raise ValueError('Attribute ' + str(attr_name) + ' not found in schema')
+    if attributes[attr_name] not in attr_types:
+        raise TypeError('Attribute ' + attr_name + ' must have type ' + ' or '.join(attr_types))
+
+
+# message parts set by the consumer: default attribute name and supported attribute types
+_OUTPUT_ATTRIBUTES = {
+    'message': ('message', ['rstring', 'ustring', 'blob']),
+    'key': ('key', ['rstring', 'ustring', 'blob', 'int32', 'int64', 'float32', 'float64']),
+    'topic': ('topic', ['rstring']),
+    'partition': ('partition', ['int32']),
+    'offset': ('offset', ['int64']),
+    'timestamp': ('messageTimestamp', ['int64'])
+}
+
+
+def _output_attribute_names(schema, attributes):
+    """
+    Validates the mapping of message parts to the attributes of a structured
+    consumer schema. Returns the attribute names of the parts that differ
+    from the default names of the consumer.
+    """
+    schema_attributes = _schema_attributes(schema)
+    if schema_attributes is None:
+        raise TypeError(schema)
+    if not isinstance(attributes, dict):
+        raise TypeError(attributes)
+    for part in attributes:
+        if part not in _OUTPUT_ATTRIBUTES:
+            raise ValueError('Unknown message part ' + str(part) + ', expected one of ' + ', '.join(sorted(_OUTPUT_ATTRIBUTES)))
+    if 'message' not in attributes and 'message' not in schema_attributes:
+        # not a message schema
+        raise TypeError(schema)
+    names = dict()
+    for part, (default_name, attr_types) in _OUTPUT_ATTRIBUTES.items():
+        attr_name = attributes.get(part, default_name)
+        if part in attributes or part == 'message' or attr_name in schema_attributes:
+            _check_attribute(schema_attributes, attr_name, attr_types)
+        if attr_name != default_name:
+            names[part] = attr_name
+    return names
+
+
+class _KeyPartition(object):
+    """
+    Callable returning the partition the Kafka default partitioner
+    chooses for the key of a tuple. Used as hash function for
+    the hash partitioned parallel region of :py:func:`publish`.
+    """
+    def __init__(self, partition_count, key='key'):
+        self.partition_count = partition_count
+        self.key = key
+
+    def __call__(self, tuple):
+        return kafka_partition(tuple[self.key], self.partition_count)
+
+
+def _partition_expression(partitions=None, partition_count=None, parallel=None):
+    """
+    Creates the value for the ``partition`` parameter of the consumer.
+    Returns ``None`` when partitions are not assigned statically.
+    With `parallel` and `partition_count`, channel ``c`` is assigned the
+    partitions ``c, c + parallel, c + 2 * parallel, ...``.
+    """
+    if parallel is not None:
+        _check_int_property('parallel', parallel, 1)
+    if partitions is not None:
+        if partition_count is not None:
+            raise ValueError('partitions and partition_count cannot be used together')
+        if parallel is not None:
+            raise ValueError('partitions cannot be used with parallel, use partition_count')
+        if not isinstance(partitions, (list, tuple)) or len(partitions) == 0:
+            raise TypeError(partitions)
+        for p in partitions:
+            _check_int_property('partition', p, 0)
+        return streamsx.spl.op.Expression.expression(', '.join(str(p) for p in partitions))
+    if partition_count is None:
+        return None
+    _check_int_property('partition_count', partition_count, 1)
+    if parallel is None:
+        return streamsx.spl.op.Expression.expression(', '.join(str(p) for p in range(partition_count)))
+    if partition_count % parallel != 0:
+        raise ValueError('partition_count ' + str(partition_count) + ' must be a multiple of parallel ' + str(parallel))
+    offsets = ['getChannel()' if i == 0 else 'getChannel() + ' + str(i) for i in range(0, partition_count, parallel)]
+    return streamsx.spl.op.Expression.expression(', '.join(offsets))
+
+
 def download_toolkit(url=None, target_dir=None):
     r"""Downloads the latest streamsx.messagehub toolkit from GitHub.
 
@@ -133,27 +552,185 @@ def configure_connection(instance, name='eventstreams', credentials=None):
     return name
 
 
-def subscribe(topology, topic, schema, group=None, credentials=None, name=None):
+def subscribe(topology, topic, schema, group=None, credentials=None, name=None, properties=None, partitions=None, partition_count=None, parallel=None, static_membership=False, cooperative_rebalancing=False, pattern=None, attributes=None, batch_size=None, batch_timeout=None, named_tuples=False, unpack=False, key_filter=None, shedding=None, start_position=None, start_time=None, start_offsets=None, end_time=None, end_offsets=None, consistent_region=None, trigger_count=None, latency_metrics=False, emulator=None):
     """Subscribe to messages from Event Streams (Message Hub) for a topic.
 
     Adds an Event Streams consumer that subscribes to a topic
     and converts each consumed message to a stream tuple.
 
+    A single consumer can subscribe to multiple topics, either with a list
+    of topics or with a regular expression `pattern` matching topic names.
+    The schemas :py:const:`~schema.Schema.StringMessageMeta` and :py:const:`~schema.Schema.BinaryMessageMeta`
+    contain the ``topic`` attribute telling from which topic a message was consumed.
+
+    Besides the predefined schemas, the messages can be received into any structured schema
+    of the application. The attributes the consumer sets are given by `attributes`, a dict mapping
+    the message parts to the attribute names of the schema. Parts not contained in the schema
+    are not set, attributes of the schema that are not mapped keep their default values.
+    The parts and their attribute types are
+
+    * ``'message'`` - ``rstring``, ``ustring``, or ``blob``, default attribute ``message``, required
+    * ``'key'`` - ``rstring``, ``ustring``, ``blob``, ``int32``, ``int64``, ``float32``, or ``float64``, default attribute ``key``
+    * ``'topic'`` - ``rstring``, default attribute ``topic``
+    * ``'partition'`` - ``int32``, default attribute ``partition``
+    * ``'offset'`` - ``int64``, default attribute ``offset``
+    * ``'timestamp'`` - ``int64``, default attribute ``messageTimestamp``
+
+    With `batch_size` or `batch_timeout`, the messages are delivered in batches. Each tuple
+    contains a batch of messages, where each attribute of `schema` becomes a list with one element per message.
+    For the predefined message schemas, the schema of the returned stream is
+    :py:const:`~schema.Schema.StringMessageBatch`, :py:const:`~schema.Schema.BinaryMessageBatch`,
+    :py:const:`~schema.Schema.StringMessageMetaBatch`, or :py:const:`~schema.Schema.BinaryMessageMetaBatch`.
+    A Python callable processing the batches pays the interpreter overhead once per batch, and can
+    process the messages with vectorized libraries like NumPy or pandas.
+
     Args:
         topology(Topology): Topology that will contain the stream of messages.
-        topic(str): Topic to subscribe messages from.
+        topic(str|list): Topic or list of topics to subscribe messages from. Must be ``None`` when `pattern` is used.
         schema(StreamSchema): Schema for returned stream.
         group(str): Kafka consumer group identifier. When not specified it default to the job name with `topic` appended separated by an underscore, so that multiple ``subscribe`` calls with the same topic in one topology automatically build a consunsumer group.
         credentials(dict|str): Credentials in JSON or name of the application configuration containing the credentials for the Event Streams service. When set to ``None`` the application configuration ``eventstreams`` is used.
         name(str): Consumer name in the Streams context, defaults to a generated name.
+        properties(dict): Kafka consumer properties, for example created with :py:func:`consumer_properties`. The properties are written to a properties file that is bundled with the topology.
+        partitions(list): Partition numbers of the topic that are assigned to the consumer. When specified, the consumer does not take part in consumer group coordination.
+        partition_count(int): Number of partitions of the topic. When specified, the partitions are assigned statically to the consumer without consumer group coordination. Together with `parallel`, each parallel channel ``c`` is assigned the partitions ``c, c + parallel, c + 2 * parallel, ...``, so that `partition_count` must be a multiple of `parallel`.
+        parallel(int): Number of consumers. When specified, the returned stream is the start of a parallel region with `parallel` channels, each containing a consumer. Without `partition_count`, the consumers build a consumer group.
+        static_membership(bool): When ``True``, each consumer joins the consumer group as a static member with a stable group instance identifier per parallel channel (Kafka property ``group.instance.id``). A restarting consumer that rejoins within the session timeout gets its partitions back without a rebalance of the group. Requires Kafka 2.3 or later.
+        cooperative_rebalancing(bool): When ``True``, the consumers use the cooperative sticky partition assignor, so that a rebalance revokes only the partitions that move to another consumer instead of stopping all consumers of the group. Requires a Kafka client 2.4 or later in the toolkit.
+        pattern(str): Regular expression (Java syntax) of the topic names to subscribe messages from. Topics that are created later and match the pattern are subscribed automatically.
+        attributes(dict): Mapping of the message parts ``'message'``, ``'key'``, ``'topic'``, ``'partition'``, ``'offset'``, and ``'timestamp'`` to the names of the attributes of `schema` receiving them. Used for schemas other than the predefined schemas.
+        batch_size(int): Number of messages per batch. Cannot be used together with `batch_timeout`.
+        batch_timeout(float|datetime.timedelta): Time interval in seconds, in which the received messages are delivered as one batch. Cannot be used together with `batch_size`.
+        named_tuples(bool): When ``True``, the tuples of a structured schema are passed to Python callables as named tuples instead of dicts. The fields of the named tuples are the attributes of the schema in their order, so that they can also be accessed by position. For the predefined message schemas, the named tuple classes are named ``StringMessageTuple``, ``BinaryMessageTuple``, ``StringMessageMetaTuple``, and ``BinaryMessageMetaTuple``. A ``blob`` message is a ``memoryview`` as for dicts.
+        unpack(bool): When ``True``, envelopes of messages packed by :py:func:`publish` with `pack` or `pack_bytes` are expanded into the packed messages. Each message gets the key and the meta data of its envelope. Messages that are not envelopes are passed unchanged. Supported for ``CommonSchema.String``, ``CommonSchema.Json``, and the predefined message schemas.
+        key_filter(str|set|re.Pattern): Filter for the message keys. Only messages with a key starting with a string, with a key contained in a set of strings, or with a key matching a compiled regular expression (Perl syntax) are passed. The filter is evaluated by an SPL operator fused with the consumer, so that the dropped messages are never converted to Python objects. Requires a key attribute of type ``rstring``.
+        shedding(dict): Load shedding policy created with :py:func:`shedding_policy`. The messages are shed by a Python operator fused with the consumer.
+        start_position(str): ``'beginning'`` to start reading at the first message of the partitions, ``'end'`` to start reading after the last message. By default, a consumer group continues with its committed offsets, or starts at the end.
+        start_time(datetime.datetime|float): Start reading at the first message with a timestamp at or after the start time, given as ``datetime`` or in seconds since the epoch.
+        start_offsets(dict): Offsets per partition number at which reading starts. The partitions of the dict are assigned to the consumer, so that `partitions`, `partition_count`, and `parallel` cannot be used.
+        end_time(datetime.datetime|float): Messages with a timestamp after the end time are dropped. Requires the message timestamp and partition attributes.
+        end_offsets(dict): Offsets per partition number. Messages at or after the offset of their partition are dropped, as are all messages of partitions without an offset. With `partitions` or `partition_count`, all assigned partitions must have an offset. Requires the partition and offset attributes, and a single `topic`.
+        consistent_region(ConsistentRegionConfig): Configuration of the consistent region started by the consumer, created with ``ConsistentRegionConfig.operator_driven()`` or ``ConsistentRegionConfig.periodic()``.
+        trigger_count(int): Number of messages after which the consumer triggers a drain and checkpoint of an operator driven consistent region. When specified without `consistent_region`, an operator driven consistent region with default timeouts is started.
+        latency_metrics(bool): ``True`` to report custom metrics per partition with the latency of the messages, the offset, and the message rate. Requires the message timestamp, partition, and offset attributes, and a single `topic`.
+        emulator(Broker): In-process broker of :py:mod:`~streamsx.eventstreams.emulator` to consume the messages from instead of Event Streams. `credentials` and `properties` are ignored.
 
     Returns:
          Stream: Stream containing messages.
+
+    Example for four consumers, where each consumer reads from two of eight partitions
+    without any consumer group rebalancing when a consumer restarts::
+
+        received = eventstreams.subscribe(topology, 'EIGHT_PARTITIONS_TOPIC', Schema.StringMessageMeta,
+            partition_count=8, parallel=4)
+        received = received.map(process).end_parallel()
+
+    Example for a consumer group of 24 consumers where a restarting consumer does not stall the other consumers::
+
+        props = eventstreams.consumer_properties('throughput', session_timeout_ms=60000)
+        received = eventstreams.subscribe(topology, 'MY_TOPIC', Schema.StringMessageMeta,
+            properties=props, parallel=24, static_membership=True, cooperative_rebalancing=True)
+
+    Example for a single consumer for all topics beginning with ``sensors.``::
+
+        received = eventstreams.subscribe(topology, None, Schema.StringMessageMeta, pattern='sensors\\..*')
+
+    Example for receiving the messages into an application schema with the sensor
+    identifier as key and the time when the message was created::
+
+        schema = StreamSchema('tuple<rstring sensor_id, rstring reading, int64 ts>')
+        received = eventstreams.subscribe(topology, 'SENSORS', schema,
+            attributes={'key': 'sensor_id', 'message': 'reading', 'timestamp': 'ts'})
+
+    Example for batches of 1000 messages, which are decoded with pandas::
+
+        batches = eventstreams.subscribe(topology, 'SENSORS', Schema.StringMessage, batch_size=1000)
+        frames = batches.map(lambda batch: pandas.DataFrame.from_records(map(json.loads, batch['message'])))
+
+    Example for receiving only the messages for two sensors from a shared topic::
+
+        received = eventstreams.subscribe(topology, 'SENSORS', Schema.StringMessage, key_filter={'sensor_1', 'sensor_2'})
+
+    With `start_time`, `start_offsets`, or the start position ``'beginning'``, the consumer replays the history of the topic.
+    Unless overridden by `properties`, the consumer uses the ``'throughput'`` preset of :py:func:`consumer_properties`,
+    so that it fetches at maximum sizes. With `partition_count` and `parallel`, the partitions are read in parallel.
+    The messages after the end bound, `end_time` or `end_offsets`, are dropped by a Python filter fused with the consumer.
+    The consumer operator itself keeps polling, as it has no end condition, and no final punctuation is submitted.
+    Instead, the filter sets its custom metric ``endReached`` to 1 when all partitions of its channel have passed
+    the end bound, so that the job can be canceled when the backfill is complete. A partition has passed the end bound
+    with a message at the offset before its end offset, or with a message after the end offset or the end time. The
+    partitions of a channel are the assigned partitions with `partitions` or `partition_count`, otherwise the
+    partitions that delivered messages. With `key_filter`, only messages with matching keys are checked.
+
+    Example for reprocessing the messages of the last 24 hours with eight consumers::
+
+        received = eventstreams.subscribe(topology, 'SENSORS', Schema.StringMessageMeta,
+            partition_count=8, parallel=8, start_time=time.time() - 86400, end_time=time.time())
+
+    The consumer can start a consistent region for at-least-once processing. The offsets of the
+    messages are committed when the region has drained and checkpointed. The checkpoint cadence
+    is set either by `trigger_count` or by the period of a periodic region. Fewer checkpoints reduce
+    the time spent in drains and checkpoints, while more messages are replayed after a failure.
+    The Streams runtime reports the drain, checkpoint, and reset times of the region as metrics
+    of the consistent region, for example in the Streams Console.
+
+    Example for a consistent region that checkpoints every 10000 messages::
+
+        received = eventstreams.subscribe(topology, 'SENSORS', Schema.StringMessage, trigger_count=10000)
+
+    Example for a consistent region that checkpoints every 30 seconds::
+
+        from streamsx.topology.state import ConsistentRegionConfig
+        received = eventstreams.subscribe(topology, 'SENSORS', Schema.StringMessage,
+            consistent_region=ConsistentRegionConfig.periodic(30.0, drain_timeout=120.0))
+
+    With `latency_metrics`, a Python operator fused with the consumer keeps custom metrics for each partition ``P``
+    it receives messages from, using the message timestamp, partition, and offset attributes.
+    The metrics are named by partition only, so `latency_metrics` cannot be used with a list of topics or a `pattern`:
+
+    * ``P.latency.le<N>ms`` - number of messages received at most ``N`` milliseconds after their timestamp, for ``N`` in 1, 2, 5, 10, 20, 50, ... 60000
+    * ``P.latency.gt60000ms`` - number of messages received more than one minute after their timestamp
+    * ``P.offset`` - offset of the last received message
+    * ``P.recordsPerSecond`` - number of received messages per second
+
+    The latency buckets form a cumulative histogram of the time between producing and consuming
+    the messages, including the clock difference between the producer or broker and the consumer.
+    The counts are kept in Python integers and copied to the metrics once per second.
+
+    Example for monitoring the latency of received messages::
+
+        received = eventstreams.subscribe(topology, 'SENSORS', Schema.StringMessageMeta, latency_metrics=True)
+
+    With `emulator`, the messages are consumed by a Python operator from a :py:class:`~streamsx.eventstreams.emulator.Broker`
+    running in the same process, for example in a standalone application, instead of Event Streams. This allows to test and
+    profile topologies without the Event Streams toolkit and service. A consistent region cannot be used with the emulator.
+
+    Example for consuming from an emulated broker::
+
+        from streamsx.eventstreams import emulator
+        broker = emulator.Broker('local', partitions=3)
+        received = eventstreams.subscribe(topology, 'SENSORS', Schema.StringMessageMeta, emulator=broker)
+
+    Example for accessing the attributes of the received tuples by name or position::
+
+        received = eventstreams.subscribe(topology, 'SENSORS', Schema.StringMessage, named_tuples=True)
+        keys = received.map(lambda msg: msg.key)
+
+    .. versionchanged:: 2.1 `properties`, `partitions`, `partition_count`, `parallel`, `static_membership`, `cooperative_rebalancing`, `pattern`, `attributes`, `batch_size`, `batch_timeout`, `named_tuples`, `unpack`, `key_filter`, `shedding`, `start_position`, `start_time`, `start_offsets`, `end_time`, `end_offsets`, `consistent_region`, `trigger_count`, `latency_metrics`, and `emulator` parameters added. `topic` can be a list. `schema` can be any structured schema.
     """
-    if topic is None:
-        raise TypeError(topic)
+    _check_topic(topic, pattern)
+    unpacked_schema = None
+    if unpack:
+        if attributes is not None or batch_size is not None or batch_timeout is not None:
+            raise ValueError('unpack cannot be used with attributes, batch_size, or batch_timeout')
+        unpacked_schema = schema
+        schema = _envelope_schema(schema)
+    batch_schema = _batch_schema(schema, batch_size, batch_timeout)
     msg_attr_name = None
-    if schema is CommonSchema.Json:
+    output_attributes = dict()
+    if attributes is not None:
+        output_attributes = _output_attribute_names(schema, attributes)
+    elif schema is CommonSchema.Json:
         msg_attr_name = 'jsonString'
     elif schema is CommonSchema.String:
         msg_attr_name = 'string'
@@ -170,13 +747,15 @@ def subscribe(topology, topic, schema, group=None, credentials=None, name=None):
         # msg_attr_name = 'message'
         pass
     else:
-        raise TypeError(schema)
+        output_attributes = _output_attribute_names(schema, dict())
 
+    topic_tok = _topic_token(topic, pattern)
+    group_id = group
     if group is None:
-        group = streamsx.spl.op.Expression.expression('getJobName() + "_" + "' + str(topic) + '"')
+        group = streamsx.spl.op.Expression.expression('getJobName() + "_" + "' + topic_tok + '"')
 
     if name is None:
-        name = topic
+        name = topic if isinstance(topic, str) else topic_tok
 
     # check if it's the credentials for the service
     if isinstance(credentials, dict):
@@ -184,40 +763,739 @@ def subscribe(topology, topic, schema, group=None, credentials=None, name=None):
     else:
         appConfigName = credentials
 
-    _op = _MessageHubConsumer(topology, schema=schema, outputMessageAttributeName=msg_attr_name, appConfigName=appConfigName, topic=topic, groupId=group, name=name)
-    if (appConfigName is None) and (credentials is not None):
-        _op.params['credentials'] = json.dumps(credentials)
-        # credentials parameter requires 1.7.0
-        _add_toolkit_dependency(topology, '1.7.0')
+    consistent_region = _consistent_region(consistent_region, trigger_count)
+    if emulator is not None:
+        if not isinstance(emulator, Broker):
+            raise TypeError(emulator)
+        if consistent_region is not None:
+            raise ValueError('A consistent region cannot be used with emulator')
+    start_params = _start_parameters(start_position, start_time, start_offsets)
+    if start_offsets is not None:
+        if partitions is not None or partition_count is not None or parallel is not None:
+            raise ValueError('start_offsets cannot be used with partitions, partition_count, or parallel')
+        partitions = sorted(start_offsets)
+    partition = _partition_expression(partitions, partition_count, parallel)
+    if partition is not None and not isinstance(topic, str):
+        raise ValueError('partitions can be assigned only for a single topic')
+    if end_offsets is not None and not isinstance(topic, str):
+        raise ValueError('end_offsets can be used only for a single topic')
+    if latency_metrics and not isinstance(topic, str):
+        raise ValueError('latency_metrics can be used only for a single topic')
+
+    if properties is not None and not isinstance(properties, dict):
+        raise TypeError(properties)
+    if start_time is not None or start_offsets is not None or start_position == 'beginning':
+        # replay at maximum fetch sizes
+        replay_properties = _preset_properties(_CONSUMER_PRESETS, 'throughput')
+        replay_properties.update(properties or dict())
+        properties = replay_properties
+    if static_membership or cooperative_rebalancing:
+        if partition is not None:
+            raise ValueError('static_membership and cooperative_rebalancing require a consumer group, partitions must not be assigned')
+        properties = dict(properties) if properties is not None else dict()
+        if cooperative_rebalancing:
+            properties['partition.assignment.strategy'] = _COOPERATIVE_STICKY_ASSIGNOR
+
+    propertiesFile = None
+    if emulator is not None:
+        # the emulated consumer does not read Kafka properties
+        pass
+    elif static_membership:
+        propertiesFile = _add_channel_properties_files(topology, properties, 'eventstreams-consumer', parallel or 1, topic_tok)
+    elif properties is not None:
+        propertiesFile = _add_properties_file(topology, properties, 'eventstreams-consumer')
+
+    if msg_attr_name is None:
+        msg_attr_name = output_attributes.get('message')
+    filter_expressions = []
+    if key_filter is not None:
+        filter_expressions.append(_key_filter_expression(key_filter, schema, output_attributes.get('key', 'key')))
+    if named_tuples and unpacked_schema is None and _schema_attributes(schema) is not None:
+        if batch_schema is not None:
+            batch_schema = batch_schema.as_tuple(named=True)
+        else:
+            schema = schema.as_tuple(named=_NAMED_TUPLES.get(schema, True))
+    end_bound = None
+    if end_time is not None or end_offsets is not None:
+        end_bound = _end_bound(end_time, end_offsets, schema, output_attributes.get('timestamp', 'messageTimestamp'),
+            output_attributes.get('partition', 'partition'), output_attributes.get('offset', 'offset'), partitions, partition_count)
+    latency = None
+    if latency_metrics:
+        latency = _latency_metrics(schema, output_attributes.get('timestamp', 'messageTimestamp'),
+            output_attributes.get('partition', 'partition'), output_attributes.get('offset', 'offset'))
+    shedder = None
+    if shedding is not None:
+        shedder = _shedder(shedding, schema, output_attributes.get('key', 'key'), output_attributes.get('timestamp', 'messageTimestamp'))
+    if emulator is not None:
+        stream = _emulated_consumer(topology, emulator, schema, output_attributes, topic, pattern,
+            group_id if group_id is not None else topic_tok, partitions, partition_count, parallel,
+            start_position, start_time, start_offsets, name)
     else:
-        # when using an app config make sure that the app config 
-        # created with configure_connection(...) is understood by the toolkit
-        # (versions 2.0.0 and 2.0.1 have critical bugs -- request 2.0.2)
-        _add_toolkit_dependency(topology, '2.0.2')
+        _op = _MessageHubConsumer(topology, schema=schema, outputMessageAttributeName=msg_attr_name,
+            outputKeyAttributeName=output_attributes.get('key'),
+            outputTopicAttributeName=output_attributes.get('topic'),
+            outputPartitionAttributeName=output_attributes.get('partition'),
+            outputOffsetAttributeName=output_attributes.get('offset'),
+            outputTimestampAttributeName=output_attributes.get('timestamp'),
+            startPosition=start_params.get('startPosition'), startTime=start_params.get('startTime'), startOffset=start_params.get('startOffset'),
+            triggerCount=streamsx.spl.types.int32(trigger_count) if trigger_count is not None else None,
+            appConfigName=appConfigName, propertiesFile=propertiesFile, partition=partition, pattern=pattern, topic=topic, groupId=group, name=name)
+        if (appConfigName is None) and (credentials is not None):
+            _op.params['credentials'] = json.dumps(credentials)
+            # credentials parameter requires 1.7.0
+            _add_toolkit_dependency(topology, '1.7.0')
+        else:
+            # when using an app config make sure that the app config 
+            # created with configure_connection(...) is understood by the toolkit
+            # (versions 2.0.0 and 2.0.1 have critical bugs -- request 2.0.2)
+            _add_toolkit_dependency(topology, '2.0.2')
+
+        stream = _op.stream
+    if consistent_region is not None:
+        stream.set_consistent(consistent_region)
+    if parallel is not None and emulator is None:
+        stream = stream.set_parallel(parallel)
+    if latency is not None:
+        stream = stream.filter(latency, name=name + '_latency').colocate(stream)
+    if filter_expressions:
+        stream = _filter(stream, filter_expressions, name)
+    if end_bound is not None:
+        stream = stream.filter(end_bound, name=name + '_end').colocate(stream)
+    if shedder is not None:
+        stream = stream.filter(shedder, name=name + '_shedding').colocate(stream)
+    if batch_schema is not None:
+        stream = _batch(stream, batch_schema, batch_size, batch_timeout, name)
+    if unpacked_schema is not None:
+        stream = _unpack(stream, unpacked_schema, named_tuples, name)
+    return stream
+
+
+def _spl_string(value):
+    """
+    Returns the SPL string literal of `value`.
+    """
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _key_filter_expression(key_filter, schema, key_attr_name):
+    """
+    Returns the SPL filter expression for the key attribute `key_attr_name` of `schema`.
+    """
+    attributes = _schema_attributes(schema)
+    if attributes is None:
+        raise TypeError('key_filter requires a structured schema with a key attribute')
+    _check_attribute(attributes, key_attr_name, ['rstring'])
+    if isinstance(key_filter, str):
+        prefix_length = len(key_filter.encode('utf-8'))
+        return 'substring(' + key_attr_name + ', 0, ' + str(prefix_length) + ') == ' + _spl_string(key_filter)
+    if isinstance(key_filter, type(re.compile(''))):
+        return 'size(regexMatchPerl(' + key_attr_name + ', ' + _spl_string(key_filter.pattern) + ')) > 0'
+    if isinstance(key_filter, (set, frozenset, list, tuple)):
+        if not key_filter:
+            raise ValueError('key_filter must not be empty')
+        for key in key_filter:
+            if not isinstance(key, str):
+                raise TypeError(key)
+        return key_attr_name + ' in {' + ', '.join(_spl_string(key) for key in sorted(set(key_filter))) + '}'
+    raise TypeError(key_filter)
+
+
+def _filter(stream, expressions, name):
+    """
+    Filters the tuples of the consumer with an SPL filter fused with the consumer.
+    The tuples are passed when all `expressions` are true.
+    """
+    if len(expressions) == 1:
+        expression = expressions[0]
+    else:
+        expression = ' && '.join('(' + e + ')' for e in expressions)
+    _op = streamsx.spl.op.Map('spl.relational::Filter', stream, params={'filter': streamsx.spl.op.Expression.expression(expression)}, name=name + '_filter')
+    return _op.stream.colocate(stream)
+
+
+def _epoch_millis(name, value):
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is None:
+            # naive datetime in local time
+            return int(time.mktime(value.timetuple()) * 1000 + value.microsecond // 1000)
+        return int(value.timestamp() * 1000)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise TypeError(name + ' must be a datetime or seconds since the epoch: ' + str(value))
+    if value < 0:
+        raise ValueError(name + ' must not be negative: ' + str(value))
+    return int(value * 1000)
+
+
+def _check_offsets(name, offsets):
+    if not isinstance(offsets, dict):
+        raise TypeError(offsets)
+    if not offsets:
+        raise ValueError(name + ' must not be empty')
+    for p, o in offsets.items():
+        _check_int_property('partition', p, 0)
+        _check_int_property('offset', o, 0)
+
+
+def _consistent_region(consistent_region, trigger_count):
+    """
+    Returns the configuration of the consistent region started by the consumer, or ``None``.
+    """
+    if trigger_count is not None:
+        _check_int_property('trigger_count', trigger_count, 1)
+    if consistent_region is None:
+        if trigger_count is None:
+            return None
+        return ConsistentRegionConfig.operator_driven()
+    if not isinstance(consistent_region, ConsistentRegionConfig):
+        raise TypeError(consistent_region)
+    if consistent_region.trigger == ConsistentRegionConfig.Trigger.OPERATOR_DRIVEN:
+        if trigger_count is None:
+            raise ValueError('trigger_count is required for an operator driven consistent region')
+    elif trigger_count is not None:
+        raise ValueError('trigger_count applies only to an operator driven consistent region')
+    return consistent_region
+
+
+def _start_parameters(start_position, start_time, start_offsets):
+    """
+    Returns the consumer parameters for the start position.
+    """
+    if len([s for s in (start_position, start_time, start_offsets) if s is not None]) > 1:
+        raise ValueError('Only one of start_position, start_time, and start_offsets can be used')
+    if start_position is not None:
+        if start_position not in ('beginning', 'end'):
+            raise ValueError("start_position must be 'beginning' or 'end': " + str(start_position))
+        return {'startPosition': streamsx.spl.op.Expression.expression(start_position.capitalize())}
+    if start_time is not None:
+        return {'startPosition': streamsx.spl.op.Expression.expression('Time'),
+                'startTime': streamsx.spl.types.int64(_epoch_millis('start_time', start_time))}
+    if start_offsets is not None:
+        _check_offsets('start_offsets', start_offsets)
+        return {'startPosition': streamsx.spl.op.Expression.expression('Offset'),
+                'startOffset': streamsx.spl.op.Expression.expression(', '.join(str(start_offsets[p]) + 'l' for p in sorted(start_offsets)))}
+    return dict()
+
+
+def _end_bound(end_time, end_offsets, schema, timestamp_attr_name, partition_attr_name, offset_attr_name, partitions, partition_count):
+    """
+    Returns the filter callable dropping the messages of `schema` after the end bound.
+    """
+    attributes = _schema_attributes(schema)
+    if attributes is None:
+        raise TypeError('An end bound requires a structured schema with message meta data')
+    _check_attribute(attributes, partition_attr_name, ['int32'])
+    end_millis = None
+    if end_time is not None:
+        end_millis = _epoch_millis('end_time', end_time)
+        _check_attribute(attributes, timestamp_attr_name, ['int64'])
+    if partitions is None and partition_count is not None:
+        partitions = list(range(partition_count))
+    if end_offsets is not None:
+        _check_offsets('end_offsets', end_offsets)
+        _check_attribute(attributes, offset_attr_name, ['int64'])
+        if partitions is not None:
+            unbounded = [p for p in partitions if p not in end_offsets]
+            if unbounded:
+                raise ValueError('end_offsets has no offset for the partitions ' + ', '.join(str(p) for p in unbounded))
+        end_offsets = dict(end_offsets)
+    return _EndBound(end_millis, end_offsets, partitions,
+        _attribute_key(schema, timestamp_attr_name) if end_millis is not None else None,
+        _attribute_key(schema, partition_attr_name),
+        _attribute_key(schema, offset_attr_name) if end_offsets is not None else None)
+
+
+class _EndBound(object):
+    """
+    Filter callable passing the messages before the end time and the end offsets of their partitions.
+    A partition has passed the end with a message at the last offset before its end offset, or
+    after the end offset or the end time. When all partitions of the channel have passed the end,
+    the custom metric ``endReached`` is set to 1. The partitions of the channel are the assigned partitions,
+    or the partitions that delivered messages when the partitions are assigned by the consumer group.
+    """
+    def __init__(self, end_millis, end_offsets, partitions, timestamp_key, partition_key, offset_key):
+        self.end_millis = end_millis
+        self.end_offsets = end_offsets
+        self.partitions = partitions
+        self.timestamp_key = timestamp_key
+        self.partition_key = partition_key
+        self.offset_key = offset_key
+        self._assigned = None
+        self._seen = set()
+        self._ended = set()
+        self._end_metric = None
+
+    def __enter__(self):
+        if streamsx.ec.is_active():
+            if self.partitions is not None:
+                channels = max(1, streamsx.ec.max_channels(self))
+                channel = max(0, streamsx.ec.channel(self))
+                # channel c is assigned the partitions c, c + channels, c + 2 * channels, ...
+                self._assigned = set(p for p in self.partitions if p % channels == channel)
+            self._end_metric = streamsx.ec.CustomMetric(self, 'endReached', '1 when all partitions have passed the end bound', streamsx.ec.MetricKind.Gauge)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_assigned'] = None
+        state['_seen'] = set()
+        state['_ended'] = set()
+        state['_end_metric'] = None
+        return state
+
+    def ended(self):
+        """Returns ``True`` when all partitions of the channel have passed the end bound."""
+        partitions = self._seen if self._assigned is None else self._assigned
+        return len(partitions) > 0 and partitions.issubset(self._ended)
+
+    def __call__(self, tuple):
+        partition = tuple[self.partition_key]
+        passed = True
+        at_end = False
+        if self.end_offsets is not None:
+            end_offset = self.end_offsets.get(partition)
+            if end_offset is None:
+                return False
+            offset = tuple[self.offset_key]
+            passed = offset < end_offset
+            at_end = offset >= end_offset - 1
+        if self.end_millis is not None and tuple[self.timestamp_key] > self.end_millis:
+            passed = False
+            at_end = True
+        self._seen.add(partition)
+        if at_end and partition not in self._ended:
+            self._ended.add(partition)
+            if self._end_metric is not None and self.ended():
+                self._end_metric.value = 1
+        return passed
+
+
+def _shedder(policy, schema, key_attr_name, timestamp_attr_name):
+    """
+    Returns the filter callable shedding the messages of `schema` according to `policy`.
+    """
+    if not isinstance(policy, dict):
+        raise TypeError(policy)
+    attributes = _schema_attributes(schema)
+    if attributes is None or attributes.get(key_attr_name) not in ('rstring', 'ustring'):
+        key_attr_name = None
+    if 'lag' in policy:
+        if attributes is None or timestamp_attr_name not in attributes:
+            raise ValueError('Shedding by lag requires the message timestamp attribute ' + timestamp_attr_name)
+        _check_attribute(attributes, timestamp_attr_name, ['int64'])
+    else:
+        timestamp_attr_name = None
+    if key_attr_name is not None:
+        key_attr_name = _attribute_key(schema, key_attr_name)
+    if timestamp_attr_name is not None:
+        timestamp_attr_name = _attribute_key(schema, timestamp_attr_name)
+    return _Shedder(policy.get('sample'), policy.get('max_rate'), policy.get('lag'), key_attr_name, timestamp_attr_name)
+
+
+def _latency_metrics(schema, timestamp_attr_name, partition_attr_name, offset_attr_name):
+    """
+    Returns the filter callable keeping the latency metrics for the messages of `schema`.
+    """
+    attributes = _schema_attributes(schema)
+    if attributes is None:
+        raise ValueError('latency_metrics requires the message timestamp, partition, and offset attributes')
+    _check_attribute(attributes, timestamp_attr_name, ['int64'])
+    _check_attribute(attributes, partition_attr_name, ['int32'])
+    _check_attribute(attributes, offset_attr_name, ['int64'])
+    return _LatencyMetrics(_attribute_key(schema, timestamp_attr_name), _attribute_key(schema, partition_attr_name), _attribute_key(schema, offset_attr_name))
+
 
+# upper bounds of the latency buckets in milliseconds
+_LATENCY_BOUNDS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, 60000)
+
+
+class _PartitionLatency(object):
+    """
+    Latency histogram, offset, and message count of a partition, and their metrics.
+    """
+    __slots__ = ('counts', 'offset', 'records', 'metrics', 'offset_metric', 'rate_metric')
+
+    def __init__(self):
+        self.counts = [0] * (len(_LATENCY_BOUNDS) + 1)
+        self.offset = -1
+        self.records = 0
+        self.metrics = None
+        self.offset_metric = None
+        self.rate_metric = None
+
+
+class _LatencyMetrics(object):
+    """
+    Filter callable passing all messages, which keeps a latency histogram,
+    the offset, and the message rate per partition. The counts are
+    copied to custom metrics at most once per second.
+    """
+    def __init__(self, timestamp_key, partition_key, offset_key):
+        self.timestamp_key = timestamp_key
+        self.partition_key = partition_key
+        self.offset_key = offset_key
+        self._partitions = dict()
+        self._last = None
+        self._active = False
+
+    def __enter__(self):
+        self._active = streamsx.ec.is_active()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_partitions'] = dict()
+        return state
+
+    def _create_metrics(self, partition, stats):
+        prefix = str(partition) + '.'
+        stats.metrics = [streamsx.ec.CustomMetric(self, prefix + 'latency.le' + str(bound) + 'ms', 'Number of messages received at most ' + str(bound) + ' ms after their timestamp', streamsx.ec.MetricKind.Counter) for bound in _LATENCY_BOUNDS]
+        stats.metrics.append(streamsx.ec.CustomMetric(self, prefix + 'latency.gt' + str(_LATENCY_BOUNDS[-1]) + 'ms', 'Number of messages received more than ' + str(_LATENCY_BOUNDS[-1]) + ' ms after their timestamp', streamsx.ec.MetricKind.Counter))
+        stats.offset_metric = streamsx.ec.CustomMetric(self, prefix + 'offset', 'Offset of the last received message', streamsx.ec.MetricKind.Gauge)
+        stats.rate_metric = streamsx.ec.CustomMetric(self, prefix + 'recordsPerSecond', 'Number of received messages per second', streamsx.ec.MetricKind.Gauge)
+
+    def _update_metrics(self, elapsed):
+        for partition, stats in self._partitions.items():
+            if stats.metrics is None:
+                self._create_metrics(partition, stats)
+            # cumulative counts for the upper bounds, the last bucket on its own
+            total = 0
+            for count, metric in zip(stats.counts, stats.metrics[:-1]):
+                total += count
+                metric.value = total
+            stats.metrics[-1].value = stats.counts[-1]
+            stats.offset_metric.value = stats.offset
+            stats.rate_metric.value = int(stats.records / elapsed)
+            stats.records = 0
+
+    def __call__(self, tuple):
+        now = time.time()
+        partition = tuple[self.partition_key]
+        stats = self._partitions.get(partition)
+        if stats is None:
+            stats = _PartitionLatency()
+            self._partitions[partition] = stats
+        stats.counts[bisect.bisect_left(_LATENCY_BOUNDS, now * 1000.0 - tuple[self.timestamp_key])] += 1
+        stats.offset = tuple[self.offset_key]
+        stats.records += 1
+        if self._last is None:
+            self._last = now
+        elif now - self._last >= 1.0:
+            if self._active:
+                self._update_metrics(now - self._last)
+            self._last = now
+        return True
+
+
+class _Shedder(object):
+    """
+    Filter callable shedding messages by per-key sampling and a rate cap,
+    optionally only while the message lag is above a threshold.
+    """
+    def __init__(self, sample, max_rate, lag, key_attr_name, timestamp_attr_name):
+        self.sample = sample
+        self.max_rate = max_rate
+        self.lag = lag
+        self.key_attr_name = key_attr_name
+        self.timestamp_attr_name = timestamp_attr_name
+        self._rate = max_rate
+        self._tokens = max_rate
+        self._last = None
+        self._count = 0
+        self._active = False
+        self._shed_metric = None
+        self._active_metric = None
+
+    def __enter__(self):
+        if streamsx.ec.is_active():
+            if self.max_rate is not None:
+                self._rate = self.max_rate / max(1, streamsx.ec.max_channels(self))
+                self._tokens = self._rate
+            self._shed_metric = streamsx.ec.CustomMetric(self, 'nTuplesShed', 'Number of shed messages', streamsx.ec.MetricKind.Counter)
+            self._active_metric = streamsx.ec.CustomMetric(self, 'sheddingActive', '1 while shedding is active', streamsx.ec.MetricKind.Gauge)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_shed_metric'] = None
+        state['_active_metric'] = None
+        return state
+
+    def _set_active(self, active):
+        if active != self._active:
+            self._active = active
+            if self._active_metric is not None:
+                self._active_metric.value = 1 if active else 0
+
+    def _sampled(self, tuple):
+        if self.key_attr_name is not None:
+            key = tuple[self.key_attr_name]
+            if key:
+                return (murmur2(key) & 0x7FFFFFFF) % 10000 < self.sample * 10000
+        # messages without key: pass floor(n * sample) of n messages
+        self._count += 1
+        return int(self._count * self.sample) > int((self._count - 1) * self.sample)
+
+    def _within_rate(self, now):
+        if self._last is not None:
+            self._tokens = min(self._rate, self._tokens + (now - self._last) * self._rate)
+        self._last = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    def __call__(self, tuple):
+        now = time.time()
+        if self.lag is not None:
+            self._set_active(now * 1000.0 - tuple[self.timestamp_attr_name] > self.lag * 1000.0)
+            if not self._active:
+                return True
+        else:
+            self._set_active(True)
+        passed = True
+        if self.sample is not None:
+            passed = self._sampled(tuple)
+        if passed and self.max_rate is not None:
+            passed = self._within_rate(now)
+        if not passed and self._shed_metric is not None:
+            self._shed_metric += 1
+        return passed
+
+
+def _envelope_schema(schema):
+    """
+    Returns the schema of the consumer receiving the envelopes for messages with `schema`.
+    """
+    if schema is Schema.StringMessageMeta or schema is Schema.BinaryMessageMeta:
+        return Schema.BinaryMessageMeta
+    if schema is Schema.StringMessage or schema is Schema.BinaryMessage or schema is CommonSchema.String or schema is CommonSchema.Json:
+        return Schema.BinaryMessage
+    raise TypeError(schema)
+
+
+def _unpack(stream, schema, named_tuples, name):
+    """
+    Expands the envelopes on `stream` into a stream with `schema`.
+    """
+    if schema is CommonSchema.String:
+        mode = 'string'
+    elif schema is CommonSchema.Json:
+        mode = 'json'
+    elif schema is Schema.StringMessage or schema is Schema.StringMessageMeta:
+        mode = 'string_message'
+    else:
+        mode = 'binary_message'
+    meta = schema is Schema.StringMessageMeta or schema is Schema.BinaryMessageMeta
+    if named_tuples and _schema_attributes(schema) is not None:
+        schema = schema.as_tuple(named=_NAMED_TUPLES.get(schema, True))
+    messages = stream.flat_map(_Unpacker(mode, meta), name=name + '_unpack')
+    return messages.map(schema=schema, name=name + '_messages')
+
+
+# names of the named tuples passed to callables for the predefined schemas
+_NAMED_TUPLES = {
+    Schema.StringMessage: 'StringMessageTuple',
+    Schema.BinaryMessage: 'BinaryMessageTuple',
+    Schema.StringMessageMeta: 'StringMessageMetaTuple',
+    Schema.BinaryMessageMeta: 'BinaryMessageMetaTuple'
+}
+
+
+def _batch_schema(schema, batch_size, batch_timeout):
+    """
+    Returns the schema of the batches of messages received with `schema`,
+    or ``None`` when the messages are not batched.
+    """
+    if batch_size is None and batch_timeout is None:
+        return None
+    if batch_size is not None:
+        if batch_timeout is not None:
+            raise ValueError('batch_size and batch_timeout cannot be used together')
+        _check_int_property('batch_size', batch_size, 1)
+    elif isinstance(batch_timeout, datetime.timedelta):
+        if batch_timeout.total_seconds() <= 0:
+            raise ValueError('batch_timeout must be positive')
+    elif isinstance(batch_timeout, bool) or not isinstance(batch_timeout, (int, float)):
+        raise TypeError(batch_timeout)
+    elif batch_timeout <= 0:
+        raise ValueError('batch_timeout must be positive')
+    if schema is Schema.StringMessage:
+        return Schema.StringMessageBatch
+    if schema is Schema.BinaryMessage:
+        return Schema.BinaryMessageBatch
+    if schema is Schema.StringMessageMeta:
+        return Schema.StringMessageMetaBatch
+    if schema is Schema.BinaryMessageMeta:
+        return Schema.BinaryMessageMetaBatch
+    attributes = _schema_attributes(schema)
+    if attributes is None:
+        raise TypeError('Batches require a structured schema, ' + str(schema) + ' given')
+    for attr_name, attr_type in attributes.items():
+        if not isinstance(attr_type, str):
+            raise TypeError('Batches require attributes of primitive types, attribute ' + attr_name + ' has a composite type')
+    return StreamSchema('tuple<' + ','.join('list<' + attr_type + '> ' + attr_name for attr_type, attr_name in schema._types) + '>')
+
+
+def _batch(stream, batch_schema, batch_size, batch_timeout, name):
+    """
+    Collects the tuples of `stream` into batches using a tumbling window.
+    """
+    if batch_size is not None:
+        window = stream.batch(batch_size)
+    elif isinstance(batch_timeout, datetime.timedelta):
+        window = stream.batch(batch_timeout)
+    else:
+        window = stream.batch(datetime.timedelta(seconds=batch_timeout))
+    _op = streamsx.spl.op.Map('spl.relational::Aggregate', window, schema=batch_schema, name=name + '_batch')
+    for attr_type, attr_name in stream.oport.schema._types:
+        setattr(_op, attr_name, _op.output('Collect(' + attr_name + ')'))
     return _op.stream
 
 
-def publish(stream, topic, credentials=None, name=None):
+def publish(stream, topic, credentials=None, name=None, properties=None, topic_attribute=None, partition_attribute=None, parallel=None, partition_count=None, pack=None, pack_bytes=None, pack_timeout=None, queue_size=None, overflow=None, max_bytes_per_sec=None, max_msgs_per_sec=None, emulator=None):
     """Publish Event Streams messages to a topic.
 
     Adds an Event Streams producer where each tuple on `stream` is
     published as a message into IBM Event Streams cloud service.
 
+    A single producer can publish to many topics when the topic is taken
+    from the attribute `topic_attribute` of each tuple. All messages share
+    the connections and buffers of one Kafka producer, so that batching works
+    across all destinations. In this case, the stream must have a structured schema with
+    the attribute ``message``, and optionally ``key``, for example
+    :py:const:`~schema.Schema.StringMessageMeta` or :py:const:`~schema.Schema.BinaryMessageMeta`.
+
+    Example for routing the messages to the topic contained in the tuples::
+
+        to_publish = readings.map(lambda r: {'message': json.dumps(r), 'key': r['id'], 'topic': 'sensors.' + r['type']},
+            schema=Schema.StringMessageMeta)
+        eventstreams.publish(to_publish, topic=None, topic_attribute='topic')
+
+    With `parallel`, the stream is published by multiple producers in a parallel region.
+    For keyed messages, the tuples are routed to the channels with the same key hash
+    the Kafka default partitioner uses. All messages with the same key are published by the same
+    producer, which keeps the order of the messages per key, and channel ``c`` publishes the messages
+    for the partitions ``c, c + parallel, c + 2 * parallel, ...`` of the topic. Streams without a key
+    are distributed round-robin across the channels.
+
+    Example for six producers for a topic with six partitions::
+
+        eventstreams.publish(keyed_stream, 'SIX_PARTITIONS_TOPIC', partition_count=6)
+
+    A stream with schema ``CommonSchema.Python`` is published as binary messages. Each tuple must be
+    an object supporting the buffer protocol, like ``bytes``, ``bytearray``, ``memoryview``, or a NumPy array,
+    or a dict with such an object as ``message`` and a string as ``key``. The data of the objects are
+    passed to the producer without an intermediate ``bytes`` object.
+
+    With `pack` or `pack_bytes`, consecutive tuples with the same key are packed into one
+    envelope message, which reduces the number of Kafka records for small messages. An envelope
+    is published when it contains `pack` tuples or `pack_bytes` bytes, or when its first tuple is older than
+    `pack_timeout`. The envelopes are checked for the timeout when tuples arrive and by a timer every half
+    `pack_timeout`, so that the last envelope is published when no more tuples arrive. Envelopes that are not
+    yet published when the job is canceled are lost, like the messages in the buffers of the producer.
+    The envelopes are binary messages with the key of the packed tuples, and are expanded into the original
+    messages by :py:func:`subscribe` with `unpack`. The order of the messages with the same key is retained.
+
+    An envelope starts with a header of the bytes ``00 45 56 01`` and the number of packed messages, and
+    contains the messages with their lengths. :py:func:`subscribe` with `unpack` passes messages, whose content
+    does not have this structure, unchanged. Binary messages published without packing to topics consumed with `unpack`
+    must therefore not have the structure of an envelope.
+
+    Example for packing up to 100 messages with the same key into one Kafka record::
+
+        eventstreams.publish(readings, 'SENSORS', pack=100)
+        received = eventstreams.subscribe(topology, 'SENSORS', Schema.StringMessage, unpack=True)
+
+    With `queue_size`, the tuples are put into a bounded queue in front of the producer, which publishes them
+    on its own thread. A slow broker or a metadata refresh of the producer then does not block the upstream operators
+    that run in the same process, unless the queue is full. `overflow` defines what happens with a full queue:
+
+    * ``'block'`` - the upstream operator waits until the queue has space. No tuples are lost. This is the default.
+    * ``'drop_oldest'`` - the oldest tuple in the queue is dropped.
+    * ``'drop_newest'`` - the arriving tuple is dropped.
+
+    The depth of the queue and the number of dropped tuples are reported by the input port metrics
+    ``queueSize``, ``nTuplesQueued``, and ``nTuplesDropped`` of the producer.
+
+    Example for publishing through a queue of 10000 tuples, dropping the oldest tuples when it is full::
+
+        eventstreams.publish(readings, 'SENSORS', queue_size=10000, overflow='drop_oldest')
+
+    With `max_bytes_per_sec` or `max_msgs_per_sec`, the messages are published at a limited rate, so that bursts do
+    not exceed the throughput quota of the Event Streams service. The rate is smoothed with a token bucket, which allows
+    bursts of up to one second of the rate. With `parallel`, the channels do not coordinate, each channel is limited
+    to an equal share of the rate. Keys are routed to the channels by their partition, so that with an uneven
+    distribution of the keys a busy channel is held back at its share while the shares of the other channels are unused,
+    and the total rate stays below the limit. The size of a message is its length in bytes, the UTF-8 encoding for strings. With `pack` or `pack_bytes`, the rate applies to the envelopes.
+    The time in milliseconds the messages were held back is reported by the custom metric ``throttleTime``.
+    The rate is limited by a Python filter in front of the producer, which sleeps on the thread of the upstream
+    operator. Throttling therefore applies backpressure to the upstream operators, also with `queue_size`, as the
+    limiter is in front of the queue: the queue does not absorb the held back messages, and `overflow` does not drop them.
+
+    Example for publishing at most 1 MB per second with four producers::
+
+        eventstreams.publish(readings, 'SENSORS', parallel=4, max_bytes_per_sec=1024 * 1024)
+
+    With `emulator`, the messages are published by a Python operator to a :py:class:`~streamsx.eventstreams.emulator.Broker`
+    running in the same process instead of Event Streams. A queue cannot be used with the emulator.
+
+    Example for publishing to an emulated broker::
+
+        eventstreams.publish(readings, 'SENSORS', emulator=emulator.Broker('local', partitions=3))
+
     Args:
         stream(Stream): Stream of tuples to published as messages.
-        topic(str): Topic to publish messages to.
+        topic(str): Topic to publish messages to. Must be ``None`` when `topic_attribute` is used.
         credentials(dict|str): Credentials in JSON or name of the application configuration containing the credentials for the Event Streams service. When set to ``None`` the application configuration ``eventstreams`` is used.
         name(str): Producer name in the Streams context, defaults to a generated name.
+        properties(dict): Kafka producer properties, for example created with :py:func:`producer_properties`. The properties are written to a properties file that is bundled with the topology.
+        topic_attribute(str): Name of the ``rstring`` attribute of the stream that contains the topic of each message.
+        partition_attribute(str): Name of the ``int32`` attribute of the stream that contains the partition number of each message. When not specified, the partition is determined by the Kafka partitioner.
+        parallel(int): Number of producers publishing the stream in parallel channels. Defaults to `partition_count` when `partition_count` is specified.
+        partition_count(int): Number of partitions of the topic. Must be a multiple of `parallel`. Defaults to `parallel`.
+        pack(int): Maximum number of tuples packed into one message.
+        pack_bytes(int): Maximum size in bytes of the packed tuples of one message.
+        pack_timeout(float): Time in seconds after which a partially filled envelope is published, defaults to one second.
+        queue_size(int): Capacity of the queue in front of the producer in tuples. When not specified, the producer is called on the thread of the upstream operator.
+        overflow(str): Policy for a full queue, ``'block'``, ``'drop_oldest'``, or ``'drop_newest'``. Defaults to ``'block'``.
+        max_bytes_per_sec(int): Maximum number of message bytes published per second. Throttling blocks the upstream operators, bypassing `queue_size` and `overflow`.
+        max_msgs_per_sec(int): Maximum number of messages published per second. Throttling blocks the upstream operators, bypassing `queue_size` and `overflow`.
+        emulator(Broker): In-process broker of :py:mod:`~streamsx.eventstreams.emulator` to publish the messages to instead of Event Streams. `credentials` and `properties` are ignored.
 
     Returns:
         streamsx.topology.topology.Sink: Stream termination.
+
+    .. versionchanged:: 2.1 `properties`, `topic_attribute`, `partition_attribute`, `parallel`, `partition_count`, `pack`, `pack_bytes`, `pack_timeout`, `queue_size`, `overflow`, `max_bytes_per_sec`, `max_msgs_per_sec`, and `emulator` parameters added. Support for ``CommonSchema.Python``.
     """
-    if topic is None:
+    if topic_attribute is not None:
+        if topic is not None:
+            raise ValueError('topic and topic_attribute cannot be used together')
+    elif topic is None:
         raise TypeError(topic)
     msg_attr_name = None
     streamSchema = stream.oport.schema
-    if streamSchema == CommonSchema.Json:
+    if (pack is not None or pack_bytes is not None) and (topic_attribute is not None or partition_attribute is not None):
+        raise ValueError('pack and pack_bytes cannot be used with topic_attribute or partition_attribute')
+    packer = _packer(streamSchema, pack, pack_bytes, pack_timeout)
+    queue = _queue(queue_size, overflow)
+    if packer is not None:
+        stream = _pack(stream, packer, name)
+    elif topic_attribute is not None or partition_attribute is not None:
+        attributes = _schema_attributes(streamSchema)
+        if attributes is None:
+            raise TypeError(streamSchema)
+        _check_attribute(attributes, 'message', ['rstring', 'blob'])
+        if topic_attribute is not None:
+            _check_attribute(attributes, topic_attribute, ['rstring'])
+        if partition_attribute is not None:
+            _check_attribute(attributes, partition_attribute, ['int32'])
+    elif streamSchema == CommonSchema.Json:
         msg_attr_name = 'jsonString'
     elif streamSchema == CommonSchema.String:
         msg_attr_name = 'string'
@@ -227,6 +1505,8 @@ def publish(stream, topic, credentials=None, name=None):
     elif streamSchema is Schema.StringMessage:
         # msg_attr_name = 'message'
         pass
+    elif streamSchema == CommonSchema.Python:
+        stream = stream.map(_BlobMessage(), schema=Schema.BinaryMessage)
     else:
         raise TypeError(streamSchema)
 
@@ -236,7 +1516,28 @@ def publish(stream, topic, credentials=None, name=None):
     else:
         appConfigName = credentials
 
-    _op = _MessageHubProducer(stream, appConfigName=appConfigName, topic=topic, name=name)
+    propertiesFile = None
+    if properties is not None:
+        if not isinstance(properties, dict):
+            raise TypeError(properties)
+        if emulator is None:
+            propertiesFile = _add_properties_file(stream.topology, properties, 'eventstreams-producer')
+
+    limiter = _rate_limiter(stream.oport.schema, max_bytes_per_sec, max_msgs_per_sec)
+    if emulator is not None:
+        if not isinstance(emulator, Broker):
+            raise TypeError(emulator)
+        if queue is not None:
+            raise ValueError('queue_size cannot be used with emulator')
+
+    if parallel is not None or partition_count is not None:
+        stream = _parallel_by_key(stream, parallel, partition_count)
+    if limiter is not None:
+        stream = stream.filter(limiter, name=None if name is None else name + '_rate_limit')
+    if emulator is not None:
+        return stream.for_each(_emulated_producer(emulator, stream.oport.schema, topic, topic_attribute, partition_attribute), name=name)
+
+    _op = _MessageHubProducer(stream, appConfigName=appConfigName, propertiesFile=propertiesFile, topic=topic, name=name)
     if (appConfigName is None) and (credentials is not None):
         _op.params['credentials'] = json.dumps(credentials)
         # credentials parameter requires 1.7.0
@@ -245,23 +1546,634 @@ def publish(stream, topic, credentials=None, name=None):
         # when using an app config make sure that the app config 
         # created with configure_connection(...) is understood by the toolkit
         # (versions 2.0.0 and 2.0.1 have critical bugs -- request 2.0.2)
-        _add_toolkit_dependency(topology, '2.0.2')
+        _add_toolkit_dependency(stream.topology, '2.0.2')
 
     # create the input attribute expressions after operator _op initialization
     if msg_attr_name is not None:
         _op.params['messageAttribute'] = _op.attribute(stream, msg_attr_name)
 #    if keyAttributeName is not None:
 #        params['keyAttribute'] = _op.attribute(stream, keyAttributeName)
-#    if partitionAttributeName is not None:
-#        params['partitionAttribute'] = _op.attribute(stream, partitionAttributeName)
+    if partition_attribute is not None:
+        _op.params['partitionAttribute'] = _op.attribute(stream, partition_attribute)
 #    if timestampAttributeName is not None:
 #        params['timestampAttribute'] = _op.attribute(stream, timestampAttributeName)
-#    if topicAttributeName is not None:
-#        params['topicAttribute'] = _op.attribute(stream, topicAttributeName)
+    if topic_attribute is not None:
+        _op.params['topicAttribute'] = _op.attribute(stream, topic_attribute)
+    if queue is not None:
+        iport = _op._op().inputPorts[0]
+        iport._alias = 'Messages'
+        queue['inputPortName'] = iport._alias
+        _op._op().config['queue'] = queue
 
     return streamsx.topology.topology.Sink(_op)
 
 
+def _rate_limiter(schema, max_bytes_per_sec, max_msgs_per_sec):
+    """
+    Returns the filter callable limiting the rate of the messages of `schema`, or ``None``.
+    """
+    if max_bytes_per_sec is None and max_msgs_per_sec is None:
+        return None
+    if max_bytes_per_sec is not None:
+        _check_positive_number('max_bytes_per_sec', max_bytes_per_sec)
+    if max_msgs_per_sec is not None:
+        _check_positive_number('max_msgs_per_sec', max_msgs_per_sec)
+    msg_attr_name = None if is_common(schema) else _attribute_key(schema, 'message')
+    return _RateLimiter(max_bytes_per_sec, max_msgs_per_sec, msg_attr_name)
+
+
+def _message_size(message):
+    if isinstance(message, str):
+        return len(message.encode('utf-8'))
+    if isinstance(message, dict):
+        return len(json.dumps(message))
+    return memoryview(message).nbytes
+
+
+class _TokenBucket(object):
+    """
+    Token bucket holding up to one second of tokens. Tokens taken
+    beyond the content of the bucket are a debt that is waited for.
+    """
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = rate
+        self.last = None
+
+    def take(self, count, now):
+        """
+        Takes `count` tokens, returns the time in seconds to wait before using them.
+        """
+        if self.last is not None:
+            self.tokens = min(self.rate, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+        self.tokens -= count
+        return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+
+class _RateLimiter(object):
+    """
+    Filter callable holding back messages to limit the number of
+    bytes and messages per second. In a parallel region, each channel
+    is limited to an equal share of the rates.
+    """
+    def __init__(self, max_bytes_per_sec, max_msgs_per_sec, msg_attr_name):
+        self.max_bytes_per_sec = max_bytes_per_sec
+        self.max_msgs_per_sec = max_msgs_per_sec
+        self.msg_attr_name = msg_attr_name
+        self._buckets(1)
+        self._throttle_metric = None
+
+    def _buckets(self, channels):
+        self._bytes = None if self.max_bytes_per_sec is None else _TokenBucket(self.max_bytes_per_sec / channels)
+        self._msgs = None if self.max_msgs_per_sec is None else _TokenBucket(self.max_msgs_per_sec / channels)
+
+    def __enter__(self):
+        if streamsx.ec.is_active():
+            self._buckets(max(1, streamsx.ec.max_channels(self)))
+            self._throttle_metric = streamsx.ec.CustomMetric(self, 'throttleTime', 'Time in milliseconds messages were held back by the rate limit', streamsx.ec.MetricKind.Counter)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_throttle_metric'] = None
+        return state
+
+    def __call__(self, tuple):
+        now = time.time()
+        wait = 0.0
+        if self._msgs is not None:
+            wait = self._msgs.take(1, now)
+        if self._bytes is not None:
+            message = tuple if self.msg_attr_name is None else tuple[self.msg_attr_name]
+            wait = max(wait, self._bytes.take(_message_size(message), now))
+        if wait > 0.0:
+            time.sleep(wait)
+            if self._throttle_metric is not None:
+                self._throttle_metric += int(wait * 1000.0)
+        return True
+
+
+_OVERFLOW_POLICIES = {'block': 'Sys.Wait', 'drop_oldest': 'Sys.DropFirst', 'drop_newest': 'Sys.DropLast'}
+
+
+def _queue(queue_size, overflow):
+    """
+    Returns the configuration of the threaded input port of the producer, or ``None``.
+    """
+    if queue_size is None:
+        if overflow is not None:
+            raise ValueError('overflow requires queue_size')
+        return None
+    _check_int_property('queue_size', queue_size, 1)
+    if overflow is None:
+        overflow = 'block'
+    if overflow not in _OVERFLOW_POLICIES:
+        raise ValueError('overflow must be one of ' + ', '.join(sorted(_OVERFLOW_POLICIES)) + ': ' + str(overflow))
+    return {'congestionPolicy': _OVERFLOW_POLICIES[overflow], 'queueSize': str(queue_size)}
+
+
+# Envelopes of packed messages:
+# magic bytes with the format version and the number of messages (4 bytes, big endian),
+# followed by the messages, each prefixed with its length (4 bytes, big endian)
+_ENVELOPE_MAGIC = b'\x00EV\x01'
+_ENVELOPE_HEADER = struct.Struct('>4sI')
+_ENVELOPE_LENGTH = struct.Struct('>I')
+
+
+def _packer(schema, pack, pack_bytes, pack_timeout):
+    """
+    Returns the callable packing the tuples of a stream with `schema`
+    into envelopes, or ``None`` when tuples are not packed.
+    """
+    if pack is None and pack_bytes is None:
+        if pack_timeout is not None:
+            raise ValueError('pack_timeout requires pack or pack_bytes')
+        return None
+    if pack is not None:
+        _check_int_property('pack', pack, 1)
+    if pack_bytes is not None:
+        _check_int_property('pack_bytes', pack_bytes, 1)
+    if pack_timeout is None:
+        pack_timeout = 1.0
+    elif isinstance(pack_timeout, bool) or not isinstance(pack_timeout, (int, float)):
+        raise TypeError(pack_timeout)
+    elif pack_timeout < 0:
+        raise ValueError('pack_timeout must not be negative')
+    if schema == CommonSchema.String:
+        mode = 'string'
+    elif schema == CommonSchema.Json:
+        mode = 'json'
+    elif schema == CommonSchema.Python:
+        mode = 'object'
+    elif schema is Schema.StringMessage or schema is Schema.BinaryMessage:
+        mode = 'message'
+    else:
+        raise TypeError(schema)
+    return _Packer(mode, pack, pack_bytes, pack_timeout)
+
+
+def _pack(stream, packer, name):
+    """
+    Packs the tuples of `stream` into envelopes with `packer`. A source of ticks is merged
+    into the stream, so that timed out envelopes are published when no tuples arrive.
+    """
+    if stream.oport.schema != CommonSchema.Python:
+        stream = stream.map(schema=CommonSchema.Python, name=None if name is None else name + '_pack_values')
+    if packer.timeout > 0:
+        ticks = stream.topology.source(_PackTicks(packer.timeout / 2.0), name=None if name is None else name + '_pack_ticks')
+        stream = stream.union({ticks})
+    envelopes = stream.flat_map(packer, name=None if name is None else name + '_pack')
+    return envelopes.map(schema=Schema.BinaryMessage, name=None if name is None else name + '_envelopes')
+
+
+class _PackTick(object):
+    """
+    Value submitted by :py:class:`_PackTicks` to trigger the timeout of the envelopes.
+    """
+    __slots__ = []
+
+
+class _PackTicks(object):
+    """
+    Source callable submitting a :py:class:`_PackTick` every `interval` seconds.
+    """
+    def __init__(self, interval):
+        self.interval = interval
+
+    def __call__(self):
+        while True:
+            time.sleep(self.interval)
+            yield _PackTick()
+
+
+class _Envelope(object):
+    __slots__ = ['created', 'count', 'size', 'messages']
+
+    def __init__(self, created):
+        self.created = created
+        self.count = 0
+        self.size = _ENVELOPE_HEADER.size
+        self.messages = []
+
+    def add(self, data):
+        self.messages.append(_ENVELOPE_LENGTH.pack(len(data)))
+        self.messages.append(data)
+        self.count += 1
+        self.size += _ENVELOPE_LENGTH.size + len(data)
+
+
+class _Packer(object):
+    """
+    Callable packing consecutive tuples with the same key into envelopes for ``flat_map``,
+    returning a tuple of :py:const:`~schema.Schema.BinaryMessage` for each complete envelope.
+    Each tuple and each :py:class:`_PackTick` completes the envelopes that timed out.
+    """
+    def __init__(self, mode, count, size, timeout):
+        self.mode = mode
+        self.count = count
+        self.size = size
+        self.timeout = timeout
+        self._envelopes = collections.OrderedDict()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_envelopes'] = collections.OrderedDict()
+        return state
+
+    def _entry(self, value):
+        if self.mode == 'string':
+            return None, value.encode('utf-8')
+        if self.mode == 'json':
+            return None, json.dumps(value).encode('utf-8')
+        if self.mode == 'object' and not isinstance(value, dict):
+            return None, memoryview(value).tobytes()
+        message = value['message']
+        if isinstance(message, str):
+            message = message.encode('utf-8')
+        else:
+            # blobs are released after the call
+            message = memoryview(message).tobytes()
+        return value.get('key'), message
+
+    def _complete(self, key):
+        envelope = self._envelopes.pop(key)
+        result = {'message': _ENVELOPE_HEADER.pack(_ENVELOPE_MAGIC, envelope.count) + b''.join(envelope.messages)}
+        if key is not None:
+            result['key'] = key
+        return result
+
+    def _full(self, envelope):
+        return (self.count is not None and envelope.count >= self.count) or (self.size is not None and envelope.size >= self.size)
+
+    def _timed_out(self, now, results):
+        # the envelopes are ordered by their creation time
+        while self._envelopes:
+            oldest = next(iter(self._envelopes))
+            if now - self._envelopes[oldest].created < self.timeout:
+                break
+            results.append(self._complete(oldest))
+        return results
+
+    def __call__(self, value):
+        now = time.time()
+        results = []
+        if isinstance(value, _PackTick):
+            return self._timed_out(now, results)
+        key, data = self._entry(value)
+        envelope = self._envelopes.get(key)
+        if envelope is not None and self.size is not None and envelope.size + _ENVELOPE_LENGTH.size + len(data) > self.size:
+            results.append(self._complete(key))
+            envelope = None
+        if envelope is None:
+            envelope = _Envelope(now)
+            self._envelopes[key] = envelope
+        envelope.add(data)
+        if self._full(envelope):
+            results.append(self._complete(key))
+        return self._timed_out(now, results)
+
+
+def _unpack_envelope(message):
+    """
+    Returns memoryviews of the messages in an envelope. Messages that are
+    not envelopes are returned as the single message. A message is only taken as
+    envelope when the header, the number of messages, and the lengths of the messages
+    match its size exactly.
+    """
+    view = memoryview(message)
+    end = len(view)
+    if end < _ENVELOPE_HEADER.size or view[:len(_ENVELOPE_MAGIC)] != _ENVELOPE_MAGIC:
+        return [view]
+    magic, count = _ENVELOPE_HEADER.unpack_from(view)
+    messages = []
+    position = _ENVELOPE_HEADER.size
+    while position < end and len(messages) < count:
+        if position + _ENVELOPE_LENGTH.size > end:
+            return [view]
+        length, = _ENVELOPE_LENGTH.unpack_from(view, position)
+        position += _ENVELOPE_LENGTH.size
+        if position + length > end:
+            return [view]
+        messages.append(view[position:position + length])
+        position += length
+    if position != end or len(messages) != count:
+        return [view]
+    return messages
+
+
+class _Unpacker(object):
+    """
+    Callable expanding an envelope into the packed messages for ``flat_map``.
+    The key and the meta data of the envelope are set for each message.
+    """
+    def __init__(self, mode, meta):
+        self.mode = mode
+        self.meta = meta
+
+    def __call__(self, tuple):
+        # the blob is released after the call, so that the messages are copied into a list
+        if self.mode == 'string':
+            return [str(m, 'utf-8') for m in _unpack_envelope(tuple['message'])]
+        if self.mode == 'json':
+            return [json.loads(str(m, 'utf-8')) for m in _unpack_envelope(tuple['message'])]
+        messages = []
+        for m in _unpack_envelope(tuple['message']):
+            message = {'message': str(m, 'utf-8') if self.mode == 'string_message' else m.tobytes(), 'key': tuple['key']}
+            if self.meta:
+                message['topic'] = tuple['topic']
+                message['partition'] = tuple['partition']
+                message['offset'] = tuple['offset']
+                message['messageTimestamp'] = tuple['messageTimestamp']
+            messages.append(message)
+        return messages
+
+
+def _as_blob(value):
+    """
+    Returns a contiguous memoryview over an object supporting the buffer protocol.
+    The runtime copies the data of a memoryview into the blob attribute of the tuple.
+    """
+    view = memoryview(value)
+    if not view.c_contiguous:
+        view = memoryview(view.tobytes())
+    return view
+
+
+class _BlobMessage(object):
+    """
+    Callable converting objects supporting the buffer protocol
+    into tuples of :py:const:`~schema.Schema.BinaryMessage`.
+    """
+    def __call__(self, value):
+        if isinstance(value, dict):
+            message = {'message': _as_blob(value['message'])}
+            if value.get('key') is not None:
+                message['key'] = value['key']
+            return message
+        return {'message': _as_blob(value)}
+
+
+def _parallel_by_key(stream, parallel, partition_count):
+    """
+    Starts a parallel region for the producers. Keyed tuples are routed by
+    the partition the Kafka default partitioner chooses for the key.
+    """
+    if parallel is None:
+        parallel = partition_count
+    _check_int_property('parallel', parallel, 1)
+    if partition_count is None:
+        partition_count = parallel
+    _check_int_property('partition_count', partition_count, 1)
+    if partition_count % parallel != 0:
+        raise ValueError('partition_count ' + str(partition_count) + ' must be a multiple of parallel ' + str(parallel))
+    attributes = _schema_attributes(stream.oport.schema)
+    if attributes is None or attributes.get('key') != 'rstring':
+        return stream.parallel(parallel)
+    return stream.parallel(parallel, routing=Routing.HASH_PARTITIONED, func=_KeyPartition(partition_count, _attribute_key(stream.oport.schema, 'key')))
+
+
+def _emulated_consumer(topology, broker, schema, output_attributes, topic, pattern, group, partitions, partition_count, parallel, start_position, start_time, start_offsets, name):
+    """
+    Creates the stream of the messages consumed from an emulated broker by a Python source.
+    """
+    if schema is CommonSchema.String:
+        fields = 'string'
+    elif schema is CommonSchema.Json:
+        fields = 'json'
+    else:
+        attributes = _schema_attributes(schema)
+        fields = []
+        for part, (default_name, attr_types) in _OUTPUT_ATTRIBUTES.items():
+            attr_name = output_attributes.get(part, default_name)
+            if attr_name in attributes:
+                fields.append((part, attr_name, attributes[attr_name]))
+    source = _EmulatedConsumer(broker, [topic] if isinstance(topic, str) else topic, pattern, group, partitions, partition_count, parallel,
+        'earliest' if start_position == 'beginning' else 'latest',
+        None if start_time is None else _epoch_millis('start_time', start_time), start_offsets, fields)
+    stream = topology.source(source, name=name)
+    if parallel is not None:
+        stream = stream.set_parallel(parallel)
+    return stream.map(schema=schema, name=name + '_messages')
+
+
+class _EmulatedConsumer(object):
+    """
+    Source callable polling the messages of an emulated broker. With `partition_count`,
+    channel ``c`` consumes the partitions ``c, c + parallel, c + 2 * parallel, ...``.
+    """
+    def __init__(self, broker, topics, pattern, group, partitions, partition_count, parallel, start, start_time, start_offsets, fields):
+        self.broker = broker
+        self.topics = topics
+        self.pattern = pattern
+        self.group = group
+        self.partitions = partitions
+        self.partition_count = partition_count
+        self.parallel = parallel
+        self.start = start
+        self.start_time = start_time
+        self.start_offsets = start_offsets
+        self.fields = fields
+        self._consumer = None
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._consumer is not None:
+            self._consumer.close()
+            self._consumer = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_consumer'] = None
+        return state
+
+    def _open(self):
+        partitions = self.partitions
+        if partitions is None and self.partition_count is not None:
+            channel = 0
+            if self.parallel is not None and streamsx.ec.is_active():
+                channel = max(0, streamsx.ec.channel(self))
+            partitions = list(range(channel, self.partition_count, self.parallel or 1))
+        return self.broker.consumer(self.topics, self.group, self.pattern, partitions, self.start, self.start_time, self.start_offsets)
+
+    def _tuple(self, record):
+        if self.fields == 'string':
+            return record.value.decode('utf-8')
+        if self.fields == 'json':
+            return json.loads(record.value.decode('utf-8'))
+        tuple = dict()
+        for part, attr_name, attr_type in self.fields:
+            if part == 'message':
+                value = record.value
+                tuple[attr_name] = value.decode('utf-8') if attr_type != 'blob' else value
+            elif part == 'key':
+                key = record.key
+                if key is None:
+                    continue
+                if attr_type in ('rstring', 'ustring'):
+                    key = key.decode('utf-8') if isinstance(key, bytes) else str(key)
+                elif attr_type == 'blob' and isinstance(key, str):
+                    key = key.encode('utf-8')
+                tuple[attr_name] = key
+            else:
+                tuple[attr_name] = getattr(record, part)
+        return tuple
+
+    def __call__(self):
+        if self._consumer is None:
+            self._consumer = self._open()
+        while True:
+            records = self._consumer.poll(timeout=0.1)
+            if not records:
+                # lets the runtime check for shutdown
+                yield None
+            for record in records:
+                yield self._tuple(record)
+
+
+def _emulated_producer(broker, schema, topic, topic_attribute, partition_attribute):
+    """
+    Returns the callable publishing the tuples of `schema` to an emulated broker.
+    """
+    if schema == CommonSchema.String:
+        return _EmulatedProducer(broker, topic, 'string')
+    if schema == CommonSchema.Json:
+        return _EmulatedProducer(broker, topic, 'json')
+    attributes = _schema_attributes(schema)
+    return _EmulatedProducer(broker, topic, _attribute_key(schema, 'message'),
+        _attribute_key(schema, 'key') if 'key' in attributes else None,
+        None if topic_attribute is None else _attribute_key(schema, topic_attribute),
+        None if partition_attribute is None else _attribute_key(schema, partition_attribute))
+
+
+class _EmulatedProducer(object):
+    """
+    Sink callable publishing tuples as messages to an emulated broker.
+    """
+    def __init__(self, broker, topic, message_key, key_key=None, topic_key=None, partition_key=None):
+        self.broker = broker
+        self.topic = topic
+        self.message_key = message_key
+        self.key_key = key_key
+        self.topic_key = topic_key
+        self.partition_key = partition_key
+
+    def __call__(self, tuple):
+        if self.message_key == 'string':
+            self.broker.produce(self.topic, tuple)
+        elif self.message_key == 'json':
+            self.broker.produce(self.topic, json.dumps(tuple))
+        else:
+            self.broker.produce(tuple[self.topic_key] if self.topic_key is not None else self.topic,
+                tuple[self.message_key],
+                key=tuple[self.key_key] if self.key_key is not None else None,
+                partition=tuple[self.partition_key] if self.partition_key is not None else None)
+
+
+def decode_json(stream, schema, name=None):
+    """Decodes JSON messages into the attributes of a structured schema.
+
+    Each message of `stream` must be a JSON object. The values of the fields of the
+    object with the names of the attributes of `schema` are set to these attributes.
+    Attributes of `schema` that are not in the JSON object are taken from the input tuple,
+    so that the key and the message meta data can be retained. Attributes found in neither
+    get their default value. All other fields of the JSON object are ignored. Messages that
+    are not valid JSON, or JSON values other than objects, are skipped and counted by the
+    custom metric ``nInvalidMessages``.
+
+    The stage replaces a ``map`` function like::
+
+        def flat_message_json(tuple):
+            tuple.update(json.loads(tuple['message']))
+            return tuple
+
+    The `orjson <https://pypi.org/project/orjson/>`_ package is used to decode
+    the messages when it is installed, otherwise the ``json`` module.
+
+    Example, which flattens sensor readings received with message meta data::
+
+        received = eventstreams.subscribe(topology, 'SENSORS', Schema.StringMessageMeta)
+        flattened = eventstreams.decode_json(received,
+            Schema.StringMessageMeta.extend(StreamSchema('tuple<rstring sensor_id, float64 value, int64 ts>')))
+
+    Args:
+        stream(Stream): Stream with the structured schema :py:const:`~schema.Schema.StringMessage`, :py:const:`~schema.Schema.BinaryMessage`, :py:const:`~schema.Schema.StringMessageMeta`, :py:const:`~schema.Schema.BinaryMessageMeta`, or any other structured schema with an attribute ``message`` of type ``rstring`` or ``blob``.
+        schema(StreamSchema): Structured schema of the returned stream.
+        name(str): Name of the stage, defaults to a generated name.
+
+    Returns:
+        streamsx.topology.topology.Stream: Stream with the decoded messages.
+
+    .. versionadded:: 2.1
+    """
+    attributes = _schema_attributes(stream.oport.schema)
+    if attributes is None:
+        raise TypeError('Stream must have a structured schema with a message attribute')
+    _check_attribute(attributes, 'message', ['rstring', 'blob'])
+    target_attributes = _schema_attributes(schema)
+    if target_attributes is None:
+        raise TypeError(schema)
+    input_schema = stream.oport.schema
+    retained = dict((attr_name, _attribute_key(input_schema, attr_name)) for attr_name in target_attributes if attr_name in attributes)
+    return stream.map(_JsonDecoder(list(target_attributes), retained, _attribute_key(input_schema, 'message')), name=name, schema=schema)
+
+
+class _JsonDecoder(object):
+    """
+    Callable decoding the JSON message of a tuple into a dict with the given attribute names.
+    `retained` maps the names of the attributes taken from the input tuple to their keys.
+    Messages that are not JSON objects are skipped and counted.
+    """
+    def __init__(self, attribute_names, retained, message_key='message'):
+        self.attribute_names = attribute_names
+        self.retained = retained
+        self.message_key = message_key
+        self.invalid = 0
+        self._invalid_metric = None
+
+    def __enter__(self):
+        if streamsx.ec.is_active():
+            self._invalid_metric = streamsx.ec.CustomMetric(self, 'nInvalidMessages', 'Number of skipped messages that are not JSON objects', streamsx.ec.MetricKind.Counter)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_invalid_metric'] = None
+        return state
+
+    def _skip(self):
+        self.invalid += 1
+        if self._invalid_metric is not None:
+            self._invalid_metric.value = self.invalid
+        return None
+
+    def __call__(self, tuple):
+        message = tuple[self.message_key]
+        try:
+            if _json_backend is not None:
+                decoded = _json_backend.loads(message)
+            else:
+                if not isinstance(message, str):
+                    message = str(message, 'utf-8')
+                decoded = json.loads(message)
+        except ValueError:
+            # malformed JSON or UTF-8
+            return self._skip()
+        if not isinstance(decoded, dict):
+            return self._skip()
+        result = {attr_name: tuple[key] for attr_name, key in self.retained.items()}
+        for attr_name in self.attribute_names:
+            if attr_name in decoded:
+                result[attr_name] = decoded[attr_name]
+        return result
+
+
 class _MessageHubConsumer(streamsx.spl.op.Source):
     def __init__(self, topology, schema,
                  vmArg=None,
@@ -275,7 +2187,9 @@ class _MessageHubConsumer(streamsx.spl.op.Source):
                  outputPartitionAttributeName=None,
                  outputTopicAttributeName=None,
                  partition=None,
+                 pattern=None,
                  propertiesFile=None,
+                 startOffset=None,
                  startPosition=None,
                  startTime=None,
                  topic=None,
@@ -309,8 +2223,12 @@ class _MessageHubConsumer(streamsx.spl.op.Source):
             params['outputTopicAttributeName'] = outputTopicAttributeName
         if partition is not None:
             params['partition'] = partition
+        if pattern is not None:
+            params['pattern'] = pattern
         if propertiesFile is not None:
             params['propertiesFile'] = propertiesFile
+        if startOffset is not None:
+            params['startOffset'] = startOffset
         if startPosition is not None:
             params['startPosition'] = startPosition
         if startTime is not None:
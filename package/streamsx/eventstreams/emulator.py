@@ -0,0 +1,357 @@
+# coding=utf-8
+# Licensed Materials - Property of IBM
+# Copyright IBM Corp. 2019
+"""
+In-process emulation of Event Streams for standalone applications and unit tests.
+
+A :py:class:`Broker` keeps topics with partitions in memory. Each message gets an offset
+within its partition and a timestamp, and consumers in a consumer group share the partitions
+of their topics and continue at the committed offsets of the group. Messages with a key are
+assigned to the partitions with the Kafka default partitioner.
+
+A broker can be passed as `emulator` to :py:func:`~streamsx.eventstreams.subscribe` and
+:py:func:`~streamsx.eventstreams.publish`, which then create Python operators producing to and consuming
+from the broker instead of the operators of the Event Streams toolkit. No toolkit, credentials, or
+Event Streams service are needed. Brokers are registered by name in the process, so that all operators
+with the same broker name running in the same process, for example in a standalone application,
+share the messages::
+
+    from streamsx.eventstreams import emulator
+
+    broker = emulator.Broker('local', partitions=3)
+    eventstreams.publish(readings, 'SENSORS', emulator=broker)
+    received = eventstreams.subscribe(topology, 'SENSORS', Schema.StringMessageMeta, emulator=broker)
+
+The broker can also be used directly, for example for unit tests of callables::
+
+    broker.produce('SENSORS', '{"id": 1}', key='sensor_1')
+    consumer = broker.consumer(['SENSORS'], group='test', start='earliest')
+    records = consumer.poll()
+
+Messages are stored as ``bytes``, strings are encoded as UTF-8. Messages are not deleted.
+
+.. versionadded:: 2.1
+"""
+
+import collections
+import re
+import threading
+import time
+import uuid
+
+from streamsx.eventstreams.hashing import kafka_partition
+
+__all__ = ['Broker', 'Consumer', 'Record', 'broker']
+
+Record = collections.namedtuple('Record', ['topic', 'partition', 'offset', 'key', 'value', 'timestamp'])
+Record.__doc__ = 'A message of a topic partition with its offset and timestamp in milliseconds since the epoch.'
+
+_BROKERS = dict()
+# reentrant, as a new broker registers itself while broker() holds the lock
+_BROKERS_LOCK = threading.RLock()
+
+
+def broker(name='default', partitions=1):
+    """Returns the broker registered with `name` in this process, a new broker when there is none.
+
+    Args:
+        name(str): Name of the broker.
+        partitions(int): Number of partitions of the topics created automatically by a new broker.
+
+    Returns:
+        Broker: The broker.
+    """
+    with _BROKERS_LOCK:
+        existing = _BROKERS.get(name)
+        if existing is not None:
+            return existing
+        return Broker(name, partitions)
+
+
+class Broker(object):
+    """In-memory broker with topics, partitions, offsets, timestamps, and consumer groups.
+
+    Creating a broker registers it with its name in the process, replacing a broker with the same name.
+    A pickled broker is restored as the broker registered with its name, so that the operators of a
+    topology running in one process share the broker.
+
+    Topics are created automatically when they are used for the first time.
+
+    Args:
+        name(str): Name of the broker.
+        partitions(int): Number of partitions of topics created automatically.
+    """
+    def __init__(self, name='default', partitions=1):
+        if isinstance(partitions, bool) or not isinstance(partitions, int) or partitions < 1:
+            raise ValueError('partitions must be a positive int: ' + str(partitions))
+        self.name = name
+        self.partitions = partitions
+        self._condition = threading.Condition()
+        self._topics = dict()
+        self._next_partition = dict()
+        self._committed = dict()
+        self._members = dict()
+        with _BROKERS_LOCK:
+            _BROKERS[name] = self
+
+    def __reduce__(self):
+        return (broker, (self.name, self.partitions))
+
+    def create_topic(self, topic, partitions=None):
+        """Creates a topic.
+
+        Args:
+            topic(str): Name of the topic.
+            partitions(int): Number of partitions, defaults to the partitions of the broker.
+
+        Raises:
+            ValueError: The topic exists with a different number of partitions.
+        """
+        if partitions is None:
+            partitions = self.partitions
+        with self._condition:
+            existing = self._topics.get(topic)
+            if existing is not None:
+                if len(existing) != partitions:
+                    raise ValueError('Topic ' + topic + ' exists with ' + str(len(existing)) + ' partitions')
+                return
+            self._topics[topic] = [[] for p in range(partitions)]
+            self._next_partition[topic] = 0
+            self._condition.notify_all()
+
+    def _partitions(self, topic):
+        # caller holds the lock
+        partitions = self._topics.get(topic)
+        if partitions is None:
+            partitions = [[] for p in range(self.partitions)]
+            self._topics[topic] = partitions
+            self._next_partition[topic] = 0
+        return partitions
+
+    def topics(self, pattern=None):
+        """Returns the names of the topics.
+
+        Args:
+            pattern(str): Regular expression the names must match completely.
+
+        Returns:
+            list: Sorted topic names.
+        """
+        with self._condition:
+            names = list(self._topics)
+        if pattern is not None:
+            names = [t for t in names if re.fullmatch(pattern, t)]
+        return sorted(names)
+
+    def partition_count(self, topic):
+        """Returns the number of partitions of a topic."""
+        with self._condition:
+            return len(self._partitions(topic))
+
+    def produce(self, topic, value, key=None, partition=None, timestamp=None):
+        """Appends a message to a topic.
+
+        Args:
+            topic(str): Topic.
+            value(str|bytes): Message, strings are encoded as UTF-8. Objects supporting the buffer protocol are copied.
+            key: Message key. When not ``None``, selects the partition like the Kafka default partitioner.
+            partition(int): Partition of the message. Defaults to the partition of the key, or the next partition in a round-robin manner.
+            timestamp(int): Timestamp in milliseconds since the epoch, defaults to the current time.
+
+        Returns:
+            Record: The appended message.
+        """
+        if isinstance(value, str):
+            value = value.encode('utf-8')
+        elif value is not None:
+            value = bytes(value)
+        if timestamp is None:
+            timestamp = int(time.time() * 1000)
+        with self._condition:
+            partitions = self._partitions(topic)
+            if partition is None:
+                if key is not None and key != '':
+                    partition = kafka_partition(key if isinstance(key, (str, bytes)) else str(key), len(partitions))
+                else:
+                    partition = self._next_partition[topic]
+                    self._next_partition[topic] = (partition + 1) % len(partitions)
+            elif not 0 <= partition < len(partitions):
+                raise ValueError('Partition ' + str(partition) + ' does not exist in topic ' + topic)
+            log = partitions[partition]
+            record = Record(topic, partition, len(log), key, value, timestamp)
+            log.append(record)
+            self._condition.notify_all()
+        return record
+
+    def end_offset(self, topic, partition):
+        """Returns the offset of the next message of a partition."""
+        with self._condition:
+            return len(self._partitions(topic)[partition])
+
+    def offset_for_time(self, topic, partition, timestamp):
+        """Returns the offset of the first message of a partition with a timestamp at or after `timestamp` in milliseconds,
+        or the end offset when there is none."""
+        with self._condition:
+            log = self._partitions(topic)[partition]
+            for record in log:
+                if record.timestamp >= timestamp:
+                    return record.offset
+            return len(log)
+
+    def fetch(self, topic, partition, offset, max_records=500):
+        """Returns up to `max_records` messages of a partition starting at `offset`."""
+        with self._condition:
+            return self._partitions(topic)[partition][offset:offset + max_records]
+
+    def commit(self, group, topic, partition, offset):
+        """Commits the offset of the next message to consume of a partition for a consumer group."""
+        with self._condition:
+            self._committed[(group, topic, partition)] = offset
+
+    def committed(self, group, topic, partition):
+        """Returns the committed offset of a partition for a consumer group, or ``None``."""
+        with self._condition:
+            return self._committed.get((group, topic, partition))
+
+    def consumer(self, topics=None, group=None, pattern=None, partitions=None, start='latest', start_time=None, start_offsets=None):
+        """Creates a consumer.
+
+        Args:
+            topics(list): Topics to consume.
+            group(str): Consumer group. The consumers of a group share the partitions of the topics, unless `partitions` are assigned.
+            pattern(str): Regular expression matching the topics to consume, instead of `topics`.
+            partitions(list): Partitions of the topics assigned to the consumer.
+            start(str): ``'earliest'`` or ``'latest'``, the position in partitions without committed offset.
+            start_time(int): Timestamp in milliseconds since the epoch of the first message to consume.
+            start_offsets(dict): Offsets per partition number of the first messages to consume.
+
+        Returns:
+            Consumer: The consumer.
+        """
+        return Consumer(self, topics, group, pattern, partitions, start, start_time, start_offsets)
+
+    def _join(self, group, member):
+        with self._condition:
+            members = self._members.setdefault(group, [])
+            members.append(member)
+            members.sort()
+
+    def _leave(self, group, member):
+        with self._condition:
+            members = self._members.get(group, [])
+            if member in members:
+                members.remove(member)
+
+    def _assignment(self, group, member, topics):
+        # range assignment of all partitions of the topics to the sorted members
+        with self._condition:
+            members = self._members.get(group, [member])
+            index = members.index(member)
+            assigned = []
+            for topic in topics:
+                count = len(self._partitions(topic))
+                assigned.extend((topic, p) for p in range(count) if p * len(members) // count == index)
+            return assigned
+
+    def _wait(self, timeout):
+        with self._condition:
+            self._condition.wait(timeout)
+
+
+class Consumer(object):
+    """Consumer of messages from a :py:class:`Broker`, created with :py:meth:`Broker.consumer`.
+
+    Without a group or assigned partitions, the consumer reads all partitions of its topics. The consumers
+    of a group share the partitions and commit the offsets of the polled messages, so that a new consumer of the
+    group continues after them. The start time and start offsets apply to the partitions assigned to the consumer
+    for the first time, the other partitions continue at the committed offsets of the group.
+    """
+    def __init__(self, broker, topics=None, group=None, pattern=None, partitions=None, start='latest', start_time=None, start_offsets=None):
+        if (topics is None) == (pattern is None):
+            raise ValueError('Either topics or pattern must be specified')
+        if start not in ('earliest', 'latest'):
+            raise ValueError("start must be 'earliest' or 'latest': " + str(start))
+        self.broker = broker
+        self.topics = [topics] if isinstance(topics, str) else topics
+        self.pattern = pattern
+        self.group = group
+        self.partitions = partitions
+        self.start = start
+        self.start_time = start_time
+        self.start_offsets = start_offsets
+        self._positions = dict()
+        self._seen = set()
+        self._member = None
+        if group is not None and partitions is None:
+            self._member = str(uuid.uuid4())
+            broker._join(group, self._member)
+
+    def _subscribed_topics(self):
+        if self.pattern is not None:
+            return self.broker.topics(self.pattern)
+        return self.topics
+
+    def assignment(self):
+        """Returns the list of ``(topic, partition)`` tuples assigned to the consumer."""
+        topics = self._subscribed_topics()
+        if self.partitions is not None:
+            return [(topic, p) for topic in topics for p in self.partitions]
+        if self._member is not None:
+            return self.broker._assignment(self.group, self._member, topics)
+        return [(topic, p) for topic in topics for p in range(self.broker.partition_count(topic))]
+
+    def _start_offset(self, topic, partition):
+        if (topic, partition) not in self._seen:
+            self._seen.add((topic, partition))
+            if self.start_offsets is not None:
+                return self.start_offsets.get(partition, 0)
+            if self.start_time is not None:
+                return self.broker.offset_for_time(topic, partition, self.start_time)
+        if self.group is not None:
+            committed = self.broker.committed(self.group, topic, partition)
+            if committed is not None:
+                return committed
+        return 0 if self.start == 'earliest' else self.broker.end_offset(topic, partition)
+
+    def poll(self, max_records=500, timeout=0.0):
+        """Returns the next messages of the assigned partitions.
+
+        Args:
+            max_records(int): Maximum number of returned messages.
+            timeout(float): Time in seconds to wait for messages when there are none.
+
+        Returns:
+            list: :py:class:`Record` objects in offset order per partition.
+        """
+        deadline = time.time() + timeout
+        while True:
+            records = []
+            assignment = self.assignment()
+            for tp in list(self._positions):
+                if tp not in assignment:
+                    del self._positions[tp]
+            for topic, partition in assignment:
+                if len(records) >= max_records:
+                    break
+                position = self._positions.get((topic, partition))
+                if position is None:
+                    position = self._start_offset(topic, partition)
+                fetched = self.broker.fetch(topic, partition, position, max_records - len(records))
+                self._positions[(topic, partition)] = position + len(fetched)
+                records.extend(fetched)
+                if fetched and self.group is not None:
+                    self.broker.commit(self.group, topic, partition, position + len(fetched))
+            remaining = deadline - time.time()
+            if records or remaining <= 0:
+                return records
+            self.broker._wait(min(remaining, 0.1))
+
+    def position(self, topic, partition):
+        """Returns the offset of the next message to poll from a partition, or ``None`` before the first poll."""
+        return self._positions.get((topic, partition))
+
+    def close(self):
+        """Closes the consumer, the partitions are assigned to the other consumers of the group."""
+        if self._member is not None:
+            self.broker._leave(self.group, self._member)
+            self._member = None
@@ -0,0 +1,175 @@
+# coding=utf-8
+# Licensed Materials - Property of IBM
+# Copyright IBM Corp. 2019
+"""
+Hash functions for keyed messages that are compatible with Java and with the Kafka default partitioner.
+
+Parallel regions partitioned by the message key, created with ``Routing.HASH_PARTITIONED``,
+need a hash of the key that is consistent across processes. The built-in Python ``hash`` function
+is randomized per process, so that it cannot be used. This module provides
+
+* :py:func:`java_hashcode` - the hash code of a string as computed by Java's ``String.hashCode()``
+* :py:func:`murmur2` - the murmur2 hash the Kafka default partitioner applies to the serialized key
+* :py:func:`hash_batch` - hashes a list of keys at once
+
+Hashes of string keys are cached, so that repeated keys are hashed only once.
+
+:py:class:`KeyHash` is a callable that can be passed as `func` to ``Stream.parallel()``::
+
+    from streamsx.topology.topology import Routing
+    from streamsx.eventstreams import hashing
+
+    received_parallel = received.parallel(5, routing=Routing.HASH_PARTITIONED,
+        func=hashing.KeyHash('key'))
+
+.. versionadded:: 2.1
+"""
+
+import functools
+import operator
+import struct
+import sys
+
+__all__ = ['java_hashcode', 'murmur2', 'kafka_partition', 'hash_batch', 'KeyHash']
+
+_CACHE_SIZE = 65536
+
+# powers of 31 modulo 2**32
+_POW31_LEN = 256
+_POW31 = [pow(31, i, 1 << 32) for i in range(_POW31_LEN)]
+
+_UTF16 = 'utf-16-le' if sys.byteorder == 'little' else 'utf-16-be'
+
+
+def _to_int32(h):
+    return ((h + 0x80000000) & 0xFFFFFFFF) - 0x80000000
+
+
+def _java_hashcode_units(units):
+    if len(units) <= _POW31_LEN:
+        # sum of c[i] * 31**(n-1-i), evaluated in C
+        return _to_int32(sum(map(operator.mul, reversed(units), _POW31)))
+    h = 0
+    for c in units:
+        h = (31 * h + c) & 0xFFFFFFFF
+    return _to_int32(h)
+
+
+@functools.lru_cache(maxsize=_CACHE_SIZE)
+def java_hashcode(s):
+    """Computes the hash code of a string in the same way as Java's ``String.hashCode()``.
+
+    The hash is computed over the UTF-16 code units of the string, so that
+    characters outside of the Basic Multilingual Plane give the same result as in Java.
+
+    Args:
+        s(str): The string.
+
+    Returns:
+        int: The 32 bit signed hash code.
+    """
+    try:
+        return _java_hashcode_units(s.encode('ascii'))
+    except UnicodeEncodeError:
+        return _java_hashcode_units(memoryview(s.encode(_UTF16)).cast('H'))
+
+
+def _murmur2_bytes(data):
+    length = len(data)
+    m = 0x5bd1e995
+    h = (0x9747b28c ^ length) & 0xFFFFFFFF
+    length4 = length // 4
+    for k in struct.unpack_from('<%dI' % length4, data):
+        k = (k * m) & 0xFFFFFFFF
+        k ^= k >> 24
+        k = (k * m) & 0xFFFFFFFF
+        h = ((h * m) & 0xFFFFFFFF) ^ k
+    remaining = length % 4
+    index = length4 * 4
+    if remaining == 3:
+        h ^= data[index + 2] << 16
+    if remaining >= 2:
+        h ^= data[index + 1] << 8
+    if remaining >= 1:
+        h ^= data[index]
+        h = (h * m) & 0xFFFFFFFF
+    h ^= h >> 13
+    h = (h * m) & 0xFFFFFFFF
+    h ^= h >> 15
+    return _to_int32(h)
+
+
+@functools.lru_cache(maxsize=_CACHE_SIZE)
+def _murmur2_str(s):
+    return _murmur2_bytes(s.encode('utf-8'))
+
+
+def murmur2(key):
+    """Computes the murmur2 hash in the same way as the Kafka default partitioner
+    (``org.apache.kafka.common.utils.Utils.murmur2``).
+
+    Args:
+        key(str|bytes): The key. A string is hashed as its UTF-8 encoding, the serialization of string keys in Kafka.
+            Any other bytes-like object is hashed as its bytes.
+
+    Returns:
+        int: The 32 bit signed hash.
+
+    Raises:
+        TypeError: The key is neither a string nor a bytes-like object.
+    """
+    if isinstance(key, str):
+        return _murmur2_str(key)
+    try:
+        data = memoryview(key).tobytes()
+    except TypeError:
+        raise TypeError('Key must be str or bytes-like, not ' + type(key).__name__) from None
+    return _murmur2_bytes(data)
+
+
+def kafka_partition(key, partition_count):
+    """Computes the partition the Kafka default partitioner chooses for a message with a key.
+
+    Args:
+        key(str|bytes): The message key.
+        partition_count(int): The number of partitions of the topic.
+
+    Returns:
+        int: The partition number.
+    """
+    return (murmur2(key) & 0x7FFFFFFF) % partition_count
+
+
+def hash_batch(keys, hash_function=java_hashcode):
+    """Hashes a list of keys.
+
+    Each distinct key in the list is hashed only once.
+
+    Args:
+        keys(list): The keys.
+        hash_function: The hash function, :py:func:`java_hashcode` or :py:func:`murmur2`.
+
+    Returns:
+        list: The hashes of the keys, in the order of the keys.
+    """
+    hashes = {}
+    for key in keys:
+        if key not in hashes:
+            hashes[key] = hash_function(key)
+    return [hashes[key] for key in keys]
+
+
+class KeyHash(object):
+    """Callable that hashes an attribute of a tuple, for use as `func` of ``Stream.parallel()``
+    with ``Routing.HASH_PARTITIONED``.
+
+    Args:
+        attribute(str): Name of the attribute with the key.
+        hash_function: The hash function, :py:func:`java_hashcode` or :py:func:`murmur2`.
+    """
+    def __init__(self, attribute='key', hash_function=java_hashcode):
+        self.attribute = attribute
+        self.hash_function = hash_function
+
+    def __call__(self, tuple):
+        return self.hash_function(tuple[self.attribute])
@@ -0,0 +1,247 @@
+# coding=utf-8
+# Licensed Materials - Property of IBM
+# Copyright IBM Corp. 2019
+"""
+Profiling of the Python callables of Event Streams pipelines.
+
+When the throughput of an application drops, the time can be spent in the consumer,
+in the transport of the tuples, in the Python callables, or in the producer. :py:func:`profile`
+wraps a callable passed to ``Stream.map()``, ``Stream.flat_map()``, ``Stream.filter()``, or ``Stream.for_each()``,
+and reports the following custom metrics of the operator:
+
+* ``nCalls`` - number of calls of the callable
+* ``wallTimeP50Micros``, ``wallTimeP90Micros``, ``wallTimeP99Micros`` - percentiles of the elapsed time of a call in microseconds
+* ``cpuTimeP50Micros``, ``cpuTimeP90Micros``, ``cpuTimeP99Micros`` - percentiles of the CPU time of a call in microseconds
+* ``nBytesIn``, ``nBytesOut`` - size of the messages passed to and returned by the callable
+
+The times are collected in histograms with power of two buckets, so that a percentile
+is reported as the upper bound of its bucket. The percentiles are computed over the calls
+of the last second. Sizes are the number of bytes of binary data and the number of
+characters of strings, including the values of dicts and tuples and the items of lists.
+
+With `stack_interval`, a thread samples the stack of the callable while it is called, and
+logs the most frequent stacks every minute to the logger ``streamsx.eventstreams.profiling``::
+
+    from streamsx.eventstreams import profiling
+
+    received = eventstreams.subscribe(topology, 'SENSORS', Schema.StringMessage)
+    readings = received.map(profiling.profile(flat_message_json, stack_interval=0.01), schema=SENSOR_SCHEMA)
+
+Profiling is enabled when the environment variable ``STREAMSX_EVENTSTREAMS_PROFILE`` is set to a value
+other than ``0`` while the topology is built, or with the `enabled` parameter. When disabled, :py:func:`profile`
+returns the callable itself, so that the pipeline runs without any overhead.
+
+.. versionadded:: 2.1
+"""
+
+import collections
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+
+import streamsx.ec
+
+__all__ = ['profile', 'Profiler']
+
+_LOGGER = logging.getLogger(__name__)
+
+_ENV_PROFILE = 'STREAMSX_EVENTSTREAMS_PROFILE'
+
+# bucket i holds times below 2**i microseconds
+_BUCKETS = 40
+
+_PERCENTILES = (50, 90, 99)
+
+_thread_time = getattr(time, 'thread_time', time.process_time)
+
+
+def profile(func, enabled=None, stack_interval=None):
+    """Wraps a callable of a Python stage for profiling.
+
+    Args:
+        func: The callable.
+        enabled(bool): ``True`` to profile the callable, ``False`` to return it unchanged. Defaults to the environment variable ``STREAMSX_EVENTSTREAMS_PROFILE``.
+        stack_interval(float): Interval in seconds for sampling the stack of the callable. When ``None``, stacks are not sampled.
+
+    Returns:
+        The :py:class:`Profiler` wrapping `func`, or `func` when profiling is disabled.
+    """
+    if enabled is None:
+        enabled = os.environ.get(_ENV_PROFILE, '0') not in ('', '0')
+    if not enabled:
+        return func
+    return Profiler(func, stack_interval)
+
+
+def _size(value):
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(_size(v) for v in value.values())
+    if isinstance(value, (tuple, list)):
+        return sum(_size(v) for v in value)
+    try:
+        return memoryview(value).nbytes
+    except TypeError:
+        return 0
+
+
+def _percentile(counts, total, percent):
+    """
+    Returns the upper bound in microseconds of the bucket containing the percentile.
+    """
+    rank = total * percent / 100.0
+    seen = 0
+    for i, count in enumerate(counts):
+        seen += count
+        if seen >= rank:
+            return 1 << i
+    return 1 << len(counts)
+
+
+class Profiler(object):
+    """Callable wrapping a callable of a Python stage, which records the number of calls, the times of the calls,
+    and the sizes of the passed and returned values as custom metrics.
+
+    The wrapped callable can be stateful and can use its own custom metrics, the
+    calls of ``__enter__`` and ``__exit__`` are passed on.
+
+    Args:
+        func: The callable.
+        stack_interval(float): Interval in seconds for sampling the stack of the callable. When ``None``, stacks are not sampled.
+    """
+    def __init__(self, func, stack_interval=None):
+        if stack_interval is not None and stack_interval <= 0:
+            raise ValueError('stack_interval must be positive: ' + str(stack_interval))
+        self.func = func
+        self.stack_interval = stack_interval
+        self.calls = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.wall_counts = [0] * _BUCKETS
+        self.cpu_counts = [0] * _BUCKETS
+        self.stacks = collections.Counter()
+        self._stacks_lock = threading.Lock()
+        self._window = 0
+        self._last = None
+        self._metrics = None
+        self._calling = None
+        self._stop = None
+
+    def __enter__(self):
+        if hasattr(self.func, '__enter__'):
+            self.func.__enter__()
+        if streamsx.ec.is_active():
+            self._metrics = dict((name, streamsx.ec.CustomMetric(self, name, description, kind)) for name, description, kind in self._metric_specs())
+        if self.stack_interval is not None:
+            self._stop = threading.Event()
+            sampler = threading.Thread(target=self._sample_stacks, args=(self._stop,), name='profiling')
+            sampler.daemon = True
+            sampler.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._stop is not None:
+            self._stop.set()
+            self._log_stacks()
+        if hasattr(self.func, '__exit__'):
+            return self.func.__exit__(exc_type, exc_value, traceback)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_metrics'] = None
+        state['_calling'] = None
+        state['_stop'] = None
+        state['stacks'] = collections.Counter()
+        state['_stacks_lock'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._stacks_lock = threading.Lock()
+
+    @staticmethod
+    def _metric_specs():
+        specs = [('nCalls', 'Number of calls', streamsx.ec.MetricKind.Counter),
+            ('nBytesIn', 'Size of the values passed to the callable', streamsx.ec.MetricKind.Counter),
+            ('nBytesOut', 'Size of the values returned by the callable', streamsx.ec.MetricKind.Counter)]
+        for p in _PERCENTILES:
+            specs.append(('wallTimeP' + str(p) + 'Micros', str(p) + 'th percentile of the elapsed time of a call in microseconds', streamsx.ec.MetricKind.Gauge))
+            specs.append(('cpuTimeP' + str(p) + 'Micros', str(p) + 'th percentile of the CPU time of a call in microseconds', streamsx.ec.MetricKind.Gauge))
+        return specs
+
+    def percentiles(self):
+        """Returns the percentiles of the call times since the last update of the metrics.
+
+        Returns:
+            dict: Percentiles in microseconds by metric name.
+        """
+        result = dict()
+        if self._window == 0:
+            return result
+        for p in _PERCENTILES:
+            result['wallTimeP' + str(p) + 'Micros'] = _percentile(self.wall_counts, self._window, p)
+            result['cpuTimeP' + str(p) + 'Micros'] = _percentile(self.cpu_counts, self._window, p)
+        return result
+
+    def _update_metrics(self):
+        if self._metrics is not None:
+            self._metrics['nCalls'].value = self.calls
+            self._metrics['nBytesIn'].value = self.bytes_in
+            self._metrics['nBytesOut'].value = self.bytes_out
+            for name, value in self.percentiles().items():
+                self._metrics[name].value = value
+        self.wall_counts = [0] * _BUCKETS
+        self.cpu_counts = [0] * _BUCKETS
+        self._window = 0
+
+    def _sample_stacks(self, stop):
+        next_log = time.time() + 60.0
+        while not stop.wait(self.stack_interval):
+            ident = self._calling
+            if ident is not None:
+                frame = sys._current_frames().get(ident)
+                if frame is not None:
+                    stack = tuple(traceback.format_stack(frame, limit=8))
+                    with self._stacks_lock:
+                        self.stacks[stack] += 1
+            if time.time() >= next_log:
+                self._log_stacks()
+                next_log = time.time() + 60.0
+
+    def _log_stacks(self):
+        # called by the sampling thread and by __exit__
+        with self._stacks_lock:
+            stacks = self.stacks.most_common(5)
+            self.stacks.clear()
+        for stack, count in stacks:
+            _LOGGER.info('%d samples in %s:\n%s', count, getattr(self.func, '__name__', type(self.func).__name__), ''.join(stack))
+
+    def __call__(self, *args):
+        self._calling = threading.get_ident()
+        wall = time.perf_counter()
+        cpu = _thread_time()
+        try:
+            result = self.func(*args)
+        finally:
+            cpu = _thread_time() - cpu
+            wall = time.perf_counter() - wall
+            self._calling = None
+        self.calls += 1
+        self.bytes_in += _size(args[0]) if len(args) == 1 else _size(args)
+        if not isinstance(result, bool):
+            self.bytes_out += _size(result)
+        self.wall_counts[min(int(wall * 1000000.0).bit_length(), _BUCKETS - 1)] += 1
+        self.cpu_counts[min(int(cpu * 1000000.0).bit_length(), _BUCKETS - 1)] += 1
+        self._window += 1
+        now = time.time()
+        if self._last is None:
+            self._last = now
+        elif now - self._last >= 1.0:
+            self._update_metrics()
+            self._last = now
+        return result
@@ -0,0 +1,141 @@
+# coding=utf-8
+# Licensed Materials - Property of IBM
+# Copyright IBM Corp. 2019
+"""
+Decoding and encoding of fixed-layout binary records with NumPy.
+
+Producers often publish packed records of fixed width, for example sensor readings,
+as the message of :py:const:`~streamsx.eventstreams.schema.Schema.BinaryMessage`.
+The layout of a record is described by a NumPy data type with named fields::
+
+    SENSOR_RECORD = [('sensor_id', '<u4'), ('value', '<f8'), ('ts', '<i8')]
+
+:py:func:`decode` turns a message, which can contain one or more records, or a list
+of messages into a NumPy structured array without creating Python objects per field.
+:py:func:`encode` creates the message from records. Use explicit byte orders in the
+data type, so that producers and consumers agree on the layout.
+
+The callables :py:class:`Decoder` and :py:class:`Encoder` can be passed to ``Stream.map()``::
+
+    from streamsx.eventstreams import records
+
+    received = eventstreams.subscribe(topology, 'SENSORS', Schema.BinaryMessage)
+    readings = received.map(records.Decoder(SENSOR_RECORD))
+    averages = readings.map(lambda a: a['value'].mean())
+
+    to_publish = readings.map(records.Encoder(SENSOR_RECORD, key='sensor_id'), schema=Schema.BinaryMessage)
+    eventstreams.publish(to_publish, 'SENSORS_COPY')
+
+Together with the batches of :py:func:`~streamsx.eventstreams.subscribe` with `batch_size` or `batch_timeout`,
+all records of a batch are decoded into one array.
+
+This module requires the ``numpy`` package, which is installed with
+``pip install streamsx.eventstreams[numpy]``.
+
+.. versionadded:: 2.1
+"""
+
+import numpy
+
+__all__ = ['decode', 'encode', 'Decoder', 'Encoder']
+
+
+def _record_dtype(dtype):
+    dtype = numpy.dtype(dtype)
+    if dtype.names is None:
+        raise TypeError('Record data type must have named fields: ' + str(dtype))
+    if dtype.hasobject:
+        raise TypeError('Record data type must have a fixed layout: ' + str(dtype))
+    return dtype
+
+
+def decode(data, dtype):
+    """Decodes binary records into a NumPy structured array.
+
+    A single message is decoded without copying the data, the returned array
+    is a read-only view of the message. The view is only valid while the message is,
+    so call :py:func:`decode` directly only with buffers owned by the caller, and copy the
+    array to keep it. A list of messages is decoded into one new array.
+
+    Args:
+        data(bytes|memoryview|list): Message containing one or more records, or a list of messages.
+        dtype: NumPy data type of a record, or a description of it accepted by ``numpy.dtype``.
+
+    Returns:
+        numpy.ndarray: Structured array with one element per record.
+
+    Raises:
+        ValueError: The size of a message is not a multiple of the record size.
+    """
+    dtype = _record_dtype(dtype)
+    if isinstance(data, (list, tuple)):
+        data = b''.join(data)
+    size = memoryview(data).nbytes
+    if size % dtype.itemsize != 0:
+        raise ValueError('Message size ' + str(size) + ' is not a multiple of the record size ' + str(dtype.itemsize))
+    return numpy.frombuffer(data, dtype=dtype)
+
+
+def encode(records, dtype):
+    """Encodes records into a binary message.
+
+    Args:
+        records: Structured array, single record, or list of tuples with the values of the fields.
+        dtype: NumPy data type of a record, or a description of it accepted by ``numpy.dtype``.
+
+    Returns:
+        bytes: Message containing the packed records.
+    """
+    dtype = _record_dtype(dtype)
+    if isinstance(records, tuple):
+        records = [records]
+    return numpy.asarray(records, dtype=dtype).tobytes()
+
+
+class Decoder(object):
+    """Callable decoding the records in the message of a tuple, for use with ``Stream.map()``.
+
+    The message attribute can contain a single message or a list of messages
+    of a batch of messages. The returned array owns its data, as the message of the
+    tuple is released by the runtime when the callable returns.
+
+    Args:
+        dtype: NumPy data type of a record, or a description of it accepted by ``numpy.dtype``.
+        attribute(str): Name of the attribute with the message.
+    """
+    def __init__(self, dtype, attribute='message'):
+        self.dtype = _record_dtype(dtype)
+        self.attribute = attribute
+
+    def __call__(self, tuple):
+        data = tuple[self.attribute]
+        if isinstance(data, list):
+            # the records of a batch are joined into a new array
+            return decode(data, self.dtype)
+        return decode(data, self.dtype).copy()
+
+
+class Encoder(object):
+    """Callable encoding records into a tuple with the attributes ``message`` and ``key``, for use with
+    ``Stream.map()`` and the schema :py:const:`~streamsx.eventstreams.schema.Schema.BinaryMessage`.
+
+    Args:
+        dtype: NumPy data type of a record, or a description of it accepted by ``numpy.dtype``.
+        key(str): Name of the field of the first record, whose value is used as message key. When ``None``, the messages have no key.
+    """
+    def __init__(self, dtype, key=None):
+        self.dtype = _record_dtype(dtype)
+        if key is not None and key not in self.dtype.names:
+            raise ValueError('Field ' + str(key) + ' not found in record data type')
+        self.key = key
+
+    def __call__(self, records):
+        if isinstance(records, tuple):
+            records = [records]
+        records = numpy.atleast_1d(numpy.asarray(records, dtype=self.dtype))
+        # the runtime copies the data from the view into the blob
+        result = {'message': memoryview(numpy.ascontiguousarray(records))}
+        if self.key is not None and len(records) > 0:
+            key = records[0][self.key]
+            result['key'] = key.decode('utf-8') if isinstance(key, bytes) else str(key)
+        return result
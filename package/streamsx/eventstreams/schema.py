@@ -13,6 +13,11 @@ _SPL_SCHEMA_STRING_MESSAGE = 'tuple<rstring message,rstring key>'
 _SPL_SCHEMA_BLOB_MESSAGE = 'tuple<blob message,rstring key>'
 _SPL_SCHEMA_STRING_MESSAGE_META = 'tuple<rstring message,rstring key,rstring topic,int32 partition,int64 offset,int64 messageTimestamp>'
 _SPL_SCHEMA_BLOB_MESSAGE_META = 'tuple<blob message,rstring key,rstring topic,int32 partition,int64 offset,int64 messageTimestamp>'
+# Batches of messages
+_SPL_SCHEMA_STRING_MESSAGE_BATCH = 'tuple<list<rstring> message,list<rstring> key>'
+_SPL_SCHEMA_BLOB_MESSAGE_BATCH = 'tuple<list<blob> message,list<rstring> key>'
+_SPL_SCHEMA_STRING_MESSAGE_META_BATCH = 'tuple<list<rstring> message,list<rstring> key,list<rstring> topic,list<int32> partition,list<int64> offset,list<int64> messageTimestamp>'
+_SPL_SCHEMA_BLOB_MESSAGE_META_BATCH = 'tuple<list<blob> message,list<rstring> key,list<rstring> topic,list<int32> partition,list<int64> offset,list<int64> messageTimestamp>'
 
 
 class Schema:
@@ -37,6 +42,16 @@ class Schema:
     have the attributes ``message``, ``key``, ``topic``, ``partition``, ``offset``, and ``messageTimestamp``. They vary in the type for the 
     ``message`` attribute and can be used for :py:meth:`~streamsx.eventstreams.subscribe` and :py:meth:`~streamsx.eventstreams.publish`.
     
+    The schemas
+    
+    * :py:const:`StringMessageBatch`
+    * :py:const:`BinaryMessageBatch`
+    * :py:const:`StringMessageMetaBatch`
+    * :py:const:`BinaryMessageMetaBatch`
+    
+    are the schemas of the streams returned by :py:meth:`~streamsx.eventstreams.subscribe` with `batch_size` or `batch_timeout`.
+    Each attribute is a list with one element per message of the batch.
+    
     All schemas defined in this class are instances of `streamsx.topology.schema.StreamSchema`.
     
     The following sample uses structured schemas for publishing messages with keys to a 
@@ -49,6 +64,7 @@ class Schema:
         from streamsx.topology.topology import Routing
         from streamsx.topology.schema import StreamSchema
         from streamsx.eventstreams.schema import Schema
+        from streamsx.eventstreams import hashing
         import streamsx.eventstreams as evst
         
         import random
@@ -77,21 +93,6 @@ class Schema:
                     yield reading
         
         
-        # parses the JSON in the message and adds the attributes to a tuple
-        def flat_message_json(tuple):
-            messageAsDict = json.loads(tuple['message'])
-            tuple.update(messageAsDict)
-            return tuple
-        
-        
-        # calculate a hash code of a string in a consistent way
-        # needed for partitioned parallel streams
-        def string_hashcode(s):
-            h = 0
-            for c in s:
-                h = (31 * h + ord(c)) & 0xFFFFFFFF
-            return ((h + 0x80000000) & 0xFFFFFFFF) - 0x80000000
-        
         topology = Topology('EventStreamsParallel')
         
         #
@@ -130,20 +131,22 @@ class Schema:
             ).set_parallel(3).end_parallel()
         
         # start a different parallel region partitioned by message key,
-        # so that each key always goes into the same parallel channel
+        # so that each key always goes into the same parallel channel.
+        # The hash of the key must be consistent across processes.
         receivedParallelPartitioned = received.parallel(
             5,
             routing=Routing.HASH_PARTITIONED,
-            func=lambda x: string_hashcode(x['key']))
+            func=hashing.KeyHash('key'))
         
         # schema extension, here we use the Python 2.7, 3 way
         flattenedSchema = consumerSchema.extend(
             StreamSchema('tuple<rstring sensor_id, float64 value, int64 ts>'))
         
-        receivedParallelPartitionedFlattened = receivedParallelPartitioned.map(
-            func=flat_message_json,
-            name='JSON2Attributes',
-            schema=flattenedSchema)
+        # parse the JSON in the message and set the attributes of the flattened schema
+        receivedParallelPartitionedFlattened = evst.decode_json(
+            receivedParallelPartitioned,
+            schema=flattenedSchema,
+            name='JSON2Attributes')
         
         # validate by remove negativ and zero values from the streams,
         # pass only positive vaues and timestamps
@@ -196,7 +199,7 @@ class Schema:
 
     The schema defines following attributes
     
-    * message(bytes) - the message content
+    * message(memoryview) - the message content, a read-only view of the bytes when received by a Python callable
     * key(str) - the key for partitioning
     
     This schema can be used for both :py:meth:`~streamsx.eventstreams.subscribe`, 
@@ -212,7 +215,7 @@ class Schema:
     
     The schema defines following attributes
     
-    * message(bytes) - the message content
+    * message(memoryview) - the message content, a read-only view of the bytes when received by a Python callable
     * key(str) - the key for partitioning
     * topic(str) - the Event Streams topic
     * partition(int) - the topic partition number (32 bit)
@@ -222,4 +225,60 @@ class Schema:
      .. versionadded:: 1.2
     """
 
+    StringMessageBatch = StreamSchema (_SPL_SCHEMA_STRING_MESSAGE_BATCH)
+    """
+    Stream schema for batches of messages received with :py:const:`StringMessage`.
+
+    The schema defines following attributes
+    
+    * message(list[str]) - the message contents
+    * key(list[str]) - the keys of the messages
+
+     .. versionadded:: 2.1
+    """
+
+    BinaryMessageBatch = StreamSchema (_SPL_SCHEMA_BLOB_MESSAGE_BATCH)
+    """
+    Stream schema for batches of messages received with :py:const:`BinaryMessage`.
+
+    The schema defines following attributes
+    
+    * message(list[bytes]) - the message contents
+    * key(list[str]) - the keys of the messages
+
+     .. versionadded:: 2.1
+    """
+
+    StringMessageMetaBatch = StreamSchema (_SPL_SCHEMA_STRING_MESSAGE_META_BATCH)
+    """
+    Stream schema for batches of messages received with :py:const:`StringMessageMeta`.
+
+    The schema defines following attributes
+    
+    * message(list[str]) - the message contents
+    * key(list[str]) - the keys of the messages
+    * topic(list[str]) - the Event Streams topics
+    * partition(list[int]) - the topic partition numbers (32 bit)
+    * offset(list[int]) - the offsets of the messages within the topic partitions (64 bit)
+    * messageTimestamp(list[int]) - the message timestamps in milliseconds since epoch (64 bit)
+
+     .. versionadded:: 2.1
+    """
+
+    BinaryMessageMetaBatch = StreamSchema (_SPL_SCHEMA_BLOB_MESSAGE_META_BATCH)
+    """
+    Stream schema for batches of messages received with :py:const:`BinaryMessageMeta`.
+
+    The schema defines following attributes
+    
+    * message(list[bytes]) - the message contents
+    * key(list[str]) - the keys of the messages
+    * topic(list[str]) - the Event Streams topics
+    * partition(list[int]) - the topic partition numbers (32 bit)
+    * offset(list[int]) - the offsets of the messages within the topic partitions (64 bit)
+    * messageTimestamp(list[int]) - the message timestamps in milliseconds since epoch (64 bit)
+
+     .. versionadded:: 2.1
+    """
+
     pass
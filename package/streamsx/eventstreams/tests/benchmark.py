@@ -0,0 +1,263 @@
+# coding=utf-8
+# Licensed Materials - Property of IBM
+# Copyright IBM Corp. 2019
+"""
+Throughput and latency benchmark of :py:func:`~streamsx.eventstreams.publish` and :py:func:`~streamsx.eventstreams.subscribe`.
+
+Each run of the benchmark builds a topology publishing `count` messages of a size and
+schema to a topic and subscribing to the topic, and submits it with the :py:class:`~streamsx.topology.tester.Tester`.
+The messages carry the time they were created, so that the subscribing side measures
+the end-to-end latency. The results of all runs, messages per second, MB per second,
+and latency percentiles in milliseconds, are written as JSON. With a baseline file of an
+earlier release, runs with a throughput below the baseline by more than the tolerance are reported,
+and the exit code is 1.
+
+The broker is given by the credentials, for example of a Kafka compatible broker running on the
+local host, and the producer and consumer properties, which are merged with the presets::
+
+    cd streamsx/eventstreams/tests
+    python3 benchmark.py --credentials local-broker.json \\
+        --sizes 100 1000 --schemas string json --parallel 1 2 --presets default throughput \\
+        --output results-2.1.json --baseline results-2.0.json
+
+The topologies are built and run in standalone mode by default, which requires
+a local IBM Streams installation and the Event Streams toolkit given by ``EVENTSTREAMS_TOOLKIT_HOME``.
+With ``--emulator``, the messages are published to and consumed from an in-process broker of
+:py:mod:`streamsx.eventstreams.emulator`, so that neither the toolkit nor a broker are needed.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import struct
+import sys
+import tempfile
+import time
+import uuid
+
+import streamsx.eventstreams as evstr
+from streamsx.eventstreams import emulator
+from streamsx.eventstreams.schema import Schema as MsgSchema
+from streamsx.topology.context import ContextTypes
+from streamsx.topology.schema import CommonSchema
+from streamsx.topology.tester import Tester
+from streamsx.topology.topology import Topology
+import streamsx.spl.toolkit
+
+SCHEMAS = {
+    'string': CommonSchema.String,
+    'json': CommonSchema.Json,
+    'string_message': MsgSchema.StringMessage,
+    'binary_message': MsgSchema.BinaryMessage
+}
+
+PRESETS = ['default', 'throughput', 'low-latency']
+
+_BINARY_HEADER = struct.Struct('>dq')
+
+_KEYS = 64
+
+
+def payload(schema, seq, size, ts=None):
+    """Returns the tuple of message `seq` with approximately `size` bytes for `schema`."""
+    if ts is None:
+        ts = time.time()
+    if schema == 'binary_message':
+        header = _BINARY_HEADER.pack(ts, seq)
+        return {'message': header + b'\x00' * max(0, size - len(header)), 'key': str(seq % _KEYS)}
+    text = '%.6f %d ' % (ts, seq)
+    text += 'x' * max(0, size - len(text))
+    if schema == 'json':
+        return {'ts': ts, 'seq': seq, 'pad': text}
+    if schema == 'string_message':
+        return {'message': text, 'key': str(seq % _KEYS)}
+    return text
+
+
+def timestamp(schema, tuple):
+    """Returns the creation time of a received message."""
+    if schema == 'json':
+        return tuple['ts']
+    if schema == 'binary_message':
+        return _BINARY_HEADER.unpack_from(tuple['message'])[0]
+    if schema == 'string_message':
+        tuple = tuple['message']
+    return float(tuple[:tuple.index(' ')])
+
+
+def _percentile(values, percent):
+    return values[min(len(values) - 1, int(len(values) * percent / 100.0))]
+
+
+def summarize(latencies, elapsed, size):
+    """Returns the throughput and latency statistics of the received messages.
+
+    Args:
+        latencies(list): Latencies of the messages in seconds.
+        elapsed(float): Time in seconds between the first and the last message.
+        size(int): Message size in bytes.
+    """
+    count = len(latencies)
+    latencies = sorted(latencies)
+    rate = count / elapsed if elapsed > 0 else 0.0
+    return {
+        'messages': count,
+        'msgs_per_sec': round(rate, 1),
+        'mb_per_sec': round(rate * size / 1048576.0, 3),
+        'latency_ms': dict(('p' + str(p), round(_percentile(latencies, p) * 1000.0, 3)) for p in (50, 90, 99)) if count else {},
+        'latency_max_ms': round(latencies[-1] * 1000.0, 3) if count else None
+    }
+
+
+class Messages(object):
+    """Source callable creating the messages after a warm-up delay for the consumer to start."""
+    def __init__(self, schema, count, size, delay):
+        self.schema = schema
+        self.count = count
+        self.size = size
+        self.delay = delay
+
+    def __call__(self):
+        time.sleep(self.delay)
+        for seq in range(self.count):
+            yield payload(self.schema, seq, self.size)
+
+
+class Recorder(object):
+    """Sink callable recording the latencies, which writes the statistics to `path` after `count` messages."""
+    def __init__(self, schema, count, size, path):
+        self.schema = schema
+        self.count = count
+        self.size = size
+        self.path = path
+        self.latencies = []
+        self.first = None
+
+    def __call__(self, tuple):
+        now = time.time()
+        if len(self.latencies) >= self.count:
+            return
+        if self.first is None:
+            self.first = now
+        self.latencies.append(now - timestamp(self.schema, tuple))
+        if len(self.latencies) == self.count:
+            with open(self.path, 'w') as f:
+                json.dump(summarize(self.latencies, now - self.first, self.size), f)
+
+
+def build(schema, count, size, parallel, preset, topic, credentials=None, properties=None, delay=10.0, path=None, broker=None):
+    """Builds the topology of a benchmark run.
+
+    Returns:
+        tuple: The topology and the stream of received messages.
+    """
+    topo = Topology('EventStreamsBenchmark')
+    toolkit = os.environ.get('EVENTSTREAMS_TOOLKIT_HOME')
+    if toolkit is not None:
+        streamsx.spl.toolkit.add_toolkit(topo, toolkit)
+    producer_properties = evstr.producer_properties(None if preset == 'default' else preset)
+    consumer_properties = evstr.consumer_properties(None if preset == 'default' else preset)
+    producer_properties.update(properties or dict())
+    consumer_properties.update(properties or dict())
+    stream = topo.source(Messages(schema, count, size, delay), name='Messages')
+    if schema == 'string':
+        stream = stream.as_string()
+    elif schema == 'json':
+        stream = stream.as_json()
+    else:
+        stream = stream.map(schema=SCHEMAS[schema])
+    width = parallel if parallel > 1 else None
+    evstr.publish(stream, topic, credentials=credentials, properties=producer_properties, parallel=width, emulator=broker)
+    received = evstr.subscribe(topo, topic, SCHEMAS[schema], group='benchmark-' + str(uuid.uuid4()),
+        credentials=credentials, properties=consumer_properties, parallel=width, emulator=broker)
+    if width is not None:
+        received = received.end_parallel()
+    if path is not None:
+        received.for_each(Recorder(schema, count, size, path), name='Recorder')
+    return topo, received
+
+
+def run(ctxtype, config, schema, count, size, parallel, preset, topic, credentials, properties, delay, broker=None):
+    """Runs a benchmark and returns its result."""
+    path = os.path.join(tempfile.mkdtemp(), 'result.json')
+    topo, received = build(schema, count, size, parallel, preset, topic, credentials, properties, delay, path, broker)
+    tester = Tester(topo)
+    tester.tuple_count(received, count, exact=False)
+    passed = tester.test(ctxtype, config, assert_on_fail=False)
+    result = {'schema': schema, 'size': size, 'parallel': parallel, 'preset': preset, 'passed': passed}
+    if passed and os.path.isfile(path):
+        with open(path) as f:
+            result.update(json.load(f))
+    return result
+
+
+def _key(result):
+    return (result['schema'], result['size'], result['parallel'], result['preset'], result.get('emulator', False))
+
+
+def regressions(results, baseline, tolerance):
+    """Returns the results with a throughput below the baseline by more than `tolerance`."""
+    base = dict((_key(r), r) for r in baseline if r.get('msgs_per_sec'))
+    found = []
+    for result in results:
+        previous = base.get(_key(result))
+        if previous is not None and result.get('msgs_per_sec', 0.0) < previous['msgs_per_sec'] * (1.0 - tolerance):
+            found.append(dict(result, baseline_msgs_per_sec=previous['msgs_per_sec']))
+    return found
+
+
+def _load_json(value):
+    if value is None:
+        return None
+    if os.path.isfile(value):
+        with open(value) as f:
+            return json.load(f)
+    return value
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Throughput and latency benchmark of Event Streams publish and subscribe')
+    parser.add_argument('--topic', default='BENCHMARK', help='Topic, used by all runs')
+    parser.add_argument('--credentials', help='File with the credentials in JSON, or name of the application configuration')
+    parser.add_argument('--properties', help='File with Kafka properties in JSON, merged into the producer and consumer properties')
+    parser.add_argument('--count', type=int, default=100000, help='Number of messages per run')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000], help='Message sizes in bytes')
+    parser.add_argument('--schemas', nargs='+', choices=sorted(SCHEMAS), default=sorted(SCHEMAS), help='Stream schemas')
+    parser.add_argument('--parallel', type=int, nargs='+', default=[1], help='Widths of the parallel regions')
+    parser.add_argument('--presets', nargs='+', choices=PRESETS, default=['default'], help='Presets of the producer and consumer properties')
+    parser.add_argument('--emulator', action='store_true', help='Use an in-process broker instead of Event Streams')
+    parser.add_argument('--delay', type=float, default=10.0, help='Seconds to wait for the consumer before publishing')
+    parser.add_argument('--context', default=ContextTypes.STANDALONE, help='Context type to run the topologies')
+    parser.add_argument('--output', default='benchmark-results.json', help='File for the results')
+    parser.add_argument('--baseline', help='File with the results of an earlier run')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='Relative throughput drop reported as regression')
+    args = parser.parse_args(args)
+
+    credentials = _load_json(args.credentials)
+    properties = _load_json(args.properties)
+    broker = emulator.Broker('benchmark', partitions=max(args.parallel)) if args.emulator else None
+    results = []
+    for schema, size, parallel, preset in itertools.product(args.schemas, args.sizes, args.parallel, args.presets):
+        result = run(args.context, None, schema, args.count, size, parallel, preset, args.topic, credentials, properties, args.delay, broker)
+        result['emulator'] = args.emulator
+        print(json.dumps(result))
+        results.append(result)
+
+    with open(args.output, 'w') as f:
+        json.dump({'version': evstr.__version__, 'time': time.time(), 'host': platform.node(),
+            'python': platform.python_version(), 'count': args.count, 'results': results}, f, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            found = regressions(results, json.load(f)['results'], args.tolerance)
+        for result in found:
+            print('Regression: ' + json.dumps(result))
+        if found:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,56 @@
+from unittest import TestCase
+
+import benchmark
+
+import json
+import os
+import tempfile
+
+
+class TestBenchmark(TestCase):
+    def test_payload(self):
+        for schema in benchmark.SCHEMAS:
+            tuple = benchmark.payload(schema, 7, 100, ts=1556755200.5)
+            self.assertEqual(1556755200.5, benchmark.timestamp(schema, tuple))
+        self.assertEqual(100, len(benchmark.payload('string', 7, 100)))
+        self.assertEqual(1000, len(benchmark.payload('binary_message', 7, 1000)['message']))
+        self.assertEqual('7', benchmark.payload('string_message', 7, 100)['key'])
+
+    def test_recorder(self):
+        path = os.path.join(tempfile.mkdtemp(), 'result.json')
+        recorder = benchmark.Recorder('json', 10, 100, path)
+        for seq in range(12):
+            recorder(benchmark.payload('json', seq, 100))
+        with open(path) as f:
+            result = json.load(f)
+        self.assertEqual(10, result['messages'])
+        self.assertEqual(['p50', 'p90', 'p99'], sorted(result['latency_ms']))
+
+    def test_summarize(self):
+        result = benchmark.summarize([i / 1000.0 for i in range(100, 0, -1)], 2.0, 1048576)
+        self.assertEqual(50.0, result['msgs_per_sec'])
+        self.assertEqual(50.0, result['mb_per_sec'])
+        self.assertEqual({'p50': 51.0, 'p90': 91.0, 'p99': 100.0}, result['latency_ms'])
+        self.assertEqual(100.0, result['latency_max_ms'])
+
+    def test_regressions(self):
+        baseline = [{'schema': 'json', 'size': 100, 'parallel': 1, 'preset': 'default', 'msgs_per_sec': 1000.0}]
+        results = [dict(baseline[0], msgs_per_sec=950.0), dict(baseline[0], size=1000, msgs_per_sec=10.0)]
+        self.assertEqual([], benchmark.regressions(results, baseline, 0.1))
+        found = benchmark.regressions([dict(baseline[0], msgs_per_sec=800.0)], baseline, 0.1)
+        self.assertEqual(1000.0, found[0]['baseline_msgs_per_sec'])
+
+    def test_build(self):
+        for schema in benchmark.SCHEMAS:
+            topo, received = benchmark.build(schema, 100, 100, 2, 'throughput', 'BENCHMARK', path='result.json')
+            kinds = [op.kind for op in topo.graph.operators]
+            self.assertIn('com.ibm.streamsx.messagehub::MessageHubProducer', kinds)
+            self.assertIn('com.ibm.streamsx.messagehub::MessageHubConsumer', kinds)
+
+    def test_build_emulator(self):
+        from streamsx.eventstreams import emulator
+        topo, received = benchmark.build('binary_message', 100, 100, 2, 'default', 'BENCHMARK', path='result.json',
+            broker=emulator.Broker('benchmark', partitions=2))
+        kinds = [op.kind for op in topo.graph.operators]
+        self.assertNotIn('com.ibm.streamsx.messagehub::MessageHubProducer', kinds)
+        self.assertNotIn('com.ibm.streamsx.messagehub::MessageHubConsumer', kinds)
@@ -0,0 +1,101 @@
+from unittest import TestCase
+
+from streamsx.eventstreams import emulator
+from streamsx.eventstreams import hashing
+
+import pickle
+import threading
+import time
+
+
+class TestEmulator(TestCase):
+    def test_produce(self):
+        broker = emulator.Broker('test_produce', partitions=3)
+        records = [broker.produce('T1', 'm' + str(i)) for i in range(6)]
+        self.assertEqual([0, 1, 2, 0, 1, 2], [r.partition for r in records])
+        self.assertEqual([0, 0, 0, 1, 1, 1], [r.offset for r in records])
+        self.assertEqual(b'm0', records[0].value)
+        record = broker.produce('T1', b'\x00\x01', key='sensor_1', timestamp=1000)
+        self.assertEqual(hashing.kafka_partition('sensor_1', 3), record.partition)
+        self.assertEqual(1000, record.timestamp)
+        self.assertEqual(1, broker.produce('T1', memoryview(b'x'), partition=1).partition)
+        self.assertRaises(ValueError, broker.produce, 'T1', 'x', partition=3)
+        broker.create_topic('T6', 6)
+        broker.create_topic('T6', 6)
+        self.assertRaises(ValueError, broker.create_topic, 'T6', 2)
+        self.assertEqual(['T1', 'T6'], broker.topics())
+        self.assertEqual(['T1', 'T6'], broker.topics('T[0-9]'))
+        self.assertEqual(['T6'], broker.topics('T6'))
+
+    def test_consume(self):
+        broker = emulator.Broker('test_consume', partitions=2)
+        latest = broker.consumer(['T1'])
+        self.assertEqual([], latest.poll())
+        for i in range(10):
+            broker.produce('T1', str(i), timestamp=1000 + i)
+        self.assertEqual(10, len(latest.poll()))
+        earliest = broker.consumer('T1', start='earliest')
+        records = earliest.poll(max_records=4)
+        self.assertEqual(4, len(records))
+        self.assertEqual(6, len(earliest.poll()))
+        self.assertEqual([], earliest.poll(timeout=0.05))
+        by_time = broker.consumer(['T1'], start_time=1006)
+        self.assertEqual([b'6', b'8', b'7', b'9'], [r.value for r in by_time.poll()])
+        by_offset = broker.consumer(['T1'], partitions=[1], start_offsets={1: 3})
+        self.assertEqual([b'7', b'9'], [r.value for r in by_offset.poll()])
+        self.assertEqual(5, by_offset.position('T1', 1))
+        self.assertRaises(ValueError, broker.consumer)
+        self.assertRaises(ValueError, broker.consumer, ['T1'], start='beginning')
+
+    def test_groups(self):
+        broker = emulator.Broker('test_groups', partitions=4)
+        c1 = broker.consumer(['T1'], group='g')
+        c2 = broker.consumer(['T1'], group='g')
+        self.assertEqual(4, len(c1.assignment() + c2.assignment()))
+        self.assertEqual(set(), set(c1.assignment()) & set(c2.assignment()))
+        c1.poll()
+        c2.poll()
+        for i in range(20):
+            broker.produce('T1', str(i), key='k' + str(i))
+        self.assertEqual(20, len(c1.poll() + c2.poll()))
+        c2.close()
+        self.assertEqual(4, len(c1.assignment()))
+        self.assertEqual([], c1.poll())
+        c3 = broker.consumer(['T1'], group='g', start='earliest')
+        self.assertEqual([], c3.poll())
+        broker.produce('T1', 'last')
+        other = broker.consumer(['T1'], group='other', start='earliest')
+        self.assertEqual(21, len(other.poll()))
+
+    def test_pattern(self):
+        broker = emulator.Broker('test_pattern')
+        consumer = broker.consumer(pattern='sensors\\..*', start='earliest')
+        broker.produce('sensors.temp', 't')
+        broker.produce('sensors.hum', 'h')
+        broker.produce('other', 'o')
+        self.assertEqual([b'h', b't'], [r.value for r in consumer.poll()])
+
+    def test_wait(self):
+        broker = emulator.Broker('test_wait')
+        consumer = broker.consumer(['T1'])
+        consumer.poll()
+        timer = threading.Timer(0.05, broker.produce, ['T1', 'late'])
+        timer.start()
+        start = time.time()
+        self.assertEqual([b'late'], [r.value for r in consumer.poll(timeout=5.0)])
+        self.assertLess(time.time() - start, 5.0)
+        timer.join()
+
+    def test_registry(self):
+        broker = emulator.Broker('test_registry', partitions=2)
+        self.assertIs(broker, emulator.broker('test_registry'))
+        self.assertIs(broker, pickle.loads(pickle.dumps(broker)))
+        self.assertEqual(3, emulator.broker('test_registry_new', 3).partitions)
+        brokers = []
+        threads = [threading.Thread(target=lambda: brokers.append(emulator.broker('test_registry_concurrent'))) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(1, len(set(id(b) for b in brokers)))
+        self.assertRaises(ValueError, emulator.Broker, 'test_registry_bad', 0)
@@ -5,11 +5,14 @@ from streamsx.eventstreams.schema import Schema as MsgSchema
 from streamsx.topology.topology import Topology
 from streamsx.topology.tester import Tester
 from streamsx.topology.schema import CommonSchema, StreamSchema
+from streamsx.topology.state import ConsistentRegionConfig
+from streamsx.eventstreams import hashing
 
 import streamsx.spl.toolkit
 from streamsx.rest import StreamingAnalyticsConnection
 
 import datetime
+import itertools
 import os
 import time
 import uuid
@@ -51,6 +54,380 @@ class TestSubscribeParams(TestCase):
         self.assertRaises(TypeError, evstr.subscribe, topo, 'T1', StreamSchema('tuple<int32 a>'))
         self.assertRaises(TypeError, evstr.subscribe, topo, 'T1', 'tuple<int32 a>')
 
+    def test_attributes(self):
+        topo = Topology()
+        schema = StreamSchema('tuple<rstring sensor_id, rstring reading, int64 ts, float64 value>')
+        stream = evstr.subscribe(topo, 'T1', schema, attributes={'key': 'sensor_id', 'message': 'reading', 'timestamp': 'ts'})
+        self.assertEqual(schema, stream.oport.schema)
+        params = stream.oport.operator.params
+        self.assertEqual('sensor_id', params['outputKeyAttributeName'])
+        self.assertEqual('reading', params['outputMessageAttributeName'])
+        self.assertEqual('ts', params['outputTimestampAttributeName'])
+        self.assertNotIn('outputTopicAttributeName', params)
+        schema = StreamSchema('tuple<blob message, int32 partition, int64 offset, float64 value>')
+        stream = evstr.subscribe(topo, 'T1', schema)
+        params = stream.oport.operator.params
+        self.assertNotIn('outputMessageAttributeName', params)
+        self.assertNotIn('outputPartitionAttributeName', params)
+
+    def test_attributes_bad(self):
+        topo = Topology()
+        schema = StreamSchema('tuple<rstring sensor_id, rstring reading, int64 ts>')
+        self.assertRaises(TypeError, evstr.subscribe, topo, 'T1', schema)
+        self.assertRaises(ValueError, evstr.subscribe, topo, 'T1', schema, attributes={'message': 'payload'})
+        self.assertRaises(ValueError, evstr.subscribe, topo, 'T1', schema, attributes={'message': 'reading', 'headers': 'ts'})
+        self.assertRaises(TypeError, evstr.subscribe, topo, 'T1', schema, attributes={'message': 'ts'})
+        self.assertRaises(TypeError, evstr.subscribe, topo, 'T1', schema, attributes={'message': 'reading', 'partition': 'ts'})
+        self.assertRaises(TypeError, evstr.subscribe, topo, 'T1', schema, attributes=[('message', 'reading')])
+        self.assertRaises(TypeError, evstr.subscribe, topo, 'T1', CommonSchema.String, attributes={'message': 'string'})
+        self.assertRaises(TypeError, evstr.subscribe, topo, 'T1', StreamSchema('tuple<rstring message, int64 offset, rstring partition>'))
+
+    def test_batch(self):
+        topo = Topology()
+        for schema, batch_schema in [(MsgSchema.StringMessage, MsgSchema.StringMessageBatch),
+                                     (MsgSchema.BinaryMessage, MsgSchema.BinaryMessageBatch),
+                                     (MsgSchema.StringMessageMeta, MsgSchema.StringMessageMetaBatch),
+                                     (MsgSchema.BinaryMessageMeta, MsgSchema.BinaryMessageMetaBatch)]:
+            stream = evstr.subscribe(topo, 'T1', schema, batch_size=1000)
+            self.assertEqual(batch_schema, stream.oport.schema)
+        stream = evstr.subscribe(topo, 'T1', MsgSchema.StringMessage, batch_timeout=0.5, parallel=2)
+        stream = evstr.subscribe(topo, 'T1', MsgSchema.StringMessage, batch_timeout=datetime.timedelta(seconds=2))
+        schema = StreamSchema('tuple<rstring sensor_id, blob reading>')
+        stream = evstr.subscribe(topo, 'T1', schema, attributes={'key': 'sensor_id', 'message': 'reading'}, batch_size=10)
+        self.assertEqual(StreamSchema('tuple<list<rstring> sensor_id, list<blob> reading>')._types, stream.oport.schema._types)
+        windows = [op['inputs'][0]['window'] for op in topo.graph.generateSPLGraph()['operators'] if op['kind'] == 'spl.relational::Aggregate']
+        self.assertEqual([1000, 1000, 1000, 1000, 500, 2000, 10], [window['evictConfig'] for window in windows])
+
+    def test_batch_bad(self):
+        topo = Topology()
+        self.assertRaises(ValueError, evstr.subscribe, topo, 'T1', MsgSchema.StringMessage, batch_size=100, batch_timeout=1.0)
+        self.assertRaises(ValueError, evstr.subscribe, topo, 'T1', MsgSchema.StringMessage, batch_size=0)
+        self.assertRaises(ValueError, evstr.subscribe, topo, 'T1', MsgSchema.StringMessage, batch_timeout=0)
+        self.assertRaises(TypeError, evstr.subscribe, topo, 'T1', MsgSchema.StringMessage, batch_timeout='1s')
+        self.assertRaises(TypeError, evstr.subscribe, topo, 'T1', CommonSchema.String, batch_size=100)
+        self.assertRaises(TypeError, evstr.subscribe, topo, 'T1', StreamSchema('tuple<rstring message, list<rstring> tags>'), batch_size=100)
+
+    def test_named_tuples(self):
+        topo = Topology()
+        meta = ('message', 'key', 'topic', 'partition', 'offset', 'messageTimestamp')
+        for schema, name, fields in [(MsgSchema.StringMessage, 'StringMessageTuple', ('message', 'key')),
+                           (MsgSchema.BinaryMessage, 'BinaryMessageTuple', ('message', 'key')),
+                           (MsgSchema.StringMessageMeta, 'StringMessageMetaTuple', meta),
+                           (MsgSchema.BinaryMessageMeta, 'BinaryMessageMetaTuple', meta)]:
+            stream = evstr.subscribe(topo, 'T1', schema, named_tuples=True)
+            self.assertEqual(schema.schema(), stream.oport.schema.schema())
+            self.assertEqual(fields, stream.oport.schema.style._fields)
+            self.assertEqual(name, stream.oport.schema.style._splpy_namedtuple)
+            self.assertEqual(schema, evstr.subscribe(topo, 'T1', schema).oport.schema)
+        stream = evstr.subscribe(topo, 'T1', MsgSchema.StringMessage, named_tuples=True, batch_size=10)
+        self.assertEqual(('message', 'key'), stream.oport.schema.style._fields)
+        self.assertEqual(CommonSchema.String, evstr.subscribe(topo, 'T1', CommonSchema.String, named_tuples=True).oport.schema)
+
+    def test_unpack(self):
+        topo = Topology()
+        for schema in [CommonSchema.String, CommonSchema.Json, MsgSchema.StringMessage, MsgSchema.BinaryMessage, MsgSchema.StringMessageMeta, MsgSchema.BinaryMessageMeta]:
+            stream = evstr.subscribe(topo, 'T1', schema, unpack=True)
+            self.assertEqual(schema, stream.oport.schema)
+        consumers = [op for op in topo.graph.operators if op.kind == 'com.ibm.streamsx.messagehub::MessageHubConsumer']
+        self.assertEqual([MsgSchema.BinaryMessage] * 4 + [MsgSchema.BinaryMessageMeta] * 2, [op.outputPorts[0].schema for op in consumers])
+        stream = evstr.subscribe(topo, 'T1', MsgSchema.StringMessage, unpack=True, named_tuples=True)
+        self.assertEqual(('message', 'key'), stream.oport.schema.style._fields)
+
+    def test_unpack_bad(self):
+        topo = Topology()
+        self.assertRaises(TypeError, evstr.subscribe, topo, 'T1', StreamSchema('tuple<rstring message, rstring id>'), unpack=True)
+        self.assertRaises(ValueError, evstr.subscribe, topo, 'T1', MsgSchema.StringMessage, unpack=True, batch_size=10)
+
+    def test_key_filter(self):
+        import re
+        topo = Topology()
+        evstr.subscribe(topo, 'T1', MsgSchema.StringMessage, key_filter='sensor_')
+        evstr.subscribe(topo, 'T1', MsgSchema.BinaryMessageMeta, key_filter={'b', 'a"'}, parallel=2)
+        evstr.subscribe(topo, 'T1', MsgSchema.StringMessage, key_filter=re.compile(r'sensor_\d+'), unpack=True)
+        schema = StreamSchema('tuple<rstring sensor_id, rstring reading>')
+        evstr.subscribe(topo, 'T1', schema, attributes={'key': 'sensor_id', 'message': 'reading'}, key_filter=['s1'])
+        filters = [op for op in topo.graph.operators if op.kind == 'spl.relational::Filter']
+        self.assertEqual(['substring(key, 0, 7) == "sensor_"',
+                          'key in {"a\\"", "b"}',
+                          'size(regexMatchPerl(key, "sensor_\\\\d+")) > 0',
+                          'sensor_id in {"s1"}'],
+                         [op.params['filter'].spl_json()['value'] for op in filters])
+        for op in filters:
+            self.assertTrue(op._placement['colocateTags'])
+
+    def test_key_filter_bad(self):
+        topo = Topology()
+        self.assertRaises(TypeError, evstr.subscribe, topo, 'T1', CommonSchema.String, key_filter='s')
+        self.assertRaises(TypeError, evstr.subscribe, topo, 'T1', StreamSchema('tuple<rstring message, int64 key>'), key_filter='s')
+        self.assertRaises(ValueError, evstr.subscribe, topo, 'T1', MsgSchema.StringMessage, key_filter=set())
+        self.assertRaises(TypeError, evstr.subscribe, topo, 'T1', MsgSchema.StringMessage, key_filter={1, 2})
+        self.assertRaises(TypeError, evstr.subscribe, topo, 'T1', MsgSchema.StringMessage, key_filter=lambda k: True)
+
+    def test_shedding(self):
+        topo = Topology()
+        policy = evstr.shedding_policy(sample=0.25, lag=30.0)
+        self.assertEqual({'sample': 0.25, 'lag': 30.0}, policy)
+        evstr.subscribe(topo, 'T1', MsgSchema.StringMessageMeta, shedding=policy)
+        evstr.subscribe(topo, 'T1', CommonSchema.String, shedding=evstr.shedding_policy(max_rate=1000), parallel=2)
+        schema = StreamSchema('tuple<rstring sensor_id, rstring reading, int64 ts>')
+        evstr.subscribe(topo, 'T1', schema, attributes={'key': 'sensor_id', 'message': 'reading', 'timestamp': 'ts'}, shedding=policy)
+        shedders = [op for op in topo.graph.operators if '_shedding' in op.name]
+        self.assertEqual(3, len(shedders))
+
+    def test_shedding_bad(self):
+        topo = Topology()
+        self.assertRaises(ValueError, evstr.shedding_policy)
+        self.assertRaises(ValueError, evstr.shedding_policy, lag=10.0)
+        self.assertRaises(ValueError, evstr.shedding_policy, sample=1.5)
+        self.assertRaises(ValueError, evstr.shedding_policy, sample=0)
+        self.assertRaises(TypeError, evstr.shedding_policy, max_rate='fast')
+        self.assertRaises(ValueError, evstr.subscribe, topo, 'T1', MsgSchema.StringMessage, shedding=evstr.shedding_policy(sample=0.5, lag=1.0))
+        self.assertRaises(TypeError, evstr.subscribe, topo, 'T1', MsgSchema.StringMessage, shedding=0.5)
+
+    def test_shedder(self):
+        import time
+        from streamsx.eventstreams._eventstreams import _Shedder, _shedder
+        shedder = _Shedder(0.5, None, None, 'key', None)
+        keys = ['sensor_' + str(i) for i in range(1000)]
+        passed = [k for k in keys if shedder({'key': k, 'message': ''})]
+        self.assertTrue(400 < len(passed) < 600)
+        self.assertEqual(passed, [k for k in keys if shedder({'key': k, 'message': ''})])
+        self.assertEqual(50, sum(1 for i in range(100) if shedder({'key': '', 'message': ''})))
+        named_schema = MsgSchema.StringMessageMeta.as_tuple(named=True)
+        shedder = _shedder({'sample': 0.5, 'lag': 60.0}, named_schema, 'key', 'messageTimestamp')
+        self.assertEqual(passed, [k for k in keys if shedder(named_schema.style(message='', key=k, topic='T1', partition=0, offset=0, messageTimestamp=0))])
+        shedder = _Shedder(None, 10, None, None, None)
+        self.assertEqual(10, sum(1 for i in range(100) if shedder('message')))
+        now = int(time.time() * 1000)
+        shedder = _Shedder(0.01, None, 60.0, None, 'messageTimestamp')
+        self.assertTrue(all(shedder({'messageTimestamp': now}) for i in range(100)))
+        self.assertEqual(1, sum(1 for i in range(100) if shedder({'messageTimestamp': now - 120000})))
+
+    def test_latency_metrics(self):
+        topo = Topology()
+        evstr.subscribe(topo, 'T1', MsgSchema.BinaryMessageMeta, latency_metrics=True, parallel=2)
+        evstr.subscribe(topo, 'T1', MsgSchema.StringMessageMeta, latency_metrics=True, named_tuples=True)
+        evstr.subscribe(topo, 'T1', StreamSchema('tuple<rstring text, int32 part, int64 off, int64 ts>'), latency_metrics=True,
+            attributes={'message': 'text', 'partition': 'part', 'offset': 'off', 'timestamp': 'ts'})
+        self.assertEqual(3, len([op for op in topo.graph.operators if '_latency' in op.name]))
+        self.assertRaises(ValueError, evstr.subscribe, topo, 'T1', MsgSchema.StringMessage, latency_metrics=True)
+        self.assertRaises(ValueError, evstr.subscribe, topo, 'T1', CommonSchema.String, latency_metrics=True)
+        self.assertRaises(ValueError, evstr.subscribe, topo, ['T1', 'T2'], MsgSchema.StringMessageMeta, latency_metrics=True)
+        self.assertRaises(ValueError, evstr.subscribe, topo, None, MsgSchema.StringMessageMeta, pattern='T.*', latency_metrics=True)
+
+    def test_latency_stage(self):
+        from streamsx.eventstreams._eventstreams import _latency_metrics, _LATENCY_BOUNDS
+        named_schema = MsgSchema.StringMessageMeta.as_tuple(named=True)
+        latency = _latency_metrics(named_schema, 'messageTimestamp', 'partition', 'offset')
+        now = int(time.time() * 1000)
+        for offset, age in enumerate([0, 3, 3, 150, 3600000]):
+            self.assertTrue(latency(named_schema.style(message='', key='', topic='T1', partition=offset % 2, offset=offset, messageTimestamp=now - age)))
+        counts = latency._partitions[0].counts
+        self.assertEqual(len(_LATENCY_BOUNDS) + 1, len(counts))
+        self.assertEqual(1, counts[_LATENCY_BOUNDS.index(5)])
+        self.assertEqual(1, counts[-1])
+        self.assertEqual(4, latency._partitions[0].offset)
+        self.assertEqual(2, latency._partitions[1].records)
+        self.assertEqual(1, latency._partitions[1].counts[_LATENCY_BOUNDS.index(200)])
+
+    def test_start(self):
+        topo = Topology()
+        start = datetime.datetime(2019, 5, 1, tzinfo=datetime.timezone.utc)
+        params = evstr.subscribe(topo, 'T1', MsgSchema.StringMessageMeta, start_time=start, partition_count=4, parallel=4).oport.operator.params
+        self.assertEqual('Time', params['startPosition'].spl_json()['value'])
+        self.assertEqual(1556668800000, params['startTime'].spl_json()['value'])
+        self.assertTrue(params['propertiesFile'].startswith('etc/eventstreams-consumer-'))
+        params = evstr.subscribe(topo, 'T1', MsgSchema.StringMessage, start_offsets={2: 100, 0: 5}).oport.operator.params
+        self.assertEqual('Offset', params['startPosition'].spl_json()['value'])
+        self.assertEqual('5l, 100l', params['startOffset'].spl_json()['value'])
+        self.assertEqual('0, 2', params['partition'].spl_json()['value'])
+        params = evstr.subscribe(topo, 'T1', MsgSchema.StringMessage, start_position='end').oport.operator.params
+        self.assertEqual('End', params['startPosition'].spl_json()['value'])
+        self.assertNotIn('propertiesFile', params)
+        params = evstr.subscribe(topo, 'T1', MsgSchema.StringMessage, start_position='beginning', properties={'max.poll.records': 10}).oport.operator.params
+        self.assertEqual('Beginning', params['startPosition'].spl_json()['value'])
+
+    def test_end(self):
+        topo = Topology()
+        stream = evstr.subscribe(topo, 'T1', MsgSchema.StringMessageMeta, start_time=1556668800, end_time=1556755200.5)
+        self.assertEqual(1556755200500, stream._op().function.end_millis)
+        stream = evstr.subscribe(topo, 'T1', MsgSchema.BinaryMessageMeta, start_offsets={0: 5, 1: 7}, end_offsets={0: 1000, 1: 2000}, key_filter='s')
+        end_bound = stream._op().function
+        self.assertEqual({0: 1000, 1: 2000}, end_bound.end_offsets)
+        self.assertEqual([0, 1], end_bound.partitions)
+        filters = [op for op in topo.graph.operators if op.kind == 'spl.relational::Filter']
+        self.assertEqual(['substring(key, 0, 1) == "s"'], [op.params['filter'].spl_json()['value'] for op in filters])
+        stream = evstr.subscribe(topo, 'T1', MsgSchema.StringMessageMeta, named_tuples=True, end_offsets={0: 10})
+        self.assertEqual((3, 4), (stream._op().function.partition_key, stream._op().function.offset_key))
+
+    def test_end_bound(self):
+        from streamsx.eventstreams._eventstreams import _EndBound
+        end_bound = _EndBound(None, {0: 3, 1: 2}, None, None, 'partition', 'offset')
+        self.assertEqual([True, True, True, False], [end_bound({'partition': 0, 'offset': o}) for o in range(4)])
+        self.assertFalse(end_bound({'partition': 2, 'offset': 0}))
+        self.assertTrue(end_bound.ended())
+        self.assertTrue(end_bound({'partition': 1, 'offset': 0}))
+        self.assertFalse(end_bound.ended())
+        self.assertTrue(end_bound({'partition': 1, 'offset': 1}))
+        self.assertTrue(end_bound.ended())
+
+        end_bound = _EndBound(1000, None, None, 'messageTimestamp', 'partition', None)
+        end_bound._assigned = {0, 1}
+        self.assertTrue(end_bound({'partition': 0, 'messageTimestamp': 1000}))
+        self.assertFalse(end_bound({'partition': 0, 'messageTimestamp': 1001}))
+        self.assertFalse(end_bound.ended())
+        self.assertFalse(end_bound({'partition': 1, 'messageTimestamp': 2000}))
+        self.assertTrue(end_bound.ended())
+
+    def test_start_end_bad(self):
+        topo = Topology()
+        self.assertRaises(ValueError, evstr.subscribe, topo, 'T1', MsgSchema.StringMessage, start_position='latest')
+        self.assertRaises(ValueError, evstr.subscribe, topo, 'T1', MsgSchema.StringMessage, start_position='end', start_time=0)
+        self.assertRaises(TypeError, evstr.subscribe, topo, 'T1', MsgSchema.StringMessage, start_time='yesterday')
+        self.assertRaises(ValueError, evstr.subscribe, topo, 'T1', MsgSchema.StringMessage, start_offsets={0: -1})
+        self.assertRaises(ValueError, evstr.subscribe, topo, 'T1', MsgSchema.StringMessage, start_offsets={0: 1}, parallel=2)
+        self.assertRaises(ValueError, evstr.subscribe, topo, 'T1', MsgSchema.StringMessage, end_time=1556755200)
+        self.assertRaises(TypeError, evstr.subscribe, topo, 'T1', CommonSchema.String, end_offsets={0: 1})
+        self.assertRaises(ValueError, evstr.subscribe, topo, 'T1', MsgSchema.StringMessageMeta, partition_count=3, end_offsets={0: 1, 1: 1})
+        self.assertRaises(ValueError, evstr.subscribe, topo, 'T1', MsgSchema.StringMessageMeta, start_offsets={0: 1, 1: 1}, end_offsets={0: 5})
+        self.assertRaises(ValueError, evstr.subscribe, topo, ['T1', 'T2'], MsgSchema.StringMessageMeta, end_offsets={0: 5})
+        self.assertRaises(ValueError, evstr.subscribe, topo, None, MsgSchema.StringMessageMeta, pattern='T.*', end_offsets={0: 5})
+
+    def test_consistent_region(self):
+        topo = Topology()
+        stream = evstr.subscribe(topo, 'T1', MsgSchema.StringMessage, trigger_count=10000)
+        op = stream.oport.operator
+        self.assertEqual(10000, op.params['triggerCount'].spl_json()['value'])
+        self.assertEqual('OPERATOR_DRIVEN', op.generateSPLOperator()['consistent']['trigger'])
+        stream = evstr.subscribe(topo, 'T1', MsgSchema.StringMessage, parallel=3,
+            consistent_region=ConsistentRegionConfig.periodic(30.0, drain_timeout=120.0))
+        op = stream.oport.operator
+        self.assertNotIn('triggerCount', op.params)
+        self.assertEqual('PERIODIC', op.generateSPLOperator()['consistent']['trigger'])
+        self.assertEqual('30.0', op.generateSPLOperator()['consistent']['period'])
+        stream = evstr.subscribe(topo, 'T1', MsgSchema.StringMessage, trigger_count=500,
+            consistent_region=ConsistentRegionConfig.operator_driven(drain_timeout=60.0))
+        self.assertEqual('60.0', stream.oport.operator.generateSPLOperator()['consistent']['drainTimeout'])
+        self.assertEqual(1, len([op for op in topo.graph.operators if op.kind == 'spl.control::JobControlPlane']))
+
+    def test_emulator(self):
+        from streamsx.eventstreams import emulator
+        topo = Topology()
+        broker = emulator.Broker('test_subscribe', partitions=4)
+        evstr.subscribe(topo, 'T1', MsgSchema.StringMessageMeta, emulator=broker, parallel=2, key_filter='sensor_')
+        evstr.subscribe(topo, 'T1', CommonSchema.Json, emulator=broker, credentials={'user': 'u'})
+        kinds = [op.kind for op in topo.graph.operators]
+        self.assertNotIn('com.ibm.streamsx.messagehub::MessageHubConsumer', kinds)
+        self.assertEqual(2, kinds.count('com.ibm.streamsx.topology.functional.python::Source'))
+        self.assertIn('spl.relational::Filter', kinds)
+        self.assertRaises(TypeError, evstr.subscribe, topo, 'T1', MsgSchema.StringMessage, emulator='local')
+        self.assertRaises(ValueError, evstr.subscribe, topo, 'T1', MsgSchema.StringMessage, emulator=broker, trigger_count=100)
+        topo = Topology()
+        evstr.subscribe(topo, 'T1', MsgSchema.StringMessage, emulator=broker, parallel=2, static_membership=True, properties={'max.poll.records': 10})
+        self.assertEqual({}, topo._files)
+
+    def test_emulated_consumer(self):
+        from streamsx.eventstreams import emulator
+        from streamsx.eventstreams._eventstreams import _EmulatedConsumer
+        broker = emulator.Broker('test_consumer', partitions=4)
+        for i in range(8):
+            broker.produce('T1', '{"id": ' + str(i) + '}', key='k' + str(i), timestamp=1000 + i)
+        fields = [('message', 'text', 'rstring'), ('key', 'key', 'blob'), ('partition', 'partition', 'int32'), ('timestamp', 'ts', 'int64')]
+        source = _EmulatedConsumer(broker, ['T1'], None, 'g', None, 4, 2, 'earliest', None, None, fields)
+        messages = source()
+        received = [next(messages) for i in range(sum(1 for i in range(8) if hashing.kafka_partition('k' + str(i), 4) % 2 == 0))]
+        self.assertTrue(all(t['partition'] % 2 == 0 for t in received))
+        self.assertTrue(all(isinstance(t['key'], bytes) and t['text'].startswith('{"id"') for t in received))
+        self.assertIsNone(next(messages))
+        source.__exit__(None, None, None)
+        source = _EmulatedConsumer(broker, ['T1'], None, 'g2', None, None, None, 'latest', 1004, None, 'json')
+        self.assertEqual([4, 5, 6, 7], sorted(t['id'] for t in itertools.islice(source(), 4)))
+
+    def test_consistent_region_bad(self):
+        topo = Topology()
+        self.assertRaises(ValueError, evstr.subscribe, topo, 'T1', MsgSchema.StringMessage, consistent_region=ConsistentRegionConfig.operator_driven())
+        self.assertRaises(ValueError, evstr.subscribe, topo, 'T1', MsgSchema.StringMessage, consistent_region=ConsistentRegionConfig.periodic(10.0), trigger_count=100)
+        self.assertRaises(ValueError, evstr.subscribe, topo, 'T1', MsgSchema.StringMessage, trigger_count=0)
+        self.assertRaises(TypeError, evstr.subscribe, topo, 'T1', MsgSchema.StringMessage, consistent_region='periodic')
+
+    def test_properties(self):
+        topo = Topology()
+        props = evstr.consumer_properties('throughput', max_poll_records=5000)
+        self.assertEqual(5000, props['max.poll.records'])
+        self.assertEqual(1048576, props['fetch.min.bytes'])
+        s = evstr.subscribe(topo, 'T1', CommonSchema.String, properties=props)
+        self.assertTrue(s.oport.operator.params['propertiesFile'].startswith('etc/eventstreams-consumer-'))
+        props = evstr.consumer_properties('low-latency')
+        self.assertEqual(1, props['fetch.min.bytes'])
+
+    def test_properties_bad(self):
+        self.assertRaises(ValueError, evstr.consumer_properties, 'slow')
+        self.assertRaises(ValueError, evstr.consumer_properties, max_poll_records=0)
+        self.assertRaises(ValueError, evstr.consumer_properties, fetch_max_wait_ms=-1)
+        self.assertRaises(ValueError, evstr.consumer_properties, receive_buffer_bytes=-2)
+        self.assertRaises(TypeError, evstr.consumer_properties, fetch_min_bytes=1.5)
+        topo = Topology()
+        self.assertRaises(TypeError, evstr.subscribe, topo, 'T1', CommonSchema.String, properties='throughput')
+
+    def test_partitions(self):
+        topo = Topology()
+        s = evstr.subscribe(topo, 'T1', CommonSchema.String, partitions=[0, 2])
+        self.assertEqual('0, 2', str(s.oport.operator.params['partition']))
+        s = evstr.subscribe(topo, 'T1', CommonSchema.String, partition_count=3)
+        self.assertEqual('0, 1, 2', str(s.oport.operator.params['partition']))
+        s = evstr.subscribe(topo, 'T1', CommonSchema.String, partition_count=6, parallel=3)
+        self.assertEqual('getChannel(), getChannel() + 3', str(s.oport.operator.params['partition']))
+        self.assertTrue(s.oport.operator.config['parallel'])
+        s = evstr.subscribe(topo, 'T1', CommonSchema.String, parallel=3)
+        self.assertNotIn('partition', s.oport.operator.params)
+
+    def test_partitions_bad(self):
+        topo = Topology()
+        self.assertRaises(ValueError, evstr.subscribe, topo, 'T1', CommonSchema.String, partition_count=5, parallel=3)
+        self.assertRaises(ValueError, evstr.subscribe, topo, 'T1', CommonSchema.String, partitions=[0], partition_count=1)
+        self.assertRaises(ValueError, evstr.subscribe, topo, 'T1', CommonSchema.String, partitions=[-1])
+        self.assertRaises(ValueError, evstr.subscribe, topo, 'T1', CommonSchema.String, parallel=0)
+        self.assertRaises(TypeError, evstr.subscribe, topo, 'T1', CommonSchema.String, partitions=[])
+
+    def test_static_membership(self):
+        topo = Topology()
+        props = evstr.consumer_properties(session_timeout_ms=60000)
+        s = evstr.subscribe(topo, 'T1', CommonSchema.String, properties=props, parallel=3, static_membership=True, cooperative_rebalancing=True)
+        files_expr = str(s.oport.operator.params['propertiesFile'])
+        self.assertIn('getChannel()', files_expr)
+        digits = files_expr.split('eventstreams-consumer-')[1][:12]
+        for channel in range(3):
+            with open(os.path.join(gettempdir(), 'eventstreams-consumer-' + digits + '-' + str(channel) + '.properties')) as f:
+                content = f.read()
+            self.assertIn('group.instance.id=T1-' + digits + '-' + str(channel) + '\n', content)
+            self.assertIn('partition.assignment.strategy=org.apache.kafka.clients.consumer.CooperativeStickyAssignor\n', content)
+            self.assertIn('session.timeout.ms=60000\n', content)
+        self.assertRaises(ValueError, evstr.subscribe, topo, 'T1', CommonSchema.String, partition_count=3, parallel=3, static_membership=True)
+
+    def test_topics(self):
+        topo = Topology()
+        s = evstr.subscribe(topo, ['T1', 'T-2'], MsgSchema.StringMessageMeta)
+        self.assertEqual(['T1', 'T-2'], s.oport.operator.params['topic'])
+        self.assertIn('T1_T_2_', str(s.oport.operator.params['groupId']))
+        s1 = evstr.subscribe(topo, ['T1_T', '2'], MsgSchema.StringMessageMeta)
+        self.assertNotEqual(str(s.oport.operator.params['groupId']), str(s1.oport.operator.params['groupId']))
+        s = evstr.subscribe(topo, 'T-1', MsgSchema.StringMessageMeta)
+        self.assertEqual('getJobName() + "_" + "T-1"', str(s.oport.operator.params['groupId']))
+        s1 = evstr.subscribe(topo, None, MsgSchema.BinaryMessageMeta, pattern='a_b')
+        s2 = evstr.subscribe(topo, None, MsgSchema.BinaryMessageMeta, pattern='a.b')
+        self.assertNotEqual(str(s1.oport.operator.params['groupId']), str(s2.oport.operator.params['groupId']))
+        s = evstr.subscribe(topo, None, MsgSchema.BinaryMessageMeta, pattern='sensors\\..*')
+        self.assertEqual('sensors\\..*', s.oport.operator.params['pattern'])
+        self.assertNotIn('topic', s.oport.operator.params)
+
+    def test_topics_bad(self):
+        topo = Topology()
+        self.assertRaises(TypeError, evstr.subscribe, topo, None, CommonSchema.String)
+        self.assertRaises(ValueError, evstr.subscribe, topo, [], CommonSchema.String)
+        self.assertRaises(ValueError, evstr.subscribe, topo, 'T1', CommonSchema.String, pattern='T.*')
+        self.assertRaises(ValueError, evstr.subscribe, topo, None, CommonSchema.String, pattern='T[')
+        self.assertRaises(ValueError, evstr.subscribe, topo, ['T1', 'T2'], CommonSchema.String, partitions=[0])
+
     def test_creds(self):
         creds_file = os.environ['EVENTSTREAMS_CREDENTIALS']
         with open(creds_file) as data_file:
@@ -123,6 +500,185 @@ class TestPublishParams(TestCase):
         evstr.publish (stringStream, "Topic")
         evstr.publish (jsonStream, "Topic")
 
+    def test_buffer_objects(self):
+        from streamsx.eventstreams._eventstreams import _BlobMessage
+        topo = Topology()
+        bufStream = topo.source([b'Hello', bytearray(b'World!')])
+        evstr.publish (bufStream, "Topic")
+        self.assertIn(MsgSchema.BinaryMessage, [op.outputPorts[0].schema for op in topo.graph.operators if op.outputPorts])
+        to_message = _BlobMessage()
+        message = to_message(bytearray(b'Hello'))
+        self.assertIsInstance(message['message'], memoryview)
+        self.assertEqual(b'Hello', message['message'].tobytes())
+        message = to_message({'message': memoryview(b'H-e-l-l-o')[::2], 'key': 'k'})
+        self.assertTrue(message['message'].c_contiguous)
+        self.assertEqual(b'Hello', message['message'].tobytes())
+        self.assertEqual('k', message['key'])
+        self.assertRaises(TypeError, to_message, 'Hello')
+
+    def test_pack(self):
+        topo = Topology()
+        pyObjStream = topo.source(['Hello', 'World!'])
+        strMsgStream = pyObjStream.map (func=lambda s: {'message': s, 'key': s}, schema=MsgSchema.StringMessage)
+        evstr.publish (strMsgStream, 'Topic', pack=100)
+        evstr.publish (pyObjStream.as_string(), 'Topic', pack_bytes=65536, pack_timeout=0.1)
+        evstr.publish (pyObjStream.as_json(), 'Topic', pack=10, pack_bytes=1024, partition_count=6)
+        producers = [op for op in topo.graph.operators if op.kind == 'com.ibm.streamsx.messagehub::MessageHubProducer']
+        self.assertEqual(3, len(producers))
+        for op in producers:
+            self.assertEqual(MsgSchema.BinaryMessage, op.inputPorts[0].schema)
+            self.assertNotIn('messageAttribute', op.params)
+        self.assertEqual(3, len([op for op in topo.graph.operators if getattr(op, 'function', None).__class__.__name__ == '_PackTicks']))
+
+    def test_pack_bad(self):
+        topo = Topology()
+        pyObjStream = topo.source(['Hello', 'World!'])
+        strMsgStream = pyObjStream.map (func=lambda s: {'message': s, 'key': s, 'topic': 'T'}, schema=MsgSchema.StringMessageMeta)
+        self.assertRaises(ValueError, evstr.publish, pyObjStream, 'Topic', pack=0)
+        self.assertRaises(TypeError, evstr.publish, pyObjStream, 'Topic', pack_bytes='1k')
+        self.assertRaises(ValueError, evstr.publish, pyObjStream, 'Topic', pack_timeout=1.0)
+        self.assertRaises(ValueError, evstr.publish, pyObjStream, 'Topic', pack=10, pack_timeout=-1)
+        self.assertRaises(ValueError, evstr.publish, strMsgStream, None, topic_attribute='topic', pack=10)
+        self.assertRaises(TypeError, evstr.publish, strMsgStream, 'Topic', pack=10)
+
+    def test_queue(self):
+        topo = Topology()
+        pyObjStream = topo.source(['Hello', 'World!'])
+        evstr.publish (pyObjStream.as_string(), 'Topic', queue_size=1000)
+        evstr.publish (pyObjStream.as_json(), 'Topic', queue_size=50, overflow='drop_oldest', parallel=2)
+        producers = [op for op in topo.graph.operators if op.kind == 'com.ibm.streamsx.messagehub::MessageHubProducer']
+        self.assertEqual({'inputPortName': 'Messages', 'congestionPolicy': 'Sys.Wait', 'queueSize': '1000'}, producers[0].config['queue'])
+        self.assertEqual({'inputPortName': 'Messages', 'congestionPolicy': 'Sys.DropFirst', 'queueSize': '50'}, producers[1].config['queue'])
+        self.assertEqual('Messages', producers[1].generateSPLOperator()['inputs'][0]['alias'])
+        self.assertEqual('jsonString', producers[1].params['messageAttribute'].spl_json()['value'])
+
+    def test_queue_bad(self):
+        topo = Topology()
+        stringStream = topo.source(['Hello', 'World!']).as_string()
+        self.assertRaises(ValueError, evstr.publish, stringStream, 'Topic', overflow='block')
+        self.assertRaises(ValueError, evstr.publish, stringStream, 'Topic', queue_size=0)
+        self.assertRaises(ValueError, evstr.publish, stringStream, 'Topic', queue_size=10, overflow='drop')
+
+    def test_rate_limit(self):
+        topo = Topology()
+        pyObjStream = topo.source(['Hello', 'World!'])
+        evstr.publish (pyObjStream.as_string(), 'Topic', name='P1', max_bytes_per_sec=1024 * 1024)
+        evstr.publish (pyObjStream.as_json(), 'Topic', max_msgs_per_sec=100, parallel=2, pack=10)
+        limiters = [op for op in topo.graph.operators if op.kind == 'com.ibm.streamsx.topology.functional.python::Filter']
+        self.assertEqual(2, len(limiters))
+        self.assertEqual('P1_rate_limit', limiters[0].name)
+
+    def test_rate_limit_bad(self):
+        topo = Topology()
+        stringStream = topo.source(['Hello', 'World!']).as_string()
+        self.assertRaises(ValueError, evstr.publish, stringStream, 'Topic', max_bytes_per_sec=0)
+        self.assertRaises(TypeError, evstr.publish, stringStream, 'Topic', max_msgs_per_sec='100')
+
+    def test_emulator(self):
+        from streamsx.eventstreams import emulator
+        topo = Topology()
+        broker = emulator.Broker('test_publish', partitions=2)
+        pyObjStream = topo.source(['Hello', 'World!'])
+        strMsgStream = pyObjStream.map (func=lambda s: {'message': s, 'key': s, 'topic': 'T'}, schema=MsgSchema.StringMessageMeta)
+        evstr.publish (pyObjStream.as_string(), 'Topic', emulator=broker)
+        evstr.publish (strMsgStream, None, topic_attribute='topic', emulator=broker, parallel=2)
+        evstr.publish (pyObjStream.as_json(), 'Topic', emulator=broker, pack=10)
+        kinds = [op.kind for op in topo.graph.operators]
+        self.assertNotIn('com.ibm.streamsx.messagehub::MessageHubProducer', kinds)
+        self.assertEqual(3, kinds.count('com.ibm.streamsx.topology.functional.python::ForEach'))
+        self.assertRaises(TypeError, evstr.publish, pyObjStream.as_string(), 'Topic', emulator='local')
+        self.assertRaises(ValueError, evstr.publish, pyObjStream.as_string(), 'Topic', emulator=broker, queue_size=10)
+        topo = Topology()
+        evstr.publish(topo.source(['Hello']).as_string(), 'Topic', emulator=broker, properties=evstr.producer_properties('throughput'))
+        self.assertEqual({}, topo._files)
+
+    def test_emulated_producer(self):
+        from streamsx.eventstreams import emulator
+        from streamsx.eventstreams._eventstreams import _emulated_producer
+        broker = emulator.Broker('test_producer', partitions=3)
+        _emulated_producer(broker, CommonSchema.Json, 'T1', None, None)({'id': 1})
+        producer = _emulated_producer(broker, MsgSchema.BinaryMessage, 'T2', None, None)
+        producer({'message': memoryview(b'\x00\x01'), 'key': 'k'})
+        producer = _emulated_producer(broker, StreamSchema('tuple<rstring message, rstring dest, int32 part>'), None, 'dest', 'part')
+        producer({'message': 'm', 'dest': 'T3', 'part': 2})
+        self.assertEqual([b'{"id": 1}'], [r.value for r in broker.consumer('T1', start='earliest').poll()])
+        record = broker.consumer('T2', start='earliest').poll()[0]
+        self.assertEqual((b'\x00\x01', 'k', hashing.kafka_partition('k', 3)), (record.value, record.key, record.partition))
+        self.assertEqual(2, broker.consumer('T3', start='earliest').poll()[0].partition)
+
+    def test_rate_limiter(self):
+        from streamsx.eventstreams._eventstreams import _RateLimiter, _TokenBucket, _rate_limiter
+        bucket = _TokenBucket(10.0)
+        self.assertEqual(0.0, bucket.take(10, 100.0))
+        self.assertAlmostEqual(0.5, bucket.take(5, 100.0))
+        self.assertAlmostEqual(0.0, bucket.take(5, 101.0))
+        self.assertAlmostEqual(0.0, bucket.take(10, 111.0))
+        limiter = _RateLimiter(1000000, None, 'message')
+        self.assertTrue(limiter({'message': memoryview(b'\x00' * 100), 'key': 'k'}))
+        self.assertEqual(1000000 - 100, limiter._bytes.tokens)
+        limiter = _RateLimiter(1000000, 1000000, None)
+        self.assertTrue(limiter('H\u00e9llo'))
+        self.assertEqual(1000000 - 6, limiter._bytes.tokens)
+        self.assertEqual(1000000 - 1, limiter._msgs.tokens)
+        limiter = _rate_limiter(MsgSchema.StringMessage.as_tuple(named=True), 1000000, None)
+        self.assertTrue(limiter(('Hello', 'k')))
+        self.assertEqual(1000000 - 5, limiter._bytes.tokens)
+        # each of four channels gets a quarter of the rate, also when the other channels are idle
+        limiter = _RateLimiter(None, 1000, None)
+        limiter._buckets(4)
+        self.assertEqual(0.0, sum(limiter._msgs.take(1, 100.0) for i in range(250)))
+        self.assertAlmostEqual(0.004, limiter._msgs.take(1, 100.0))
+        self.assertAlmostEqual(0.0, limiter._msgs.take(250, 102.0))
+
+    def test_packer(self):
+        from streamsx.eventstreams._eventstreams import _Packer, _Unpacker
+        packer = _Packer('message', 3, None, 60.0)
+        unpacker = _Unpacker('string_message', False)
+        envelopes = []
+        for i in range(7):
+            envelopes.extend(packer({'message': 'm' + str(i), 'key': 'k' + str(i % 2)}))
+        self.assertEqual(['k0', 'k1'], [envelope['key'] for envelope in envelopes])
+        messages = unpacker({'message': memoryview(envelopes[0]['message']), 'key': envelopes[0]['key']})
+        self.assertEqual([{'message': 'm0', 'key': 'k0'}, {'message': 'm2', 'key': 'k0'}, {'message': 'm4', 'key': 'k0'}], messages)
+        self.assertEqual([{'message': 'plain', 'key': 'k'}], unpacker({'message': memoryview(b'plain'), 'key': 'k'}))
+
+        packer = _Packer('string', None, 30, 60.0)
+        self.assertEqual([], packer('Hello'))
+        self.assertEqual([], packer('World!'))
+        envelope, = packer('Again')
+        self.assertNotIn('key', envelope)
+        self.assertEqual(['Hello', 'World!'], _Unpacker('string', False)(envelope))
+
+        packer = _Packer('object', 100, None, 0.0)
+        envelope, = packer(bytearray(b'\x00\x01'))
+        self.assertEqual([b'\x00\x01'], [m['message'] for m in _Unpacker('binary_message', False)({'message': envelope['message'], 'key': None})])
+        packer = _Packer('json', 2, None, 60.0)
+        self.assertEqual([], packer({'a': 1}))
+        envelope, = packer({'b': 2})
+        self.assertEqual([{'a': 1}, {'b': 2}], _Unpacker('json', False)(envelope))
+
+    def test_packer_timeout(self):
+        import time
+        from streamsx.eventstreams._eventstreams import _Packer, _PackTick, _Unpacker
+        packer = _Packer('message', 100, None, 0.05)
+        self.assertEqual([], packer({'message': 'm0', 'key': 'k0'}))
+        self.assertEqual([], packer({'message': 'm1', 'key': 'k1'}))
+        self.assertEqual([], packer(_PackTick()))
+        time.sleep(0.1)
+        envelopes = packer(_PackTick())
+        self.assertEqual(['k0', 'k1'], [envelope['key'] for envelope in envelopes])
+        self.assertEqual(['m1'], _Unpacker('string', False)(envelopes[1]))
+        self.assertEqual([], packer(_PackTick()))
+
+    def test_unpack_plain(self):
+        from streamsx.eventstreams._eventstreams import _Packer, _Unpacker
+        unpacker = _Unpacker('binary_message', False)
+        envelope, = _Packer('message', 1, None, 60.0)({'message': b'b', 'key': 'k'})
+        self.assertEqual([b'b'], [m['message'] for m in unpacker({'message': memoryview(envelope['message']), 'key': 'k'})])
+        for plain in [b'\x00EV\x01', b'\x00EV\x01\x00\x00\x00\x01', b'\x00EV\x01\x00\x00\x00\x01\x00\x00\x00\x02a',
+                      b'\x00EV\x01\x00\x00\x00\x01\x00\x00\x00\x01ab', b'\x00EV\x01\x00\x00\x00\x02\x00\x00\x00\x01a']:
+            self.assertEqual([plain], [m['message'] for m in unpacker({'message': memoryview(plain), 'key': 'k'})])
+
     def test_schemas_bad(self):
         topo = Topology()
         pyObjStream = topo.source(['Hello', 'World!'])
@@ -133,7 +689,6 @@ class TestPublishParams(TestCase):
         otherSplTupleStream1 = pyObjStream.map (schema=StreamSchema('tuple<int32 a>'))
         otherSplTupleStream2 = pyObjStream.map (schema='tuple<int32 a>')
         
-        self.assertRaises(TypeError, evstr.publish, pyObjStream, "Topic")
         self.assertRaises(TypeError, evstr.publish, binStream, "Topic")
         self.assertRaises(TypeError, evstr.publish, xmlStream, "Topic")
         self.assertRaises(TypeError, evstr.publish, binMsgMetaStream, "Topic")
@@ -141,6 +696,71 @@ class TestPublishParams(TestCase):
         self.assertRaises(TypeError, evstr.publish, otherSplTupleStream1, "Topic")
         self.assertRaises(TypeError, evstr.publish, otherSplTupleStream2, "Topic")
 
+    def test_topic_attribute(self):
+        topo = Topology()
+        pyObjStream = topo.source(['Hello', 'World!'])
+        strMsgMetaStream = pyObjStream.map (func=lambda s: {'message': s, 'key': s, 'topic': 'T_' + s}, schema=MsgSchema.StringMessageMeta)
+        sink = evstr.publish (strMsgMetaStream, None, topic_attribute='topic', partition_attribute='partition')
+        self.assertEqual('topic', sink._op().params['topicAttribute'].spl_json()['value'])
+        self.assertEqual('partition', sink._op().params['partitionAttribute'].spl_json()['value'])
+        self.assertNotIn('topic', sink._op().params)
+        routedStream = pyObjStream.map (func=lambda s: {'message': s, 'dest': 'T_' + s}, schema='tuple<rstring message, rstring dest>')
+        evstr.publish (routedStream, None, topic_attribute='dest')
+        evstr.publish (strMsgMetaStream, 'Topic', partition_attribute='partition')
+
+    def test_topic_attribute_bad(self):
+        topo = Topology()
+        pyObjStream = topo.source(['Hello', 'World!'])
+        strMsgMetaStream = pyObjStream.map (func=lambda s: {'message': s, 'key': s}, schema=MsgSchema.StringMessageMeta)
+        self.assertRaises(ValueError, evstr.publish, strMsgMetaStream, 'Topic', topic_attribute='topic')
+        self.assertRaises(ValueError, evstr.publish, strMsgMetaStream, None, topic_attribute='dest')
+        self.assertRaises(TypeError, evstr.publish, strMsgMetaStream, None, topic_attribute='offset')
+        self.assertRaises(TypeError, evstr.publish, pyObjStream.as_string(), None, topic_attribute='topic')
+        noMsgStream = pyObjStream.map (func=lambda s: {'msg': s, 'topic': s}, schema='tuple<rstring msg, rstring topic>')
+        self.assertRaises(ValueError, evstr.publish, noMsgStream, None, topic_attribute='topic')
+
+    def test_parallel(self):
+        topo = Topology()
+        pyObjStream = topo.source(['Hello', 'World!'])
+        strMsgStream = pyObjStream.map (func=lambda s: {'message': s, 'key': s}, schema=MsgSchema.StringMessage)
+        evstr.publish (strMsgStream, 'Topic', partition_count=6, parallel=3)
+        evstr.publish (pyObjStream.as_string(), 'Topic', parallel=2)
+        parallel_ports = [op.outputPorts[0] for op in topo.graph.operators if op.kind == '$Parallel$']
+        self.assertEqual([3, 2], [port.width for port in parallel_ports])
+        self.assertEqual(['HASH_PARTITIONED', 'ROUND_ROBIN'], [port.routing for port in parallel_ports])
+        self.assertRaises(ValueError, evstr.publish, strMsgStream, 'Topic', partition_count=5, parallel=3)
+        self.assertRaises(ValueError, evstr.publish, strMsgStream, 'Topic', parallel=0)
+
+    def test_key_partition(self):
+        from streamsx.eventstreams._eventstreams import _KeyPartition
+        self.assertEqual((-973932308 & 0x7FFFFFFF) % 6, _KeyPartition(6)({'key': '21', 'message': ''}))
+        topo = Topology()
+        schema = StreamSchema('tuple<rstring message, rstring key, rstring topic>').as_tuple(named=True)
+        stream = topo.source([1]).map(lambda x: ('', '21', 'T1'), schema=schema)
+        evstr.publish(stream, None, topic_attribute='topic', parallel=6)
+        key_partition = [op.function for op in topo.graph.operators if op.kind.endswith('::HashAdder')][0]
+        self.assertEqual((-973932308 & 0x7FFFFFFF) % 6, key_partition(schema.style('', '21', 'T1')))
+
+    def test_properties(self):
+        topo = Topology()
+        stream = topo.source (['Hello', 'World']).as_string()
+        props = evstr.producer_properties('throughput', linger_ms=20, acks='all')
+        self.assertEqual(20, props['linger.ms'])
+        self.assertEqual('all', props['acks'])
+        self.assertEqual('lz4', props['compression.type'])
+        sink = evstr.publish (stream, 'Topic', properties=props)
+        self.assertTrue(sink._op().params['propertiesFile'].startswith('etc/eventstreams-producer-'))
+
+    def test_properties_bad(self):
+        self.assertRaises(ValueError, evstr.producer_properties, 'fast')
+        self.assertRaises(ValueError, evstr.producer_properties, compression_type='lzma')
+        self.assertRaises(ValueError, evstr.producer_properties, acks='2')
+        self.assertRaises(ValueError, evstr.producer_properties, max_in_flight_requests=0)
+        self.assertRaises(TypeError, evstr.producer_properties, batch_size='16k')
+        topo = Topology()
+        stream = topo.source (['Hello', 'World']).as_string()
+        self.assertRaises(TypeError, evstr.publish, stream, 'Topic', properties='throughput')
+
     def test_creds(self):
         creds_file = os.environ['EVENTSTREAMS_CREDENTIALS']
         with open(creds_file) as data_file:
@@ -150,6 +770,45 @@ class TestPublishParams(TestCase):
         evstr.publish (stream, 'Topic', credentials=credentials)
         evstr.publish (stream, 'Topic', credentials='eventstreams')
 
+class TestDecodeJsonParams(TestCase):
+    def test_schemas(self):
+        topo = Topology()
+        flat = StreamSchema('tuple<rstring sensor_id, float64 value>')
+        for schema in [MsgSchema.StringMessage, MsgSchema.BinaryMessage, MsgSchema.StringMessageMeta, MsgSchema.BinaryMessageMeta]:
+            stream = evstr.subscribe(topo, 'T1', schema)
+            decoded = evstr.decode_json(stream, schema.extend(flat), name='Decode')
+            self.assertEqual(schema.extend(flat), decoded.oport.schema)
+        stream = evstr.subscribe(topo, 'T1', CommonSchema.String)
+        self.assertRaises(TypeError, evstr.decode_json, stream, flat)
+        stream = evstr.subscribe(topo, 'T1', MsgSchema.StringMessage)
+        self.assertRaises(TypeError, evstr.decode_json, stream, CommonSchema.Json)
+        stream = topo.source([1]).map(lambda x: {'msg': 'x', 'key': 'k'}, schema=StreamSchema('tuple<rstring msg, rstring key>'))
+        self.assertRaises(ValueError, evstr.decode_json, stream, flat)
+
+    def test_decoder(self):
+        from streamsx.eventstreams._eventstreams import _JsonDecoder
+        decoder = _JsonDecoder(['message', 'key', 'sensor_id', 'value', 'ts'], {'message': 'message', 'key': 'key'})
+        msg = json.dumps({'sensor_id': 'sensor_1', 'value': 1.5, 'unit': 'mm'})
+        self.assertEqual({'message': msg, 'key': 'k', 'sensor_id': 'sensor_1', 'value': 1.5},
+            decoder({'message': msg, 'key': 'k'}))
+        self.assertEqual({'key': 'k', 'message': memoryview(msg.encode()), 'sensor_id': 'sensor_1', 'value': 1.5},
+            decoder({'message': memoryview(msg.encode()), 'key': 'k'}))
+        for invalid in ['[1, 2]', '42', '"sensor_1"', 'null', '{"sensor_id": ', '']:
+            self.assertIsNone(decoder({'message': invalid, 'key': 'k'}))
+        self.assertIsNone(decoder({'message': memoryview(b'\xff{}'), 'key': 'k'}))
+        self.assertEqual(7, decoder.invalid)
+
+    def test_named_tuples(self):
+        topo = Topology()
+        received = evstr.subscribe(topo, 'T1', MsgSchema.StringMessageMeta, named_tuples=True)
+        schema = MsgSchema.StringMessageMeta.extend(StreamSchema('tuple<rstring sensor_id, float64 value>'))
+        decoder = evstr.decode_json(received, schema)._op().function
+        msg = json.dumps({'sensor_id': 'sensor_1', 'value': 1.5})
+        tuple = received.oport.schema.style(message=msg, key='k', topic='T1', partition=2, offset=7, messageTimestamp=0)
+        self.assertEqual({'message': msg, 'key': 'k', 'topic': 'T1', 'partition': 2, 'offset': 7, 'messageTimestamp': 0, 'sensor_id': 'sensor_1', 'value': 1.5},
+            decoder(tuple))
+
+
 ## Using a uuid to avoid concurrent test runs interferring
 ## with each other
 class JsonData(object):
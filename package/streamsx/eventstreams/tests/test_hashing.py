@@ -0,0 +1,51 @@
+from unittest import TestCase
+
+from streamsx.eventstreams import hashing
+from streamsx.topology.topology import Topology, Routing
+from streamsx.eventstreams.schema import Schema as MsgSchema
+
+
+def string_hashcode(s):
+    h = 0
+    for c in s:
+        h = (31 * h + ord(c)) & 0xFFFFFFFF
+    return ((h + 0x80000000) & 0xFFFFFFFF) - 0x80000000
+
+
+class TestHashing(TestCase):
+    def test_java_hashcode(self):
+        # values of String.hashCode() in Java
+        self.assertEqual(0, hashing.java_hashcode(''))
+        self.assertEqual(97, hashing.java_hashcode('a'))
+        self.assertEqual(69609650, hashing.java_hashcode('Hello'))
+        # surrogate pair for U+1F600
+        self.assertEqual(1772899, hashing.java_hashcode('\U0001F600'))
+        for s in ['sensor_' + str(i) for i in range(200)] + ['x' * 300, 'äöü' * 100]:
+            self.assertEqual(string_hashcode(s), hashing.java_hashcode(s))
+
+    def test_murmur2(self):
+        # test vectors from Kafka's UtilsTest.testMurmur2
+        self.assertEqual(-973932308, hashing.murmur2(b'21'))
+        self.assertEqual(-790332482, hashing.murmur2('foobar'))
+        self.assertEqual(-985981536, hashing.murmur2(b'a-little-bit-long-string'))
+        self.assertEqual(-1486304829, hashing.murmur2('a-little-bit-longer-string'))
+        self.assertEqual(-58897971, hashing.murmur2(b'lkjh234lh9fiuh90y23oiuhsafujhadof229phr9h19h89h8'))
+        self.assertEqual(479470107, hashing.murmur2(bytearray(b'abc')))
+        self.assertEqual((-973932308 & 0x7FFFFFFF) % 6, hashing.kafka_partition('21', 6))
+        self.assertEqual(-973932308, hashing.murmur2(memoryview(b'21')))
+        self.assertRaises(TypeError, hashing.murmur2, 21)
+        self.assertRaises(TypeError, hashing.murmur2, None)
+        self.assertRaises(TypeError, hashing.kafka_partition, 21, 6)
+
+    def test_hash_batch(self):
+        keys = ['a', 'b', 'a', 'foobar']
+        self.assertEqual([hashing.java_hashcode(k) for k in keys], hashing.hash_batch(keys))
+        self.assertEqual([hashing.murmur2(k) for k in keys], hashing.hash_batch(keys, hashing.murmur2))
+        self.assertEqual([], hashing.hash_batch([]))
+
+    def test_key_hash(self):
+        self.assertEqual(69609650, hashing.KeyHash()({'key': 'Hello', 'message': 'World'}))
+        self.assertEqual(-790332482, hashing.KeyHash('id', hashing.murmur2)({'id': 'foobar'}))
+        topo = Topology()
+        s = topo.source(['Hello', 'World!']).map(lambda s: {'message': s, 'key': s}, schema=MsgSchema.StringMessage)
+        s.parallel(3, routing=Routing.HASH_PARTITIONED, func=hashing.KeyHash('key')).end_parallel()
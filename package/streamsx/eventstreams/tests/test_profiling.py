@@ -0,0 +1,93 @@
+from unittest import TestCase
+
+from streamsx.eventstreams import profiling
+from streamsx.topology.topology import Topology
+from streamsx.eventstreams.schema import Schema as MsgSchema
+
+import json
+import os
+import time
+
+
+def flat_message_json(tuple):
+    return json.loads(tuple['message'])
+
+
+class Stateful(object):
+    def __init__(self):
+        self.entered = False
+
+    def __enter__(self):
+        self.entered = True
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.entered = False
+
+    def __call__(self, tuple):
+        time.sleep(0.002)
+        return tuple
+
+
+class TestProfiling(TestCase):
+    def test_disabled(self):
+        self.assertIs(flat_message_json, profiling.profile(flat_message_json, enabled=False))
+        os.environ.pop('STREAMSX_EVENTSTREAMS_PROFILE', None)
+        self.assertIs(flat_message_json, profiling.profile(flat_message_json))
+        os.environ['STREAMSX_EVENTSTREAMS_PROFILE'] = '1'
+        try:
+            self.assertIsInstance(profiling.profile(flat_message_json), profiling.Profiler)
+        finally:
+            del os.environ['STREAMSX_EVENTSTREAMS_PROFILE']
+
+    def test_profiler(self):
+        profiler = profiling.profile(flat_message_json, enabled=True)
+        for i in range(100):
+            self.assertEqual({'id': i}, profiler({'message': '{"id": ' + str(i) + '}', 'key': 'k'}))
+        self.assertEqual(100, profiler.calls)
+        self.assertEqual(sum(len('{"id": ' + str(i) + '}') + 1 for i in range(100)), profiler.bytes_in)
+        self.assertEqual(0, profiler.bytes_out)
+        percentiles = profiler.percentiles()
+        self.assertLessEqual(percentiles['wallTimeP50Micros'], percentiles['wallTimeP99Micros'])
+        self.assertEqual(100, sum(profiler.wall_counts))
+
+    def test_stateful(self):
+        func = Stateful()
+        profiler = profiling.Profiler(func, stack_interval=0.001)
+        with profiler:
+            self.assertTrue(func.entered)
+            for i in range(20):
+                self.assertEqual(b'data', profiler(b'data'))
+        self.assertFalse(func.entered)
+        self.assertEqual(80, profiler.bytes_out)
+        self.assertGreaterEqual(profiler.percentiles()['wallTimeP50Micros'], 2048)
+        self.assertRaises(ValueError, profiling.Profiler, func, stack_interval=0)
+
+    def test_stacks(self):
+        import pickle
+        import threading
+        profiler = pickle.loads(pickle.dumps(profiling.Profiler(Stateful(), stack_interval=0.001)))
+        stop = threading.Event()
+        sampler = threading.Thread(target=profiler._sample_stacks, args=(stop,))
+        sampler.start()
+        try:
+            for i in range(50):
+                profiler(b'data')
+        finally:
+            stop.set()
+            sampler.join()
+        self.assertGreater(sum(profiler.stacks.values()), 0)
+        self.assertTrue(any('time.sleep(0.002)' in ''.join(stack) for stack in profiler.stacks))
+        with self.assertLogs('streamsx.eventstreams.profiling', level='INFO') as logs:
+            profiler._log_stacks()
+        self.assertIn('samples in Stateful', logs.output[0])
+        self.assertEqual(0, len(profiler.stacks))
+
+    def test_topology(self):
+        topo = Topology()
+        stream = topo.source(['{"id": 1}']).map(lambda m: {'message': m, 'key': ''}, schema=MsgSchema.StringMessage)
+        profiled = stream.map(profiling.profile(flat_message_json, enabled=True))
+        profiler = profiled._op().function
+        self.assertIsInstance(profiler, profiling.Profiler)
+        self.assertIs(flat_message_json, profiler.func)
+        plain = stream.map(profiling.profile(flat_message_json, enabled=False))
+        self.assertIs(flat_message_json, plain._op().function)
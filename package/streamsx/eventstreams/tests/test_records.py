@@ -0,0 +1,45 @@
+from unittest import TestCase, skipIf
+
+try:
+    import numpy
+    from streamsx.eventstreams import records
+except ImportError:
+    numpy = None
+
+import struct
+
+SENSOR_RECORD = [('sensor_id', '<u4'), ('value', '<f8'), ('ts', '<i8')]
+
+
+@skipIf(numpy is None, 'numpy is not installed')
+class TestRecords(TestCase):
+    def test_decode(self):
+        msg = struct.pack('<Idq', 7, 1.5, 1000) + struct.pack('<Idq', 8, -2.0, 2000)
+        decoded = records.decode(msg, SENSOR_RECORD)
+        self.assertEqual(2, len(decoded))
+        self.assertEqual([7, 8], decoded['sensor_id'].tolist())
+        self.assertEqual([1.5, -2.0], decoded['value'].tolist())
+        decoded = records.decode([memoryview(msg), struct.pack('<Idq', 9, 0.5, 3000)], SENSOR_RECORD)
+        self.assertEqual([1000, 2000, 3000], decoded['ts'].tolist())
+        self.assertEqual(0, len(records.decode(b'', SENSOR_RECORD)))
+        self.assertRaises(ValueError, records.decode, msg[:-1], SENSOR_RECORD)
+        self.assertRaises(TypeError, records.decode, msg, '<f8')
+
+    def test_encode(self):
+        msg = struct.pack('<Idq', 7, 1.5, 1000) + struct.pack('<Idq', 8, -2.0, 2000)
+        self.assertEqual(msg, records.encode([(7, 1.5, 1000), (8, -2.0, 2000)], SENSOR_RECORD))
+        self.assertEqual(msg[:20], records.encode((7, 1.5, 1000), SENSOR_RECORD))
+        self.assertEqual(msg, records.encode(records.decode(msg, SENSOR_RECORD), SENSOR_RECORD))
+
+    def test_callables(self):
+        encoder = records.Encoder(SENSOR_RECORD, key='sensor_id')
+        encoded = encoder((7, 1.5, 1000))
+        self.assertEqual('7', encoded['key'])
+        decoded = records.Decoder(SENSOR_RECORD)(encoded)
+        self.assertEqual([(7, 1.5, 1000)], decoded.tolist())
+        message = bytearray(encoded['message'])
+        decoded = records.Decoder(SENSOR_RECORD)({'message': memoryview(message)})
+        message[:] = b'A' * len(message)
+        self.assertEqual([(7, 1.5, 1000)], decoded.tolist())
+        self.assertNotIn('key', records.Encoder(SENSOR_RECORD)(decoded))
+        self.assertRaises(ValueError, records.Encoder, SENSOR_RECORD, key='id')
@@ -3,6 +3,7 @@ from streamsx.topology.context import submit, ContextTypes
 from streamsx.topology.topology import Routing
 from streamsx.topology.schema import StreamSchema
 from streamsx.eventstreams.schema import Schema
+from streamsx.eventstreams import hashing
 import streamsx.eventstreams as evst
 
 import random
@@ -33,22 +34,6 @@ class SensorReadingsSource(object):
             yield reading
 
 
-# parses the JSON in the message and adds the attributes to a tuple
-def flat_message_json(tuple):
-    messageAsDict = json.loads(tuple['message'])
-    tuple.update(messageAsDict)
-    return tuple
-
-
-# calculate a hash code of a string in a consistent way
-# needed for partitioned parallel streams
-def string_hashcode(s):
-    h = 0
-    for c in s:
-        h = (31 * h + ord(c)) & 0xFFFFFFFF
-    return ((h + 0x80000000) & 0xFFFFFFFF) - 0x80000000
-
-
 topology = Topology('EventStreamsParallel')
 event_streams_topic = 'THREE_PARTITIONS_TOPIC'
 #
@@ -87,20 +72,22 @@ received = evst.subscribe(
     ).set_parallel(3).end_parallel()
 
 # start a different parallel region partitioned by message key,
-# so that each key always goes into the same parallel channel
+# so that each key always goes into the same parallel channel.
+# The hash of the key must be consistent across processes.
 receivedParallelPartitioned = received.parallel(
     5,
     routing=Routing.HASH_PARTITIONED,
-    func=lambda x: string_hashcode(x['key']))
+    func=hashing.KeyHash('key'))
 
 # schema extension, here we use the Python 2.7, 3 way
 flattenedSchema = consumerSchema.extend(
     StreamSchema('tuple<rstring sensor_id, float64 value, int64 ts>'))
 
-receivedParallelPartitionedFlattened = receivedParallelPartitioned.map(
-    func=flat_message_json,
-    name='JSON2Attributes',
-    schema=flattenedSchema)
+# parse the JSON in the message and set the attributes of the flattened schema
+receivedParallelPartitionedFlattened = evst.decode_json(
+    receivedParallelPartitioned,
+    schema=flattenedSchema,
+    name='JSON2Attributes')
 
 # validate by remove negativ and zero values from the streams,
 # pass only positive vaues and timestamps